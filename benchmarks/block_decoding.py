@@ -0,0 +1,232 @@
+"""
+Compares parsing block notifications as subscribed before (jsonParsed, full details, json.loads) with the lighter
+subscriptions decoded by celeritas.block_decoder (base64 / full for the sniper, json / accounts for the tx listener).
+
+Recorded notifications are used if benchmarks/fixtures/blocks/<encoding>_<details>/ contains any, record them with
+``python -m benchmarks.block_decoding --record 20``. Without recordings, synthetic blocks shaped like busy
+pump.fun blocks are generated, all three formats describing the same transactions.
+
+Usage: python -m benchmarks.block_decoding [--record N]
+"""
+
+import asyncio
+import base64
+import glob
+import json
+import os
+import random
+import sys
+import time
+
+import base58
+from solders.hash import Hash
+from solders.instruction import CompiledInstruction
+from solders.message import MessageHeader
+from solders.message import MessageV0
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.transaction import VersionedTransaction
+
+from celeritas.block_decoder import decode_block
+from celeritas.block_decoder import loads
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "blocks")
+FORMATS = [("jsonParsed", "full"), ("base64", "full"), ("json", "accounts")]
+MINT_AUTHORITY = "TSLvdd1pWpHVjahSpsvCXUbgwsL3JAcvokwaKt1eokM"
+
+
+def synthetic_transaction(rng: random.Random) -> dict:
+    """One transaction in every subscription format, {(encoding, details): tx}"""
+    keys = [Pubkey.new_unique() for _ in range(16)]
+    n_signers = 2
+    instructions = [
+        CompiledInstruction(15, bytes([3]) + rng.randbytes(8), bytes()),
+        CompiledInstruction(15, bytes([2]) + rng.randbytes(4), bytes()),
+        CompiledInstruction(14, rng.randbytes(rng.randint(40, 120)), bytes(range(14))),
+    ]
+    message = MessageV0(MessageHeader(n_signers, 0, 3), keys, Hash.new_unique(), instructions, [])
+    signatures = [Signature(rng.randbytes(64)) for _ in range(n_signers)]
+    raw = bytes(VersionedTransaction.populate(message, signatures))
+    str_keys = [str(key) for key in keys]
+    token_balance = lambda amount: [
+        {
+            "accountIndex": 4,
+            "mint": str_keys[1],
+            "owner": str_keys[0],
+            "programId": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA",
+            "uiTokenAmount": {"amount": str(amount), "decimals": 6, "uiAmount": amount / 1e6, "uiAmountString": str(amount / 1e6)},
+        }
+    ]
+    meta = {
+        "err": None,
+        "fee": 5000,
+        "preBalances": [rng.randint(0, 10**10) for _ in keys],
+        "postBalances": [rng.randint(0, 10**10) for _ in keys],
+        "preTokenBalances": token_balance(0),
+        "postTokenBalances": token_balance(rng.randint(1, 10**12)),
+        "innerInstructions": [
+            {
+                "index": 2,
+                "instructions": [
+                    {"programIdIndex": 13, "accounts": [0, 4, 1], "data": base58.b58encode(rng.randbytes(40)).decode(), "stackHeight": 2}
+                    for _ in range(6)
+                ],
+            }
+        ],
+        "logMessages": [f"Program {str_keys[14]} invoke [1]", "Program log: Instruction: Create"]
+        + [f"Program log: {base64.b64encode(rng.randbytes(60)).decode()}" for _ in range(12)]
+        + [f"Program {str_keys[14]} consumed 64123 of 200000 compute units", f"Program {str_keys[14]} success"],
+        "rewards": [],
+        "loadedAddresses": {"writable": [], "readonly": []},
+        "computeUnitsConsumed": 64123,
+    }
+    signature_strs = [str(signature) for signature in signatures]
+    json_instructions = [
+        {"programIdIndex": ix.program_id_index, "accounts": list(ix.accounts), "data": base58.b58encode(ix.data).decode(), "stackHeight": None}
+        for ix in instructions
+    ]
+    parsed_keys = [
+        {"pubkey": key, "signer": i < n_signers, "writable": i < 13, "source": "transaction"}
+        for i, key in enumerate(str_keys)
+    ]
+    parsed_meta = {
+        **meta,
+        "innerInstructions": [
+            {
+                "index": 2,
+                "instructions": [
+                    {
+                        "program": "spl-token",
+                        "programId": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA",
+                        "parsed": {
+                            "type": "transfer",
+                            "info": {"source": str_keys[4], "destination": str_keys[5], "authority": str_keys[0], "amount": "1000"},
+                        },
+                        "stackHeight": 2,
+                    }
+                    for _ in range(6)
+                ],
+            }
+        ],
+    }
+    return {
+        ("jsonParsed", "full"): {
+            "transaction": {
+                "signatures": signature_strs,
+                "message": {
+                    "accountKeys": parsed_keys,
+                    "recentBlockhash": str(message.recent_blockhash),
+                    "instructions": [
+                        {"programId": str_keys[ix["programIdIndex"]], "accounts": [str_keys[i] for i in ix["accounts"]], "data": ix["data"], "stackHeight": None}
+                        for ix in json_instructions
+                    ],
+                    "addressTableLookups": [],
+                },
+            },
+            "meta": parsed_meta,
+            "version": 0,
+        },
+        ("base64", "full"): {"transaction": [base64.b64encode(raw).decode(), "base64"], "meta": meta, "version": 0},
+        ("json", "accounts"): {
+            "transaction": {"signatures": signature_strs, "accountKeys": parsed_keys},
+            "meta": {key: value for key, value in meta.items() if key not in ("innerInstructions", "logMessages")},
+            "version": 0,
+        },
+    }
+
+
+def synthetic_messages(n_blocks: int = 20, txs_per_block: int = 150, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    messages = {fmt: [] for fmt in FORMATS}
+    for slot in range(n_blocks):
+        txs = [synthetic_transaction(rng) for _ in range(txs_per_block)]
+        for fmt in FORMATS:
+            value = {
+                "slot": slot,
+                "block": {"blockTime": 1_700_000_000, "blockHeight": slot, "transactions": [tx[fmt] for tx in txs]},
+                "err": None,
+            }
+            notification = {"jsonrpc": "2.0", "method": "blockNotification", "params": {"result": {"context": {"slot": slot}, "value": value}, "subscription": 1}}
+            messages[fmt].append(json.dumps(notification))
+    return messages
+
+
+def recorded_messages() -> dict:
+    messages = {}
+    for encoding, details in FORMATS:
+        files = sorted(glob.glob(os.path.join(FIXTURES_DIR, f"{encoding}_{details}", "*.json")))
+        if not files:
+            return None
+        messages[(encoding, details)] = [open(f).read() for f in files]
+    return messages
+
+
+async def record(n_blocks: int) -> None:
+    from celeritas.block_stream import BlockStream
+
+    import websockets
+
+    for encoding, details in FORMATS:
+        directory = os.path.join(FIXTURES_DIR, f"{encoding}_{details}")
+        os.makedirs(directory, exist_ok=True)
+        stream = BlockStream(MINT_AUTHORITY, transaction_details=details, encoding=encoding)
+        async with websockets.connect(stream.url, max_size=None) as websocket:
+            await websocket.send(json.dumps(stream.subscription_request()))
+            n = 0
+            async for message in websocket:
+                if '"blockNotification"' in message:
+                    with open(os.path.join(directory, f"{n:04d}.json"), "w") as f:
+                        f.write(message)
+                    n += 1
+                    if n == n_blocks:
+                        break
+        print(f"Recorded {n_blocks} {encoding}/{details} blocks")
+
+
+def parse_before(message: str):
+    """What the listeners did before, json.loads and walking the jsonParsed structure"""
+    block = json.loads(message)["params"]["result"]["value"]["block"]
+    for tx in block["transactions"]:
+        tx["transaction"]["signatures"][0]
+        [key["pubkey"] for key in tx["transaction"]["message"]["accountKeys"]]
+        for instruction in tx["transaction"]["message"]["instructions"]:
+            instruction.get("accounts", [])
+    return block
+
+
+def parse_after(message: str):
+    return decode_block(loads(message)["params"]["result"]["value"]["block"])
+
+
+def timed(fn, messages, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for message in messages:
+            fn(message)
+        best = min(best, time.perf_counter() - start)
+    return best / len(messages)
+
+
+def main():
+    if "--record" in sys.argv:
+        asyncio.run(record(int(sys.argv[sys.argv.index("--record") + 1])))
+        return
+    messages = recorded_messages()
+    source = "recorded"
+    if messages is None:
+        messages, source = synthetic_messages(), "synthetic"
+
+    n_txs = len(parse_after(messages[FORMATS[0]][0])["transactions"])
+    print(f"{source} blocks, {len(messages[FORMATS[0]])} per format, {n_txs} transactions in the first")
+    baseline = timed(parse_before, messages[("jsonParsed", "full")])
+    for encoding, details in FORMATS:
+        fmt_messages = messages[(encoding, details)]
+        size = sum(map(len, fmt_messages)) / len(fmt_messages) / 1e6
+        per_block = timed(parse_after, fmt_messages)
+        print(f"{encoding:>10}/{details:<8} {size:6.2f} MB/block  decode_block {per_block * 1000:7.2f} ms/block")
+    print(f"{'jsonParsed':>10}/{'full':<8} json.loads baseline      {baseline * 1000:7.2f} ms/block")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Compares the vectorized bulk PnL job with the per-user loop on synthetic trades.
+
+Only the computation is timed, both paths start from the same list of trade documents as returned by MongoDB.
+
+Usage: python -m benchmarks.bulk_positions [n_users]
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from celeritas.bulk_positions import compute_pnl
+from celeritas.bulk_positions import compute_states
+from celeritas.bulk_positions import trades_to_columns
+from celeritas.db import apply_trade_to_state
+from celeritas.db import position_from_state
+
+SOL_PRICE = 150.0
+
+
+def generate_trades(n_users: int, mints_per_user: int = 5, max_trades_per_mint: int = 12, seed: int = 0) -> list:
+    """Trade documents sorted by (user_id, mint, timestamp) like the bulk job reads them"""
+    rng = random.Random(seed)
+    trades = []
+    for user_id in range(n_users):
+        for m in range(mints_per_user):
+            mint = f"mint{(user_id * 7 + m) % 500:04d}"
+            token_balance, sol_balance = 0.0, 10.0
+            for timestamp in range(rng.randint(1, max_trades_per_mint)):
+                if token_balance > 0 and rng.random() < 0.4:
+                    token_delta = -token_balance * rng.choice([rng.random(), 1.0])
+                else:
+                    token_delta = rng.uniform(1_000, 1_000_000)
+                sol_delta = -token_delta * rng.uniform(1e-7, 1e-6)
+                trades.append(
+                    {
+                        "user_id": user_id,
+                        "mint": mint,
+                        "timestamp": 1_700_000_000 + timestamp,
+                        "pre_token_balance": token_balance,
+                        "post_token_balance": token_balance + token_delta,
+                        "pre_sol_balance": sol_balance,
+                        "post_sol_balance": sol_balance + sol_delta,
+                        "sol_dollar_value": rng.uniform(100, 200),
+                    }
+                )
+                token_balance += token_delta
+                sol_balance += sol_delta
+    trades.sort(key=lambda trade: (trade["user_id"], trade["mint"], trade["timestamp"]))
+    return trades
+
+
+def per_user_loop(trades: list, prices: dict) -> dict:
+    """Same work as update_user_positions per user, fold every trade and build the position"""
+    states = {}
+    for trade in trades:
+        key = (trade["user_id"], trade["mint"])
+        states[key] = apply_trade_to_state(states.get(key, {}), trade)
+    return {
+        key: position_from_state(state, state["token_balance"], prices[key[1]], SOL_PRICE)
+        for key, state in states.items()
+    }
+
+
+def vectorized(trades: list, prices: dict) -> dict:
+    states = compute_states(trades_to_columns(trades))
+    prices_usd = np.array([prices[mint] for mint in states["mint"]], dtype=np.float64)
+    return states, compute_pnl(states, prices_usd, SOL_PRICE)
+
+
+def timed(fn, *args, repeat: int = 3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(n_users: int = 10_000):
+    trades = generate_trades(n_users)
+    prices = {f"mint{i:04d}": random.uniform(1e-6, 1e-4) for i in range(500)}
+    print(f"{n_users} users, {len(trades)} trades")
+
+    loop_time, loop_positions = timed(per_user_loop, trades, prices)
+    bulk_time, (states, pnl) = timed(vectorized, trades, prices)
+
+    # Both paths have to agree before their timings mean anything
+    for i, key in enumerate(zip(states["user_id"].tolist(), states["mint"].tolist())):
+        for field, values in pnl.items():
+            expected = loop_positions[key][field]
+            assert abs(values[i] - expected) <= 1e-6 * max(1.0, abs(expected)), (key, field, values[i], expected)
+
+    print(f"per-user loop: {loop_time * 1000:8.1f} ms")
+    print(f"vectorized:    {bulk_time * 1000:8.1f} ms ({loop_time / bulk_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
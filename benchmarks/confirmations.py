@@ -0,0 +1,113 @@
+"""
+RPC calls per confirmed trade: the former per trade jobs, calling getTransaction 10, 30, 60 and 120 seconds after
+sending until the transaction was found, against the ConfirmationService sweeper, one getSignatureStatuses call
+per 256 pending signatures every sweep_interval and one getTransaction per confirmed trade.
+
+Trades are sent at a steady rate and land after a random delay, some never do. The sweeper runs without its
+websocket against a fake RPC client counting calls, time is scaled down by SPEEDUP to keep the run short.
+
+Usage: python -m benchmarks.confirmations [trades] [trades per second]
+"""
+
+import asyncio
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+from solders.signature import Signature
+from solders.transaction_status import TransactionConfirmationStatus
+
+import celeritas.confirmations
+from celeritas.confirmations import ConfirmationService
+
+SPEEDUP = 50
+OLD_ATTEMPTS = (10, 30, 60, 120)  # Seconds after sending of every getTransaction of the former jobs
+DROPPED = 0.1  # Share of trades that never land
+
+
+class CountingClient:
+    """Answers getSignatureStatuses from the landing times of the trades and counts calls"""
+
+    def __init__(self, landing: dict):
+        self.landing = landing  # signature -> monotonic landing time, None if it never lands
+        self.calls = Counter()
+
+    async def get_signature_statuses(self, signatures: list):
+        self.calls["getSignatureStatuses"] += 1
+        now = time.monotonic()
+        statuses = []
+        for signature in signatures:
+            landed = self.landing[str(signature)]
+            if landed is None or landed > now:
+                statuses.append(None)
+            else:
+                statuses.append(SimpleNamespace(err=None, confirmation_status=TransactionConfirmationStatus.Confirmed))
+        return SimpleNamespace(value=statuses)
+
+    async def get_transaction(self, signature, **kwargs):
+        self.calls["getTransaction"] += 1
+
+
+def landing_delays(rng: random.Random, n: int) -> list:
+    """Seconds from sending to landing, mostly a few slots, with a long tail and dropped transactions"""
+    return [None if rng.random() < DROPPED else min(rng.lognormvariate(0.5, 1), 80) for _ in range(n)]
+
+
+def old_calls(delays: list) -> tuple:
+    """getTransaction calls and seconds from landing to being noticed of every confirmed trade"""
+    calls, lags = 0, []
+    for delay in delays:
+        for attempt in OLD_ATTEMPTS:
+            calls += 1
+            if delay is not None and delay <= attempt:
+                lags.append(attempt - delay)
+                break
+    return calls, lags
+
+
+async def track(service: ConfirmationService, client: CountingClient, signature: str, timeout: float, lags: list) -> None:
+    if await service.wait(signature, timeout=timeout):
+        lags.append((time.monotonic() - client.landing[signature]) * SPEEDUP)
+        await client.get_transaction(Signature.from_string(signature))
+
+
+async def sweeper_calls(delays: list, rate: float) -> tuple:
+    client = CountingClient({})
+    celeritas.confirmations.aclient = client
+    service = ConfirmationService(use_websocket=False, sweep_interval=0.4 / SPEEDUP)
+    tracked, lags = [], []
+    for delay in delays:
+        signature = str(Signature.new_unique())
+        client.landing[signature] = None if delay is None else time.monotonic() + delay / SPEEDUP
+        tracked.append(asyncio.create_task(track(service, client, signature, OLD_ATTEMPTS[-1] / SPEEDUP, lags)))
+        await asyncio.sleep(1 / rate / SPEEDUP)
+    await asyncio.gather(*tracked)
+    await service.stop()
+    return client.calls, lags
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 20
+    delays = landing_delays(random.Random(0), n)
+    confirmed = sum(delay is not None for delay in delays)
+
+    before, before_lags = old_calls(delays)
+    after, after_lags = await sweeper_calls(delays, rate)
+    print(f"{n} trades at {rate:g}/s, {confirmed} confirmed")
+    print(
+        f"jobs     getTransaction {before:6d}  {before / confirmed:5.2f} calls per confirmed trade, "
+        f"noticed {statistics.median(before_lags):5.2f}s after landing (median)"
+    )
+    print(
+        f"sweeper  getSignatureStatuses {after['getSignatureStatuses']:6d} getTransaction {after['getTransaction']:6d}  "
+        f"{sum(after.values()) / confirmed:5.2f} calls per confirmed trade, "
+        f"noticed {statistics.median(after_lags):5.2f}s after landing (median)"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
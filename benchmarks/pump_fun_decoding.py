@@ -0,0 +1,143 @@
+"""
+Throughput of celeritas.pump_fun_decoder on blocks as the sniper receives them (base64 / full, mentioning the
+pump.fun mint authority), compared with the previous heuristic taking any instruction with 14 accounts.
+
+Blocks recorded with ``python -m benchmarks.block_decoding --record N`` in benchmarks/fixtures/blocks/base64_full/
+are used if present, otherwise synthetic blocks of create transactions, each with compute budget instructions,
+the create, the creator's associated token account and initial buy, mixed with 14 account instructions of other
+programs that the heuristic mistakes for creates. Blocks without any create time the no-match path.
+
+Usage: python -m benchmarks.pump_fun_decoding
+"""
+
+import base64
+import glob
+import json
+import os
+import random
+import struct
+import time
+
+from solders.hash import Hash
+from solders.instruction import CompiledInstruction
+from solders.message import MessageHeader
+from solders.message import MessageV0
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.transaction import VersionedTransaction
+
+from celeritas.block_decoder import decode_block
+from celeritas.block_decoder import loads
+from celeritas.pump_fun_decoder import BUY_DISCRIMINATOR
+from celeritas.pump_fun_decoder import CREATE_DISCRIMINATOR
+from celeritas.pump_fun_decoder import decode_block_creates
+from celeritas.transact_utils import PUMP_FUN_PROGRAM
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "blocks", "base64_full")
+COMPUTE_BUDGET = Pubkey.from_string("ComputeBudget111111111111111111111111111111")
+
+
+def borsh_string(value: str) -> bytes:
+    return struct.pack("<I", len(value)) + value.encode()
+
+
+def synthetic_transaction(rng: random.Random, create: bool) -> dict:
+    # 0 creator, 1 mint (signers), 2 bonding curve, 3 associated bonding curve, 4 metadata, 5 creator ATA,
+    # 6 mint authority, 7 global, 8 metadata program, 9 system, 10 token, 11 ATA program, 12 rent,
+    # 13 event authority, 14 fee recipient, 15 compute budget, 16 pump.fun or another program
+    keys = [Pubkey.new_unique() for _ in range(15)] + [COMPUTE_BUDGET, PUMP_FUN_PROGRAM if create else Pubkey.new_unique()]
+    program = len(keys) - 1
+    create_data = CREATE_DISCRIMINATOR + borsh_string("Token") + borsh_string("TKN") + borsh_string("https://ipfs.io/ipfs/" + "x" * 46)
+    instructions = [
+        CompiledInstruction(15, bytes([3]) + rng.randbytes(8), bytes()),
+        CompiledInstruction(15, bytes([2]) + rng.randbytes(4), bytes()),
+        CompiledInstruction(program, create_data, bytes([1, 6, 2, 3, 7, 8, 4, 0, 9, 10, 11, 12, 13, program])),
+        CompiledInstruction(11, bytes([1]), bytes([0, 5, 0, 1, 9, 10])),
+        CompiledInstruction(
+            program,
+            BUY_DISCRIMINATOR + struct.pack("<QQ", rng.randint(10**11, 10**14), rng.randint(10**8, 10**10)),
+            bytes([7, 14, 1, 2, 3, 5, 0, 9, 10, 12, 13, program]),
+        ),
+    ]
+    message = MessageV0(MessageHeader(2, 0, 12), keys, Hash.new_unique(), instructions, [])
+    raw = bytes(VersionedTransaction.populate(message, [Signature(rng.randbytes(64)) for _ in range(2)]))
+    meta = {
+        "err": None,
+        "fee": 5000,
+        "preBalances": [rng.randint(0, 10**10) for _ in keys],
+        "postBalances": [rng.randint(0, 10**10) for _ in keys],
+        "preTokenBalances": [],
+        "postTokenBalances": [],
+        "loadedAddresses": {"writable": [], "readonly": []},
+    }
+    return {"transaction": [base64.b64encode(raw).decode(), "base64"], "meta": meta, "version": 0}
+
+
+def synthetic_blocks(n_blocks: int = 50, txs_per_block: int = 40, seed: int = 0, create_share: float = 0.8) -> list:
+    rng = random.Random(seed)
+    return [
+        {
+            "blockTime": int(time.time()),
+            "blockHeight": slot,
+            "transactions": [synthetic_transaction(rng, create=rng.random() < create_share) for _ in range(txs_per_block)],
+        }
+        for slot in range(n_blocks)
+    ]
+
+
+def recorded_blocks() -> list:
+    files = sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.json")))
+    return [loads(open(f).read())["params"]["result"]["value"]["block"] for f in files]
+
+
+def parse_block_before(block: dict) -> list:
+    """The previous sniper heuristic"""
+    coins = []
+    for tr in block["transactions"]:
+        for instruction in tr.instructions:
+            accounts = instruction.accounts
+            if len(accounts) == 14:
+                if not tr.err:
+                    coins.append((accounts[0], accounts[7], time.time() - block["blockTime"], accounts[2], accounts[3]))
+                break
+    return coins
+
+
+def timed(fn, blocks, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for block in blocks:
+            fn(block)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    raw_blocks = recorded_blocks()
+    source = "recorded"
+    if not raw_blocks:
+        raw_blocks, source = synthetic_blocks(), "synthetic"
+    blocks = [decode_block(json.loads(json.dumps(block))) for block in raw_blocks]
+    n_txs = sum(len(block["transactions"]) for block in blocks)
+    n_before = sum(len(parse_block_before(block)) for block in blocks)
+    n_after = sum(len(decode_block_creates(block)) for block in blocks)
+    print(f"{source} blocks: {len(blocks)} blocks, {n_txs} transactions")
+    print(f"14 account heuristic: {n_before} mints, decoder: {n_after} creates")
+
+    before = timed(parse_block_before, blocks)
+    after = timed(decode_block_creates, blocks)
+    print(f"heuristic      {n_txs / before:12,.0f} tx/s")
+    print(f"decoder        {n_txs / after:12,.0f} tx/s")
+    no_creates = [decode_block(block) for block in synthetic_blocks(create_share=0)]
+    n_no_creates = sum(len(block["transactions"]) for block in no_creates)
+    print(
+        f"without creates: heuristic {n_no_creates / timed(parse_block_before, no_creates):,.0f} tx/s, "
+        f"decoder {n_no_creates / timed(decode_block_creates, no_creates):,.0f} tx/s"
+    )
+    end_to_end = timed(lambda block: decode_block_creates(decode_block(block)), raw_blocks)
+    print(f"decode + creates {n_txs / end_to_end:10,.0f} tx/s ({end_to_end / len(blocks) * 1000:.2f} ms/block)")
+
+
+if __name__ == "__main__":
+    main()
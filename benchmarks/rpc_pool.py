@@ -0,0 +1,147 @@
+"""
+Checks RpcPool and its PriorityLimiter lanes against local fake JSON-RPC servers, one per endpoint: a failing one
+answering HTTP 500, a rate limited one answering HTTP 429 and a healthy one answering after a delay.
+
+- Reads, raw ones included, fail over to the next endpoint and succeed as long as one endpoint answers.
+- An endpoint is skipped after max_consecutive_errors failures in a row and tried again after its cooldown.
+- Sends go to the primary endpoint only and are never retried, even when it fails.
+- With the primary endpoint's bucket empty, a queued send is served before user and background reads queued earlier.
+
+Every check asserts, the script exits with an error at the first failing one. It takes the cooldown, 10 seconds.
+
+Usage: python -m benchmarks.rpc_pool
+"""
+
+import asyncio
+import time
+from collections import Counter
+
+from aiohttp import web
+from solders.signature import Signature
+
+from celeritas.priority_limiter import BACKGROUND
+from celeritas.priority_limiter import rpc_priority
+from celeritas.priority_limiter import USER
+from celeritas.rpc_pool import RpcEndpoint
+from celeritas.rpc_pool import RpcPool
+
+HOST = "127.0.0.1"
+FIRST_PORT = 18899
+SLOW_DELAY = 0.05
+SLOT = 123
+
+
+class FakeRpcServer:
+    """JSON-RPC endpoint answering sendTransaction and reads of a number, or failing with status, recording the calls"""
+
+    def __init__(self, port: int, status: int = 200, delay: float = 0):
+        self.url = f"http://{HOST}:{port}"
+        self.port = port
+        self.status = status
+        self.delay = delay
+        self.calls = Counter()
+        self.order = []  # Methods in arrival order
+        self._runner = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.calls[body["method"]] += 1
+        self.order.append(body["method"])
+        await asyncio.sleep(self.delay)
+        if self.status != 200:
+            return web.Response(status=self.status)
+        result = str(Signature.default()) if body["method"] == "sendTransaction" else SLOT
+        return web.json_response({"jsonrpc": "2.0", "id": body["id"], "result": result})
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_post("/", self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, HOST, self.port).start()
+
+    async def stop(self) -> None:
+        await self._runner.cleanup()
+
+
+async def check_failover_and_cooldown(failing, limited, slow) -> None:
+    pool = RpcPool([RpcEndpoint(server.url, 1000) for server in (failing, limited, slow)])
+    failing_endpoint = pool.endpoints[0]
+
+    # Unmeasured endpoints are tried first, the failing and rate limited ones fail before the slow one answers
+    assert (await pool.get_slot()).value == SLOT
+    assert failing.calls["getSlot"] == limited.calls["getSlot"] == slow.calls["getSlot"] == 1
+    assert await pool.request("getSlot") == SLOT  # Raw JSON-RPC reads fail over the same way
+    print("reads fail over: ok")
+
+    while failing_endpoint.consecutive_errors < failing_endpoint.max_consecutive_errors:
+        await pool.read("get_slot")
+    calls = failing.calls["getSlot"]
+    for _ in range(5):
+        assert (await pool.get_slot()).value == SLOT
+    assert failing.calls["getSlot"] == calls, "endpoint cooling down was tried"
+    print(f"skipped after {failing_endpoint.max_consecutive_errors} consecutive errors: ok")
+
+    await asyncio.sleep(failing_endpoint.failing_until - time.monotonic() + 0.1)
+    failing.status = 200
+    assert failing_endpoint.score() != float("inf")
+    while failing.calls["getSlot"] == calls:
+        assert (await pool.get_slot()).value == SLOT
+    print(f"tried again after the {failing_endpoint.cooldown:g}s cooldown: ok")
+    await pool.close()
+
+
+async def check_sends_not_retried(failing, slow) -> None:
+    pool = RpcPool([RpcEndpoint(server.url, 1000) for server in (failing, slow)])
+    try:
+        await pool.send_raw_transaction(bytes(100))
+    except Exception:
+        pass
+    else:
+        raise AssertionError("send to a failing primary endpoint succeeded")
+    assert failing.calls["sendTransaction"] == 1 and slow.calls["sendTransaction"] == 0
+    print("sends are never retried: ok")
+    await pool.close()
+
+
+async def check_lanes(slow) -> None:
+    pool = RpcPool([RpcEndpoint(slow.url, 2)])
+    slow.order.clear()
+    # Empties the bucket of 2 tokens
+    await asyncio.gather(pool.get_slot(), pool.get_slot())
+    slow.order.clear()
+
+    async def read(lane, method):
+        with rpc_priority(lane):
+            await pool.read(method)
+
+    # Background reads use getSlot and user reads getBlockHeight to tell them apart on the server
+    reads = [asyncio.create_task(read(BACKGROUND, "get_slot")) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    reads += [asyncio.create_task(read(USER, "get_block_height")) for _ in range(2)]
+    await asyncio.sleep(0.01)  # Queued before the send
+    await asyncio.gather(pool.send_raw_transaction(bytes(100)), *reads)
+    assert slow.order == ["sendTransaction"] + ["getBlockHeight"] * 2 + ["getSlot"] * 2, slow.order
+    print(f"lane order {slow.order}: ok")
+    await pool.close()
+
+
+async def main():
+    failing = FakeRpcServer(FIRST_PORT, status=500)
+    limited = FakeRpcServer(FIRST_PORT + 1, status=429)
+    slow = FakeRpcServer(FIRST_PORT + 2, delay=SLOW_DELAY)
+    servers = [failing, limited, slow]
+    for server in servers:
+        await server.start()
+    try:
+        await check_failover_and_cooldown(failing, limited, slow)
+        failing.status = 500
+        await check_sends_not_retried(failing, slow)
+        await check_lanes(slow)
+    finally:
+        for server in servers:
+            await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""
+Detection to signed bytes latency of one snipe: building a Transact, its snipe instructions and compiling and
+signing the message as snipe_for_user did before, against patching and signing a precompiled SnipeTemplate.
+
+Both paths start from a decoded create transaction and include decoding the create. The blockhash is preset,
+no RPC is made. The template output is checked to verify and to hold the same keys and instructions as the
+transaction compiled from scratch.
+
+Usage: python -m benchmarks.snipe_latency [n]
+"""
+
+import asyncio
+import random
+import statistics
+import sys
+import time
+
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.transaction import VersionedTransaction
+
+from benchmarks.pump_fun_decoding import synthetic_transaction
+from celeritas.block_decoder import decode_transaction
+from celeritas.blockhash import BLOCKHASH_VALIDITY_BLOCKS
+from celeritas.blockhash import blockhash_service
+from celeritas.pump_fun_decoder import decode_creates
+from celeritas.snipe_templates import SnipeTemplate
+from celeritas.transact import Transact
+
+SETUP = {
+    "wallet": "EiKviBF8WYxqYEoS1QuyoNobs7qTr6GvYftUNzZhakeE",
+    "amount": 100_000,
+    "slippage": 200,
+    "min_sol_cost": 0.002824121,
+    "max_sol_cost": 0.002824121 * 3,
+    "priority_fee": 0.01,
+}
+
+
+async def snipe_before(tx, wallet_secret: str) -> bytes:
+    create = decode_creates(tx)[0]
+    transact = Transact(wallet_secret, fee_sol=SETUP["priority_fee"])
+    quote = await transact.snipe_pump_fun(
+        create.mint, SETUP["amount"], SETUP["max_sol_cost"], create.bonding_curve, create.associated_bonding_curve
+    )
+    fee = 0.01 * (SETUP["min_sol_cost"] + SETUP["max_sol_cost"]) / 2
+    return bytes(await transact._create_transaction(quote, fee=fee))
+
+
+def snipe_after(tx, template: SnipeTemplate) -> bytes:
+    create = decode_creates(tx)[0]
+    _, raw_tx = template.sign(create.mint, create.bonding_curve, create.associated_bonding_curve, blockhash_service.get())
+    return raw_tx
+
+
+def check(before: bytes, after: bytes) -> None:
+    before, after = VersionedTransaction.from_bytes(before), VersionedTransaction.from_bytes(after)
+    assert all(after.verify_with_results())
+    instructions = lambda tx: [
+        (
+            tx.message.account_keys[ix.program_id_index],
+            [tx.message.account_keys[i] for i in ix.accounts],
+            bytes(ix.data),
+        )
+        for ix in tx.message.instructions
+    ]
+    assert sorted(before.message.account_keys) == sorted(after.message.account_keys)
+    assert before.message.recent_blockhash == after.message.recent_blockhash
+    assert instructions(before) == instructions(after)
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    blockhash_service.blockhash = Hash.new_unique()
+    blockhash_service.timestamp = time.time()
+    blockhash_service.last_valid_block_height = 10**9 + BLOCKHASH_VALIDITY_BLOCKS
+
+    keypair = Keypair()
+    template = SnipeTemplate(keypair, SETUP)
+    rng = random.Random(0)
+    txs = [decode_transaction(synthetic_transaction(rng, create=True)) for _ in range(n)]
+    check(await snipe_before(txs[0], str(keypair)), snipe_after(txs[0], template))
+
+    before, after = [], []
+    for tx in txs:
+        start = time.perf_counter()
+        await snipe_before(tx, str(keypair))
+        before.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        snipe_after(tx, template)
+        after.append(time.perf_counter() - start)
+    for name, latencies in (("Transact", before), ("template", after)):
+        latencies = sorted(latencies)
+        print(
+            f"{name:<9} median {statistics.median(latencies) * 1e6:8.1f} us  "
+            f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:8.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""
+Checks that pump_fun_sniper.process_blocks snipes a launch only for the users following the wallet that created it.
+
+A block of synthetic create transactions, each by its own random creator, is fed to process_blocks with routes for
+SETUP's wallet and for the creator of the first create. snipe_for_user is replaced by a recorder, nothing is signed,
+sent or messaged.
+
+- Users following SETUP's wallet, which created none of the launches, are never sniped.
+- Users following the creator of the first create are sniped for that mint only.
+
+Every check asserts, the script exits with an error at the first failing one.
+
+Usage: python -m benchmarks.sniper_routing
+"""
+
+import asyncio
+
+from solders.keypair import Keypair
+
+import celeritas.pump_fun_sniper
+from benchmarks.pump_fun_decoding import synthetic_blocks
+from benchmarks.snipe_latency import SETUP
+from celeritas.block_decoder import decode_block
+from celeritas.pump_fun_decoder import decode_block_creates
+from celeritas.sniper_routes import sniper_routes
+from celeritas.sniper_routes import SnipeRoute
+
+
+def route(user_id: int, wallet: str) -> SnipeRoute:
+    user = {"_id": user_id, "wallet_public": str(Keypair().pubkey()), "referrer": None}
+    return SnipeRoute(user, {**SETUP, "wallet": wallet}, Keypair(), None)
+
+
+async def main():
+    block = decode_block(synthetic_blocks(n_blocks=1, txs_per_block=5, create_share=1)[0])
+    creates = decode_block_creates(block)
+    assert len(creates) == 5 and SETUP["wallet"] not in {create.creator for create in creates}
+    followed = creates[0]
+
+    sniper_routes.routes = {
+        SETUP["wallet"]: [route(1, SETUP["wallet"]), route(2, SETUP["wallet"])],
+        followed.creator: [route(3, followed.creator)],
+    }
+    sniped = []
+
+    async def record(route, mint, bonding_curve, associated_bonding_curve, time_diff):
+        sniped.append((route.user["_id"], mint))
+
+    celeritas.pump_fun_sniper.snipe_for_user = record
+
+    blocks = asyncio.Queue()
+    await blocks.put((0, block, 0))
+    processing = asyncio.create_task(celeritas.pump_fun_sniper.process_blocks(blocks))
+    while not blocks.empty():
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.1)
+    processing.cancel()
+
+    assert not [user_id for user_id, _ in sniped if user_id in (1, 2)], sniped
+    print(f"{len(creates)} launches by other creators, followers of {SETUP['wallet']} not sniped: ok")
+    assert sniped == [(3, followed.mint)], sniped
+    print("followers of the first creator sniped for its mint only: ok")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
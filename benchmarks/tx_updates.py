@@ -0,0 +1,85 @@
+"""
+Checks that a trade or withdrawal message whose update raises is edited to the failure text instead of staying
+pending. The confirmation service reports the transaction confirmed, fetching it raises, and the bot records edits.
+
+- A trade message is edited to generate_failure_message when fetch_transaction raises, no trade is recorded.
+- A withdrawal message is edited the same way when waiting for its confirmation raises.
+- An edit failing as well is logged, the update task still finishes.
+
+Every check asserts, the script exits with an error at the first failing one.
+
+Usage: python -m benchmarks.tx_updates
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from solders.keypair import Keypair
+from solders.signature import Signature
+
+import celeritas.telegram_bot.fetch_tx_update_msg as updates
+from celeritas.telegram_bot.fetch_tx_update_msg import generate_failure_message
+
+CHAT_ID = 1
+MESSAGE_ID = 2
+
+
+class FakeBot:
+    """Records the text of every message edit, or fails them all"""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.edits = []
+
+    async def edit_message_text(self, chat_id, message_id, text, **kwargs):
+        if self.fail:
+            raise RuntimeError("edit failed")
+        self.edits.append((chat_id, message_id, text))
+
+
+async def confirmed(signature, timeout=None):
+    return {"err": None}
+
+
+async def failing(*args, **kwargs):
+    raise RuntimeError("RPC unavailable")
+
+
+async def finish_updates() -> None:
+    while updates._updates:
+        await asyncio.gather(*updates._updates)
+
+
+async def check_trade_update() -> None:
+    bot, signature = FakeBot(), Signature.new_unique()
+    context = SimpleNamespace(bot=bot)
+    await updates.schedule_tx_update(context, CHAT_ID, MESSAGE_ID, 3, signature, "mint", str(Keypair().pubkey()))
+    await finish_updates()
+    assert bot.edits == [(CHAT_ID, MESSAGE_ID, generate_failure_message(str(signature)))], bot.edits
+    print("trade message edited to the failure text when fetch_transaction raises: ok")
+
+
+async def check_withdrawal_update() -> None:
+    bot, signature = FakeBot(), Signature.new_unique()
+    updates.confirmation_service.wait = failing
+    await updates.schedule_withdrawal_update(SimpleNamespace(bot=bot), CHAT_ID, MESSAGE_ID, signature)
+    await finish_updates()
+    assert bot.edits == [(CHAT_ID, MESSAGE_ID, generate_failure_message(str(signature)))], bot.edits
+    print("withdrawal message edited to the failure text when waiting raises: ok")
+
+    bot = FakeBot(fail=True)
+    await updates.schedule_withdrawal_update(SimpleNamespace(bot=bot), CHAT_ID, MESSAGE_ID, signature)
+    await finish_updates()
+    print("failing edit logged, update finished: ok")
+
+
+async def main():
+    updates.confirmation_service.wait = confirmed
+    updates.fetch_transaction = failing
+    updates.trade_db.insert_trade = failing  # Raises too if the trade was ever recorded
+    await check_trade_update()
+    await check_withdrawal_update()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,201 @@
+"""
+Reduces block notifications to the handful of fields the listeners use.
+
+Blocks can be subscribed with any encoding and transaction detail level, every transaction is decoded into a
+DecodedTransaction so consumers do not depend on the subscription format:
+
+- ``base64`` / ``full``: the wire format is sliced directly, account keys stay raw bytes until a consumer reads them,
+  instruction data stays raw bytes. Cheapest full format, the message is a fraction of jsonParsed.
+- ``json`` or ``jsonParsed`` / ``accounts``: no instructions, for consumers that only need keys and balances.
+- ``json`` or ``jsonParsed`` / ``full``: the original format, still supported.
+"""
+
+import base64
+from collections.abc import Sequence
+from functools import lru_cache
+from typing import List, NamedTuple, Tuple
+
+import base58
+import orjson
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+
+loads = orjson.loads
+
+
+@lru_cache(maxsize=1024)
+def _key_bytes(key: str) -> bytes:
+    return bytes(Pubkey.from_string(key))
+
+
+class AccountKeys(Sequence):
+    """Account keys of a binary transaction, raw keys are only base58 encoded when read"""
+
+    __slots__ = ("_keys",)
+
+    def __init__(self, keys: list):
+        self._keys = keys  # 32 byte keys, or already encoded str for loaded addresses
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __getitem__(self, i):
+        key = self._keys[i]
+        if key.__class__ is str:
+            return key
+        if key.__class__ is bytes:
+            key = self._keys[i] = str(Pubkey.from_bytes(key))
+            return key
+        return [self[j] for j in range(*i.indices(len(self)))]  # Slice
+
+    def __contains__(self, key):
+        return key in self._keys or _key_bytes(key) in self._keys
+
+    def select(self, indices: bytes) -> "KeySelection":
+        return KeySelection(self, indices)
+
+
+class KeySelection(Sequence):
+    """Accounts of one instruction, indices into the AccountKeys of its transaction"""
+
+    __slots__ = ("_keys", "_indices")
+
+    def __init__(self, keys: AccountKeys, indices: bytes):
+        self._keys = keys
+        self._indices = indices
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __getitem__(self, i):
+        index = self._indices[i]
+        if index.__class__ is int:
+            key = self._keys._keys[index]
+            # Already encoded keys are returned without a second call
+            return key if key.__class__ is str else self._keys[index]
+        return [self._keys[j] for j in index]  # Slice
+
+
+class TokenBalance(NamedTuple):
+    owner: str
+    mint: str
+    ui_amount: float
+
+
+class DecodedInstruction(NamedTuple):
+    program_id: str
+    accounts: Sequence  # of str
+    data: bytes
+
+
+class DecodedTransaction(NamedTuple):
+    signature: str
+    account_keys: Sequence  # of str
+    err: object
+    pre_balances: List[int]
+    post_balances: List[int]
+    pre_token_balances: List[TokenBalance]
+    post_token_balances: List[TokenBalance]
+    instructions: List[DecodedInstruction]  # Empty for transactionDetails "accounts"
+
+
+def _token_balances(balances: list) -> List[TokenBalance]:
+    return [
+        TokenBalance(balance.get("owner"), balance["mint"], balance["uiTokenAmount"]["uiAmount"] or 0)
+        for balance in balances or []
+    ]
+
+
+def _loaded_addresses(meta: dict) -> List[str]:
+    loaded = meta.get("loadedAddresses") or {}
+    return loaded.get("writable", []) + loaded.get("readonly", [])
+
+
+def _compact_u16(raw: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = raw[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+def _decode_binary(tx: dict) -> Tuple[str, AccountKeys, List[DecodedInstruction]]:
+    """Slices the legacy or v0 wire format, see solana-sdk VersionedTransaction serialization"""
+    data, encoding = tx["transaction"]
+    raw = base64.b64decode(data) if encoding == "base64" else base58.b58decode(data)
+    n_signatures, pos = _compact_u16(raw, 0)
+    signature = str(Signature.from_bytes(raw[pos : pos + 64]))
+    pos += 64 * n_signatures
+    if raw[pos] & 0x80:  # Versioned message prefix
+        pos += 1
+    pos += 3  # Header
+    n_keys, pos = _compact_u16(raw, pos)
+    keys = [raw[i : i + 32] for i in range(pos, pos + 32 * n_keys, 32)]
+    pos += 32 * n_keys + 32  # Keys and recent blockhash
+    account_keys = AccountKeys(keys + _loaded_addresses(tx["meta"]))
+    n_instructions, pos = _compact_u16(raw, pos)
+    instructions = []
+    for _ in range(n_instructions):
+        program_id_index = raw[pos]
+        n_accounts, pos = _compact_u16(raw, pos + 1)
+        accounts = raw[pos : pos + n_accounts]
+        n_data, pos = _compact_u16(raw, pos + n_accounts)
+        instructions.append(
+            DecodedInstruction(account_keys[program_id_index], account_keys.select(accounts), raw[pos : pos + n_data])
+        )
+        pos += n_data
+    return signature, account_keys, instructions
+
+
+def _decode_json(tx: dict) -> Tuple[str, List[str], List[DecodedInstruction]]:
+    transaction = tx["transaction"]
+    message = transaction.get("message")
+    keys = message["accountKeys"] if message else transaction["accountKeys"]
+    if keys and isinstance(keys[0], dict):
+        # jsonParsed and "accounts" details already list loaded addresses
+        account_keys = [key["pubkey"] for key in keys]
+    else:
+        account_keys = keys + _loaded_addresses(tx["meta"])
+    instructions = []
+    for ix in (message or {}).get("instructions", []):
+        if "programIdIndex" in ix:
+            instructions.append(
+                DecodedInstruction(
+                    account_keys[ix["programIdIndex"]],
+                    [account_keys[i] for i in ix["accounts"]],
+                    base58.b58decode(ix["data"]),
+                )
+            )
+        elif "data" in ix:  # Instructions jsonParsed could not parse
+            instructions.append(DecodedInstruction(ix["programId"], ix["accounts"], base58.b58decode(ix["data"])))
+    return transaction["signatures"][0], account_keys, instructions
+
+
+def decode_transaction(tx: dict) -> DecodedTransaction:
+    if isinstance(tx["transaction"], list):
+        signature, account_keys, instructions = _decode_binary(tx)
+    else:
+        signature, account_keys, instructions = _decode_json(tx)
+    meta = tx["meta"]
+    return DecodedTransaction(
+        signature,
+        account_keys,
+        meta["err"],
+        meta["preBalances"],
+        meta["postBalances"],
+        _token_balances(meta.get("preTokenBalances")),
+        _token_balances(meta.get("postTokenBalances")),
+        instructions,
+    )
+
+
+def decode_block(block: dict) -> dict:
+    """Block with its transactions decoded, only blockTime, blockHeight and transactions are kept"""
+    return {
+        "blockTime": block.get("blockTime"),
+        "blockHeight": block.get("blockHeight"),
+        "transactions": [decode_transaction(tx) for tx in block.get("transactions") or [] if tx.get("meta")],
+    }
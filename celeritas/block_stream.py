@@ -0,0 +1,255 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+
+import websockets
+
+from celeritas.block_decoder import decode_block
+from celeritas.block_decoder import loads
+from celeritas.constants import aclient
+from celeritas.constants import SOLANA_WS_URL
+from celeritas.priority_limiter import BACKGROUND
+from celeritas.priority_limiter import rpc_priority
+
+logger = logging.getLogger(__name__)
+
+# getSlot answers a little after the connection actually dropped, the gap starts this many slots earlier
+DROP_SLOT_MARGIN = 4
+
+
+class BlockStream:
+    """
+    One blockSubscribe websocket for one filter, shared by any number of in-process consumers.
+
+    Every consumer gets its own bounded asyncio queue of (slot, block, received) items, block being decoded by
+    celeritas.block_decoder.decode_block whatever encoding and transaction_details are subscribed, received being the
+    time.perf_counter() at which the notification arrived. A full queue makes the stream wait, so the slowest
+    consumer applies backpressure instead of blocks being dropped.
+    The connection is reopened with exponential backoff and the subscription renewed. The slot at which it dropped
+    is the current slot according to getSlot, or the last notified one if that fails, a filtered stream gets no
+    notification for blocks without matching transactions. Slots missed from there to the first live block after
+    reconnecting are passed to on_gap(first_missing_slot, last_missing_slot) in a separate task, live blocks keep
+    flowing meanwhile. By default it backfills at most max_backfill_slots of the most recent missed slots, about
+    the 180 seconds pending transactions are kept, with getBlocks/getBlock through the RPC pool in the background
+    lane, delivering blocks as they are fetched. Transactions already delivered are skipped.
+    """
+
+    def __init__(
+        self,
+        mentions: str = None,
+        url: str = SOLANA_WS_URL,
+        commitment: str = "confirmed",
+        transaction_details: str = "full",
+        encoding: str = "base64",
+        min_backoff: float = 0.5,
+        max_backoff: float = 30,
+        max_backfill_slots: int = 450,
+        backfill_concurrency: int = 4,
+        recent_signatures: int = 50_000,
+    ):
+        self.mentions = mentions
+        self.url = url
+        self.commitment = commitment
+        self.transaction_details = transaction_details
+        self.encoding = encoding
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.max_backfill_slots = max_backfill_slots
+        self.backfill_concurrency = backfill_concurrency
+        self.last_slot = None  # Last delivered
+        self.seen_slot = None  # Last notified, delivered or not
+        self.dropped_slot = None  # Slot at which the connection dropped, until the gap is handled
+        self.on_gap = self.backfill
+        self._gap_tasks = set()
+        self._recent_signatures = OrderedDict()
+        self._max_recent_signatures = recent_signatures
+        self._queues = []
+        self._websocket = None
+        self._subscription_id = None
+        self._task = None
+
+    def subscribe(self, maxsize: int = 100) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=maxsize)
+        self._queues.append(queue)
+        return queue
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._websocket and self._subscription_id is not None:
+            try:
+                await self._websocket.send(
+                    json.dumps({"jsonrpc": "2.0", "id": 2, "method": "blockUnsubscribe", "params": [self._subscription_id]})
+                )
+                logger.info("Unsubscribed from blocks")
+            except websockets.ConnectionClosed:
+                pass
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        for task in self._gap_tasks:
+            task.cancel()
+        if self._websocket:
+            await self._websocket.close()
+
+    def subscription_request(self) -> dict:
+        return {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "blockSubscribe",
+            "params": [
+                {"mentionsAccountOrProgram": self.mentions} if self.mentions else "all",
+                {
+                    "commitment": self.commitment,  # The level of commitment required
+                    "transactionDetails": self.transaction_details,  # The level of transaction detail to return
+                    "showRewards": False,  # Whether to populate the 'rewards' array
+                    "encoding": self.encoding,  # Encoding format for account data
+                    "maxSupportedTransactionVersion": 0,
+                },
+            ],
+        }
+
+    async def run(self) -> None:
+        backoff = self.min_backoff
+        while True:
+            try:
+                async with websockets.connect(self.url, max_size=None) as websocket:
+                    self._websocket = websocket
+                    await websocket.send(json.dumps(self.subscription_request()))
+                    async for message in websocket:
+                        received = time.perf_counter()
+                        data = loads(message)
+                        if "params" in data:
+                            backoff = self.min_backoff
+                            await self._publish(data["params"]["result"]["value"], received)
+                        elif data.get("id") == 1:
+                            if "error" in data:
+                                raise Exception(f"blockSubscribe failed: {data['error']}")
+                            self._subscription_id = data["result"]
+                            logger.info(f"Subscribed to blocks mentioning {self.mentions}.")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Block stream for {self.mentions} failed, reconnecting in {backoff:.1f}s: {e}")
+            finally:
+                self._websocket = None
+                self._subscription_id = None
+            if self.seen_slot is not None and self.dropped_slot is None:
+                self.dropped_slot = await self._slot_at_drop()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    async def _slot_at_drop(self) -> int:
+        try:
+            with rpc_priority(BACKGROUND):
+                slot = (await aclient.get_slot(self.commitment)).value - DROP_SLOT_MARGIN
+        except Exception as e:
+            logger.warning(f"Fetching the slot after the block stream for {self.mentions} dropped failed: {e}")
+            return self.seen_slot
+        return max(slot, self.seen_slot)
+
+    def _handle_gap(self, first_slot: int, last_slot: int) -> None:
+        task = asyncio.create_task(self.on_gap(first_slot, last_slot))
+        self._gap_tasks.add(task)
+        task.add_done_callback(self._gap_tasks.discard)
+
+    async def _publish(self, value: dict, received: float) -> None:
+        slot = value["slot"]
+        if self.dropped_slot is not None:
+            gap_start = self.dropped_slot + 1
+            self.dropped_slot = None
+        elif not self.mentions and self.seen_slot is not None:
+            gap_start = self.seen_slot + 1  # Every block is notified, a jump means lost notifications
+        else:
+            gap_start = slot
+        if slot > gap_start:
+            self._handle_gap(gap_start, slot - 1)
+        self.seen_slot = slot if self.seen_slot is None else max(slot, self.seen_slot)
+
+        if value.get("err") or not value.get("block"):
+            return
+        if self.last_slot is not None and slot <= self.last_slot:
+            return  # Already delivered before a reconnect
+        self.last_slot = slot
+        await self._deliver(slot, decode_block(value["block"]), received)
+
+    async def _deliver(self, slot: int, block: dict, received: float) -> int:
+        """Puts the block with its not yet delivered transactions on every queue, returns their number"""
+        transactions = []
+        for tx in block["transactions"]:
+            if tx.signature in self._recent_signatures:
+                continue
+            self._recent_signatures[tx.signature] = None
+            transactions.append(tx)
+        while len(self._recent_signatures) > self._max_recent_signatures:
+            self._recent_signatures.popitem(last=False)
+        if not transactions:
+            return 0
+        block = {**block, "transactions": transactions}
+        for queue in self._queues:
+            await queue.put((slot, block, received))
+        return len(transactions)
+
+    def _mentions(self, tx) -> bool:
+        return not self.mentions or self.mentions in tx.account_keys
+
+    async def backfill(self, first_slot: int, last_slot: int) -> None:
+        """Delivers the blocks of the missed slot range in order as they are fetched, backfill_concurrency at once"""
+        if last_slot - first_slot + 1 > self.max_backfill_slots:
+            oldest_slot = last_slot - self.max_backfill_slots + 1
+            logger.warning(
+                f"Block stream for {self.mentions} lost slots {first_slot} to {oldest_slot - 1}, too old to backfill."
+            )
+            first_slot = oldest_slot
+        started = time.perf_counter()
+        config = {
+            "commitment": self.commitment,
+            "encoding": self.encoding,
+            "transactionDetails": self.transaction_details,
+            "rewards": False,
+            "maxSupportedTransactionVersion": 0,
+        }
+
+        async def get_block(slot):
+            try:
+                return await aclient.request("getBlock", slot, config)
+            except Exception as e:
+                logger.error(f"Backfilling slot {slot} failed: {e}")
+                return None
+
+        n_transactions = 0
+        with rpc_priority(BACKGROUND):
+            try:
+                slots = await aclient.request("getBlocks", first_slot, last_slot, {"commitment": self.commitment})
+            except Exception as e:
+                logger.error(f"Backfilling slots {first_slot} to {last_slot} failed: {e}")
+                return
+            for i in range(0, len(slots), self.backfill_concurrency):
+                chunk = slots[i : i + self.backfill_concurrency]
+                for slot, block in zip(chunk, await asyncio.gather(*[get_block(slot) for slot in chunk])):
+                    if not block:
+                        continue
+                    block = decode_block(block)
+                    block["transactions"] = [tx for tx in block["transactions"] if self._mentions(tx)]
+                    n_transactions += await self._deliver(slot, block, time.perf_counter())
+        logger.info(
+            f"Backfilled {len(slots)} blocks ({n_transactions} transactions) of slots {first_slot} to {last_slot} "
+            f"in {time.perf_counter() - started:.1f}s."
+        )
+
+
+_block_streams = {}
+
+
+def get_block_stream(
+    mentions: str = None, transaction_details: str = "full", encoding: str = "base64", url: str = SOLANA_WS_URL
+) -> BlockStream:
+    """Returns the process-wide stream for the filter, all consumers of a filter share one connection"""
+    key = (url, mentions, transaction_details, encoding)
+    if key not in _block_streams:
+        _block_streams[key] = BlockStream(mentions, url=url, transaction_details=transaction_details, encoding=encoding)
+    return _block_streams[key]
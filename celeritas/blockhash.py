@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import time
+
+from solana.rpc.commitment import Confirmed
+from solders.hash import Hash
+
+from celeritas.constants import aclient
+
+logger = logging.getLogger(__name__)
+
+# A blockhash stays valid for 150 blocks after the block it was fetched at
+BLOCKHASH_VALIDITY_BLOCKS = 150
+SLOT_TIME = 0.4
+
+
+class BlockhashService:
+    """
+    Keeps a recent blockhash and its last valid block height in memory, building a transaction needs no I/O.
+
+    A background task fetches a new blockhash from the configured RPC every refresh_interval seconds.
+    The current block height is estimated from the last fetch, so blockhashes close to expiry are detected
+    before a transaction is sent.
+    """
+
+    def __init__(self, refresh_interval: float = 5, max_age: float = 30, expiry_margin: int = 20):
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.expiry_margin = expiry_margin
+        self.blockhash = None
+        self.last_valid_block_height = None
+        self.timestamp = 0.0
+        self._refresh_task = None
+        self._background_task = None
+
+    async def start(self) -> None:
+        """Fetches the first blockhash and starts the background refresh, has to be awaited on the process event loop"""
+        if self._background_task:
+            return
+        await self.refresh()
+        self._background_task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self) -> None:
+        if self._background_task:
+            self._background_task.cancel()
+            self._background_task = None
+
+    def block_height(self) -> int:
+        """Estimated current block height"""
+        fetched_at = self.last_valid_block_height - BLOCKHASH_VALIDITY_BLOCKS
+        return fetched_at + int((time.time() - self.timestamp) / SLOT_TIME)
+
+    def is_expired(self, last_valid_block_height: int) -> bool:
+        """True if a transaction using a blockhash valid until last_valid_block_height would likely not land anymore"""
+        return self.block_height() + self.expiry_margin > last_valid_block_height
+
+    def is_stale(self) -> bool:
+        return (
+            self.blockhash is None
+            or time.time() - self.timestamp > self.max_age
+            or self.is_expired(self.last_valid_block_height)
+        )
+
+    def get(self) -> Hash:
+        if self.blockhash is None:
+            raise Exception("No recent blockhash available")
+        return self.blockhash
+
+    async def get_fresh(self) -> Hash:
+        """Recent blockhash, refetched first if the cached one is stale"""
+        if self.is_stale():
+            await self.refresh()
+        return self.get()
+
+    async def refresh(self) -> Hash:
+        """Fetches a new blockhash, callers arriving while a fetch is running wait for that one"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._fetch())
+        return await asyncio.shield(self._refresh_task)
+
+    async def _fetch(self) -> Hash:
+        value = (await aclient.get_latest_blockhash(commitment=Confirmed)).value
+        self.blockhash = value.blockhash
+        self.last_valid_block_height = value.last_valid_block_height
+        self.timestamp = time.time()
+        return self.blockhash
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Blockhash refresh failed: {e}")
+
+
+blockhash_service = BlockhashService()
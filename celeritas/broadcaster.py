@@ -0,0 +1,134 @@
+import asyncio
+import base64
+import logging
+import time
+
+import aiohttp
+from solders.signature import Signature
+
+from celeritas.blockhash import blockhash_service
+from celeritas.config import config
+from celeritas.confirmations import confirmation_service
+from celeritas.constants import RPC_URL
+from celeritas.constants import rate_limiter
+from celeritas.metrics import StageMetrics
+from celeritas.priority_limiter import SEND
+
+logger = logging.getLogger(__name__)
+
+
+class Broadcaster:
+    """
+    Sends signed transactions to every configured RPC endpoint at once.
+
+    broadcast returns as soon as one endpoint accepted the transaction. It is then sent again to all endpoints every
+    rebroadcast_interval seconds until confirmation_service reports it confirmed or its blockhash expires, nodes drop
+    transactions they could not forward in time. The acceptance latency and errors of every endpoint are recorded, ranking() orders the
+    endpoints by average latency.
+    """
+
+    def __init__(
+        self,
+        urls: list = None,
+        rebroadcast_interval: float = 2.0,
+        request_timeout: float = 5.0,
+        report_every: int = 100,
+    ):
+        self.urls = urls or config.solana_broadcast_urls
+        self.rebroadcast_interval = rebroadcast_interval
+        self.request_timeout = request_timeout
+        self.report_every = report_every
+        self.latency = {url: StageMetrics(url) for url in self.urls}
+        self.errors = {url: 0 for url in self.urls}
+        self.n_broadcasts = 0
+        self._session = None
+        self._tasks = set()
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    def ranking(self) -> list:
+        """Endpoints from the fastest to the slowest average acceptance latency, endpoints that never accepted last"""
+        return sorted(
+            self.urls, key=lambda url: self.latency[url].total / self.latency[url].count if self.latency[url].count else float("inf")
+        )
+
+    def summary(self) -> str:
+        return ", ".join(f"{self.latency[url].summary()} errors={self.errors[url]}" for url in self.ranking())
+
+    async def broadcast(self, raw_tx: bytes, last_valid_block_height: int) -> Signature:
+        """Sends a signed transaction, returns its signature once an endpoint accepted it or None if none did"""
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.request_timeout))
+        signature = Signature.from_bytes(raw_tx[1:65])  # Less than 128 signatures, their count is one byte
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "sendTransaction",
+            "params": [
+                base64.b64encode(raw_tx).decode(),
+                {"encoding": "base64", "skipPreflight": True, "maxRetries": 0},
+            ],
+        }
+        sends = [asyncio.create_task(self._send(url, payload)) for url in self.urls]
+        accepted = False
+        for send in asyncio.as_completed(sends):
+            if await send:
+                accepted = True
+                break
+        # Slower endpoints still get the transaction and are timed
+        task = asyncio.create_task(self._rebroadcast(signature, payload, last_valid_block_height, sends, accepted))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return signature if accepted else None
+
+    async def _send(self, url: str, payload: dict) -> bool:
+        try:
+            # Only the main RPC is shared with everything else and rate limited
+            if url == RPC_URL:
+                await rate_limiter.acquire(lane=SEND)
+            started = time.perf_counter()
+            async with self._session.post(url, json=payload) as response:
+                response.raise_for_status()
+                data = await response.json()
+            if "error" in data:
+                raise Exception(data["error"].get("message", data["error"]))
+        except Exception as e:
+            self.errors[url] += 1
+            logger.debug(f"Sending transaction to {url} failed: {e}")
+            return False
+        self.latency[url].observe(time.perf_counter() - started)
+        return True
+
+    async def _rebroadcast(self, signature: Signature, payload: dict, last_valid_block_height: int, sends: list, accepted: bool) -> None:
+        started = time.perf_counter()
+        await asyncio.gather(*sends)
+        n_sent = 1
+        if accepted:
+            # Left running past the expiry, the service drops the signature once the wait times out
+            confirmation = asyncio.create_task(confirmation_service.wait(signature))
+            self._tasks.add(confirmation)
+            confirmation.add_done_callback(self._tasks.discard)
+        while accepted:
+            await asyncio.wait([confirmation], timeout=self.rebroadcast_interval)
+            if confirmation.done():
+                # Failed transactions landed too, sending them again is useless
+                if confirmation.result() is not None:
+                    logger.info(f"Transaction {signature} landed after {n_sent} broadcasts in {time.perf_counter() - started:.1f}s.")
+                break
+            if blockhash_service.is_expired(last_valid_block_height):
+                logger.warning(f"Transaction {signature} expired after {n_sent} broadcasts.")
+                break
+            await asyncio.gather(*[self._send(url, payload) for url in self.urls])
+            n_sent += 1
+
+        self.n_broadcasts += 1
+        if self.n_broadcasts % self.report_every == 0:
+            logger.info(f"Broadcast endpoints: {self.summary()}")
+
+
+broadcaster = Broadcaster()
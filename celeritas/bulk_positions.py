@@ -0,0 +1,254 @@
+"""
+Batch recomputation of positions and PnL for every user.
+
+Trades are loaded in chunks of users into columnar NumPy arrays, grouped by (user_id, mint) and reduced with the same
+average cost basis rules as celeritas.db.apply_trade_to_state, without a Python loop per trade.
+Results are written back with bulk_write, the per (user, mint) states into the positions collection and the
+positions of held mints into the user documents.
+
+Usage: python -m celeritas.bulk_positions
+"""
+
+import asyncio
+import logging
+import time
+
+import numpy as np
+from pymongo import ReplaceOne
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from celeritas.db import POSITION_STATE_PROTOTYPE
+from celeritas.db import init_db
+from celeritas.db import position_db
+from celeritas.db import position_from_state
+from celeritas.db import token_db
+from celeritas.db import trade_db
+from celeritas.db import user_db
+from celeritas.sol_price import sol_price_service
+from celeritas.telegram_bot.utils import sol_dollar_value
+
+logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TRADE_PROJECTION = {
+    "_id": 0,
+    "user_id": 1,
+    "mint": 1,
+    "timestamp": 1,
+    "pre_token_balance": 1,
+    "post_token_balance": 1,
+    "pre_sol_balance": 1,
+    "post_sol_balance": 1,
+    "sol_dollar_value": 1,
+}
+
+
+def trades_to_columns(trades: list) -> dict:
+    """Columnar view of trades sorted by (user_id, mint, timestamp)"""
+    n = len(trades)
+    column = lambda key: np.fromiter((trade[key] for trade in trades), dtype=np.float64, count=n)
+    sol_delta = column("post_sol_balance") - column("pre_sol_balance")
+    return {
+        "user_id": np.fromiter((trade["user_id"] for trade in trades), dtype=np.int64, count=n),
+        "mint": np.array([trade["mint"] for trade in trades], dtype=object),
+        "timestamp": column("timestamp"),
+        "token_delta": column("post_token_balance") - column("pre_token_balance"),
+        "sol_delta": sol_delta,
+        "usd_delta": sol_delta * column("sol_dollar_value"),
+    }
+
+
+def _group_bounds(columns: dict):
+    n = len(columns["user_id"])
+    if n == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    new_group = np.ones(n, dtype=bool)
+    new_group[1:] = (columns["user_id"][1:] != columns["user_id"][:-1]) | (columns["mint"][1:] != columns["mint"][:-1])
+    starts = np.flatnonzero(new_group)
+    return starts, np.diff(np.append(starts, n))
+
+
+def compute_states(columns: dict) -> dict:
+    """
+    Reduces every (user_id, mint) group to its position state.
+
+    Groups are padded into 2D blocks of similar length (powers of two) so running balances are exact cumulative sums
+    along each row. A sell keeping a positive balance scales the bought totals by balance_after / balance_before,
+    so a buy ends up weighted by the product of the factors of all later sells, computed as exp of a difference of
+    cumulative log factors. A sell emptying the position resets the bought totals, so only buys after the last reset count.
+    """
+    starts, lengths = _group_bounds(columns)
+    n_groups = len(starts)
+    out = {
+        key: np.zeros(n_groups)
+        for key in [
+            "bought_sol",
+            "bought_usd",
+            "bought_tokens",
+            "sold_sol",
+            "sold_usd",
+            "sold_tokens",
+            "token_balance",
+            "last_timestamp",
+        ]
+    }
+    out.update({key: np.zeros(n_groups, dtype=np.int64) for key in ["n_buys", "n_sells", "n_trades"]})
+
+    buckets = np.ceil(np.log2(np.maximum(lengths, 1))).astype(np.int64)
+    for bucket in np.unique(buckets):
+        rows = np.flatnonzero(buckets == bucket)
+        width = 1 << int(bucket)
+        offsets = np.arange(width)
+        valid = offsets[None, :] < lengths[rows, None]
+        index = np.where(valid, starts[rows, None] + offsets[None, :], 0)
+        take = lambda key: np.where(valid, columns[key][index], 0.0)
+
+        token_delta, sol_delta, usd_delta = take("token_delta"), take("sol_delta"), take("usd_delta")
+        is_buy = token_delta > 0
+        is_sell = token_delta < 0
+
+        balance = np.cumsum(token_delta, axis=1)
+        resets = is_sell & (balance <= 0)
+        partial_sells = is_sell & ~resets
+        factor = np.ones_like(balance)
+        # balance - token_delta is the balance before the sell
+        factor[partial_sells] = 1 - (-token_delta[partial_sells]) / (balance - token_delta)[partial_sells]
+        log_factor = np.cumsum(np.log(factor), axis=1)
+        weight = np.exp(log_factor[:, -1:] - log_factor)
+
+        last_reset = np.where(resets.any(axis=1), width - 1 - np.argmax(resets[:, ::-1], axis=1), -1)
+        counted_buys = is_buy & (offsets[None, :] > last_reset[:, None])
+
+        out["bought_tokens"][rows] = np.where(counted_buys, token_delta * weight, 0).sum(axis=1)
+        out["bought_sol"][rows] = np.where(counted_buys, -sol_delta * weight, 0).sum(axis=1)
+        out["bought_usd"][rows] = np.where(counted_buys, -usd_delta * weight, 0).sum(axis=1)
+        out["sold_tokens"][rows] = np.where(is_sell, -token_delta, 0).sum(axis=1)
+        out["sold_sol"][rows] = np.where(is_sell, sol_delta, 0).sum(axis=1)
+        out["sold_usd"][rows] = np.where(is_sell, usd_delta, 0).sum(axis=1)
+        out["token_balance"][rows] = balance[:, -1]
+        out["n_buys"][rows] = is_buy.sum(axis=1)
+        out["n_sells"][rows] = is_sell.sum(axis=1)
+        out["n_trades"][rows] = lengths[rows]
+        out["last_timestamp"][rows] = np.where(valid, columns["timestamp"][index], -np.inf).max(axis=1)
+
+    out["user_id"] = columns["user_id"][starts]
+    out["mint"] = columns["mint"][starts]
+    return out
+
+
+def compute_pnl(states: dict, prices_usd: np.ndarray, sol_price: float) -> dict:
+    """Vectorized counterpart of celeritas.db.position_from_state, prices_usd is NaN where unknown"""
+    pnl = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        has_entry = states["bought_tokens"] > 0
+        has_sold = states["sold_tokens"] > 0
+        for currency, price in [("usd", prices_usd), ("sol", prices_usd / sol_price)]:
+            avg_entry = np.where(has_entry, states[f"bought_{currency}"] / states["bought_tokens"], 0.0)
+            avg_sell = np.where(has_sold, states[f"sold_{currency}"] / states["sold_tokens"], 0.0)
+            pnl[f"avg_entry_{currency}"] = avg_entry
+            pnl[f"realized_pnl_{currency}"] = np.where(
+                has_sold, states[f"sold_{currency}"] - states["sold_tokens"] * avg_entry, 0.0
+            )
+            pnl[f"realized_pnl_percentage_{currency}"] = np.where(
+                has_sold & (avg_entry != 0), (avg_sell / avg_entry - 1) * 100, 0.0
+            )
+            has_price = ~np.isnan(price)
+            pnl[f"unrealized_pnl_{currency}"] = np.where(
+                has_price, (price - avg_entry) * states["token_balance"], 0.0
+            )
+            pnl[f"unrealized_pnl_percentage_{currency}"] = np.where(
+                has_price & (avg_entry != 0), (price / avg_entry - 1) * 100, 0.0
+            )
+    return pnl
+
+
+async def _bulk_write(collection, requests: list) -> None:
+    if not requests:
+        return
+    try:
+        await collection.bulk_write(requests, ordered=False)
+    except BulkWriteError as e:
+        # Duplicate keys mean a newer incremental state won the upsert race, anything else is a real error
+        if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+            raise
+
+
+async def recompute_users(user_ids: list, sol_price: float) -> int:
+    """Recomputes and writes states and positions of the given users, returns the number of (user, mint) groups"""
+    cursor = trade_db.trades.find({"user_id": {"$in": user_ids}}, TRADE_PROJECTION).sort(
+        [("user_id", 1), ("mint", 1), ("timestamp", 1)]
+    )
+    trades = await cursor.to_list(length=None)
+    if not trades:
+        return 0
+    states = compute_states(trades_to_columns(trades))
+
+    mints = np.unique(states["mint"]).tolist()
+    prices = await token_db.get_prices(mints)
+    prices_usd = np.array(
+        [np.nan if prices.get(mint) is None else prices[mint] for mint in states["mint"]], dtype=np.float64
+    )
+    pnl = compute_pnl(states, prices_usd, sol_price)
+
+    holdings = {
+        user["_id"]: user.get("holdings", {})
+        async for user in user_db.users.find({"_id": {"$in": user_ids}}, {"holdings": 1})
+    }
+
+    state_keys = ["n_buys", "n_sells", "bought_sol", "bought_usd", "bought_tokens", "sold_sol", "sold_usd",
+                  "sold_tokens", "token_balance", "n_trades", "last_timestamp"]
+    state_columns = [states[key].tolist() for key in state_keys]
+    pnl_columns = {key: values.tolist() for key, values in pnl.items()}
+
+    state_requests = []
+    # Held mints without any recorded trade get an empty position, like in update_user_positions
+    positions = {
+        user_id: {mint: position_from_state(POSITION_STATE_PROTOTYPE, balance) for mint, balance in user_holdings.items()}
+        for user_id, user_holdings in holdings.items()
+    }
+    for i, (user_id, mint) in enumerate(zip(states["user_id"].tolist(), states["mint"].tolist())):
+        state = {key: values[i] for key, values in zip(state_keys, state_columns)}
+        state_requests.append(
+            ReplaceOne(
+                {"user_id": user_id, "mint": mint, "n_trades": {"$lte": state["n_trades"]}},
+                {"user_id": user_id, "mint": mint, **state},
+                upsert=True,
+            )
+        )
+        if mint in holdings.get(user_id, {}):
+            positions[user_id][mint] = {
+                "balance": holdings[user_id][mint],
+                "n_buys": state["n_buys"],
+                "n_sells": state["n_sells"],
+                **{key: values[i] for key, values in pnl_columns.items()},
+            }
+
+    await _bulk_write(position_db.positions, state_requests)
+    await _bulk_write(
+        user_db.users,
+        [UpdateOne({"_id": user_id}, {"$set": {"positions": user_positions}}) for user_id, user_positions in positions.items()],
+    )
+    return len(state_requests)
+
+
+async def recompute_all(chunk_size: int = 2000) -> None:
+    user_ids = sorted(await trade_db.trades.distinct("user_id"))
+    sol_price = sol_dollar_value()
+    start = time.perf_counter()
+    n_positions = 0
+    for i in range(0, len(user_ids), chunk_size):
+        n_positions += await recompute_users(user_ids[i : i + chunk_size], sol_price)
+    logger.info(
+        f"Recomputed {n_positions} positions of {len(user_ids)} users in {time.perf_counter() - start:.2f}s."
+    )
+
+
+async def main():
+    await init_db()
+    await sol_price_service.start()
+    await recompute_all()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -25,10 +25,26 @@ class Config:
     def solana_rpc_url(self):
         return self.get("solana_rpc_url")
 
+    @property
+    def solana_rpc_urls(self):
+        """Comma separated additional read endpoints, each optionally followed by its max requests per second"""
+        urls = self.get("solana_rpc_urls")
+        if not urls:
+            return []
+        return [url.strip() for url in urls.split(",") if url.strip()]
+
     @property
     def solana_ws_url(self):
         return self.get("solana_ws_url")
 
+    @property
+    def solana_broadcast_urls(self):
+        """Comma separated RPC endpoints transactions are sent to, the main RPC if missing"""
+        urls = self.get("solana_broadcast_urls")
+        if not urls:
+            return [self.solana_rpc_url]
+        return [url.strip() for url in urls.split(",") if url.strip()]
+
     @property
     def max_requests_per_second(self):
         return int(self.get("max_requests_per_second"))
@@ -37,6 +53,11 @@ class Config:
     def platform_fee_pubkey(self):
         return self.get("platform_fee_pubkey")
 
+    @property
+    def sniper_send_transactions(self):
+        """The sniper only sends snipes when set to true, it runs dry otherwise"""
+        return (self.get("sniper_send_transactions") or "").strip().lower() == "true"
+
     @property
     def admin_telegram_account_id(self):
         return int(self.get("admin_telegram_account_id"))
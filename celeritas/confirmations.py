@@ -0,0 +1,176 @@
+import asyncio
+import itertools
+import json
+import logging
+import time
+
+import websockets
+from solders.signature import Signature
+from solders.transaction_status import TransactionConfirmationStatus
+
+from celeritas.constants import aclient
+from celeritas.constants import SOLANA_WS_URL
+
+logger = logging.getLogger(__name__)
+
+MAX_STATUSES_PER_REQUEST = 256  # getSignatureStatuses limit
+
+
+class ConfirmationService:
+    """
+    Waits for transactions to be confirmed, with one websocket for every signature in flight.
+
+    Every awaited signature gets a signatureSubscribe on the shared connection, which is reopened with backoff and
+    resubscribes whatever is still pending. A sweeper checks pending signatures every sweep_interval seconds with
+    one getSignatureStatuses call per MAX_STATUSES_PER_REQUEST signatures: all of them while the websocket is down
+    or disabled, otherwise only those pending for longer than poll_after seconds in case a notification was
+    missed. Callers fetch a transaction only once it is confirmed, so RPC calls do not grow with the time trades
+    take to land.
+    """
+
+    def __init__(
+        self,
+        url: str = SOLANA_WS_URL,
+        commitment: str = "confirmed",
+        use_websocket: bool = True,
+        sweep_interval: float = 0.4,
+        poll_after: float = 10,
+        min_backoff: float = 0.5,
+        max_backoff: float = 30,
+    ):
+        self.url = url
+        self.commitment = commitment
+        self.use_websocket = use_websocket
+        self.sweep_interval = sweep_interval
+        self.poll_after = poll_after
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self._pending = {}  # signature -> (future, added at)
+        self._subscriptions = {}  # subscription id -> signature
+        self._requests = {}  # request id -> signature
+        self._ids = itertools.count(1)
+        self._websocket = None
+        self._tasks = []
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._sweep_periodically())]
+            if self.use_websocket:
+                self._tasks.append(asyncio.create_task(self._run()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self._websocket:
+            await self._websocket.close()
+
+    async def wait(self, signature, timeout: float = 90) -> dict:
+        """{"err": None or the transaction error} once the transaction is confirmed, None if it timed out"""
+        self.start()
+        signature = str(signature)
+        if signature not in self._pending:
+            self._pending[signature] = (asyncio.get_running_loop().create_future(), time.monotonic())
+            await self._subscribe(signature)
+        future = self._pending[signature][0]
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            self._pending.pop(signature, None)
+            await self._unsubscribe(signature)
+            return None
+
+    def _resolve(self, signature: str, err) -> None:
+        future, _ = self._pending.pop(signature, (None, None))
+        if future and not future.done():
+            future.set_result({"err": err})
+
+    async def _send(self, method: str, params: list, signature: str = None) -> None:
+        if self._websocket is None:
+            return
+        request_id = next(self._ids)
+        if signature:
+            self._requests[request_id] = signature
+        try:
+            await self._websocket.send(json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}))
+        except websockets.ConnectionClosed:
+            pass  # Pending signatures are resubscribed on reconnect
+
+    async def _subscribe(self, signature: str) -> None:
+        await self._send("signatureSubscribe", [signature, {"commitment": self.commitment}], signature)
+
+    async def _unsubscribe(self, signature: str) -> None:
+        for subscription_id, subscribed in list(self._subscriptions.items()):
+            if subscribed == signature:
+                del self._subscriptions[subscription_id]
+                await self._send("signatureUnsubscribe", [subscription_id])
+
+    def _handle(self, data: dict) -> None:
+        if data.get("method") == "signatureNotification":
+            # The subscription ends with its notification
+            signature = self._subscriptions.pop(data["params"]["subscription"], None)
+            if signature:
+                self._resolve(signature, data["params"]["result"]["value"]["err"])
+        elif "id" in data:
+            signature = self._requests.pop(data["id"], None)
+            if signature is None:
+                return
+            if "error" in data:
+                logger.error(f"signatureSubscribe for {signature} failed: {data['error']}")
+            elif signature in self._pending:
+                self._subscriptions[data["result"]] = signature
+
+    async def _run(self) -> None:
+        backoff = self.min_backoff
+        while True:
+            try:
+                async with websockets.connect(self.url) as websocket:
+                    self._websocket = websocket
+                    self._subscriptions.clear()
+                    self._requests.clear()
+                    for signature in list(self._pending):
+                        await self._subscribe(signature)
+                    backoff = self.min_backoff
+                    async for message in websocket:
+                        self._handle(json.loads(message))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Confirmation websocket failed, reconnecting in {backoff:.1f}s: {e}")
+            finally:
+                self._websocket = None
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    async def poll(self, signatures: list) -> None:
+        """Resolves the confirmed signatures among signatures, MAX_STATUSES_PER_REQUEST per RPC call"""
+        for i in range(0, len(signatures), MAX_STATUSES_PER_REQUEST):
+            chunk = signatures[i : i + MAX_STATUSES_PER_REQUEST]
+            statuses = (await aclient.get_signature_statuses([Signature.from_string(s) for s in chunk])).value
+            for signature, status in zip(chunk, statuses):
+                if status is None:
+                    continue
+                if status.err is not None or status.confirmation_status in (
+                    TransactionConfirmationStatus.Confirmed,
+                    TransactionConfirmationStatus.Finalized,
+                ):
+                    await self._unsubscribe(signature)
+                    self._resolve(signature, status.err)
+
+    async def _sweep_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            if self._websocket is None:
+                signatures = list(self._pending)
+            else:
+                overdue = time.monotonic() - self.poll_after
+                signatures = [signature for signature, (_, added) in self._pending.items() if added < overdue]
+            if not signatures:
+                continue
+            try:
+                await self.poll(signatures)
+            except Exception as e:
+                logger.error(f"Polling {len(signatures)} signature statuses failed: {e}")
+
+
+confirmation_service = ConfirmationService()
@@ -1,21 +1,31 @@
+import copy
 import time
 import asyncio
 import aiohttp
 import pymongo
 
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from pymongo.errors import DuplicateKeyError
+
 from typing import List, Dict
 
 from solana.rpc.types import TokenAccountOpts
 from solders.pubkey import Pubkey
 
 from celeritas.config import config
-from celeritas.constants import client
+from celeritas.constants import aclient
 from celeritas.constants import LAMPORTS_PER_SOL
 from celeritas.constants import WRAPPED_SOL
 from celeritas.get_token_metadata import get_metadata
-from celeritas.get_token_metadata import get_token_supply
+from celeritas.get_token_metadata import get_token_supplies
+from celeritas.priority_limiter import BACKGROUND
+from celeritas.priority_limiter import rpc_priority
 from celeritas.telegram_bot.utils import sol_dollar_value
 from celeritas.transact_utils import get_bonding_curve
+from celeritas.transact_utils import get_bonding_curves
 from celeritas.transact_utils import get_pool_id_by_mint
 from celeritas.transact_utils import get_quote_info_from_pool
 from celeritas.user import User
@@ -27,17 +37,37 @@ logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s
 logging.getLogger("httpx").setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
+_mongo_clients = {}
+
+
+def get_mongo_client(host: str = config.mongodb_url) -> AsyncIOMotorClient:
+    """Returns the process-wide client for host, all collections share its connection pool"""
+    if host not in _mongo_clients:
+        _mongo_clients[host] = AsyncIOMotorClient(host)
+    return _mongo_clients[host]
+
+
+# Computed once at import, building a User() just to validate a key would generate a fresh Keypair
+_USER_DEFAULTS = User().to_dict()
+USER_ATTRIBUTES = frozenset(_USER_DEFAULTS)
+USER_SETTINGS_ATTRIBUTES = frozenset(User_settings().to_dict())
+for _key in ("_id", "wallet_public", "wallet_secret", "referral_wallet"):
+    _USER_DEFAULTS[_key] = None
+
+
 class UserDB:
     def __init__(self, host: str = config.mongodb_url):
-        self.client = pymongo.MongoClient(host)
+        self.client = get_mongo_client(host)
         self.users = self.client["celeritas"]["users"]
-        self.users.create_index([("sniping.wallet", pymongo.ASCENDING)])
 
-    def user_exists(self, id: int) -> bool:
-        return self.users.find_one({"_id": id}) is not None
+    async def initialize(self) -> None:
+        await self.users.create_index([("sniping.wallet", pymongo.ASCENDING)])
+
+    async def user_exists(self, id: int) -> bool:
+        return await self.users.find_one({"_id": id}, {"_id": 1}) is not None
 
-    def get_user(self, id: int) -> User:
-        user_data = self.users.find_one({"_id": id})
+    async def get_user(self, id: int) -> User:
+        user_data = await self.users.find_one({"_id": id})
         if user_data is None:
             # user = User(id=id)
             # self.users.insert_one(user.to_dict())
@@ -45,180 +75,158 @@ class UserDB:
             pass
         return User.from_dict(user_data) if user_data else None
 
-    def update_attribute(self, id: int, attribute: str, new_value) -> None:
-        if not self.user_exists(id):
+    async def update_attribute(self, id: int, attribute: str, new_value) -> None:
+        if attribute not in USER_ATTRIBUTES:
+            raise ValueError(f"Attribute {attribute} not in celeritas.user.User.")
+        result = await self.users.update_one({"_id": id}, {"$set": {attribute: new_value}})
+        if not result.matched_count:
             raise ValueError(f"User {id} does not exist in db.")
-        if attribute not in User().to_dict():
+
+    async def increment_attribute(self, id: int, attribute: str, amount) -> None:
+        if attribute not in USER_ATTRIBUTES:
             raise ValueError(f"Attribute {attribute} not in celeritas.user.User.")
-        self.users.update_one({"_id": id}, {"$set": {attribute: new_value}})
+        result = await self.users.update_one({"_id": id}, {"$inc": {attribute: amount}})
+        if not result.matched_count:
+            raise ValueError(f"User {id} does not exist in db.")
 
-    def get_attribute(self, id: int, attribute: str) -> None:
-        if not self.user_exists(id):
+    async def get_attributes(self, id: int, *attributes: str) -> dict:
+        """Fetches only the requested top-level fields of a user in a single query"""
+        for attribute in attributes:
+            if attribute not in USER_ATTRIBUTES:
+                raise ValueError(f"Attribute {attribute} not in celeritas.user.User.")
+        user_data = await self.users.find_one({"_id": id}, {attribute: 1 for attribute in attributes})
+        if user_data is None:
             raise ValueError(f"User {id} does not exist in db.")
-        user_data = self.get_user(id).to_dict()
-        if attribute not in user_data:
-            raise ValueError(f"Attribute {attribute} not in celeritas.user.User.")
-        return user_data[attribute]
+        return {
+            attribute: (
+                user_data[attribute]
+                if user_data.get(attribute) is not None
+                else copy.deepcopy(_USER_DEFAULTS[attribute])
+            )
+            for attribute in attributes
+        }
 
-    def get_user_settings(
+    async def get_attribute(self, id: int, attribute: str):
+        return (await self.get_attributes(id, attribute))[attribute]
+
+    async def get_user_settings(
         self,
         id: int,
     ) -> User_settings:
-        if not self.user_exists(id):
+        user_data = await self.users.find_one({"_id": id}, {"settings": 1})
+        if user_data is None:
             raise ValueError(f"User {id} does not exist in db.")
-        user_settings = self.get_user(id).settings
-        return user_settings
-
-    def update_user_settings(self, id: int, attribute: str, value) -> User_settings:
-        if not self.user_exists(id):
+        return User_settings.from_dict(user_data.get("settings") or {})
+
+    async def _update_user_settings(self, id: int, update) -> User_settings:
+        user_data = await self.users.find_one_and_update(
+            {"_id": id},
+            update,
+            projection={"settings": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if user_data is None:
             raise ValueError(f"User {id} does not exist in db.")
-        if attribute not in User().settings.to_dict():
-            print(attribute, User().settings.to_dict())
+        return User_settings.from_dict(user_data["settings"])
+
+    async def update_user_settings(self, id: int, attribute: str, value) -> User_settings:
+        if attribute not in USER_SETTINGS_ATTRIBUTES:
             raise ValueError(f"Attribute {attribute} not in celeritas.user.User.settings")
-        self.users.update_one({"_id": id}, {"$set": {f"settings.{attribute}": value}})
-        return self.get_user_settings(id)
+        return await self._update_user_settings(id, {"$set": {f"settings.{attribute}": value}})
 
-    def add_user(self, user: User, override: bool = False) -> None:
-        if self.user_exists(user.id):
-            if not override:
-                raise Exception(f'User already in db. To add anyways pass "override=True".')
-            else:
-                self.delete_user(user.id)
-        self.users.insert_one(user.to_dict())
+    async def toggle_user_setting(self, id: int, attribute: str) -> User_settings:
+        """Flips a boolean setting server-side, without reading it first"""
+        if attribute not in USER_SETTINGS_ATTRIBUTES:
+            raise ValueError(f"Attribute {attribute} not in celeritas.user.User.settings")
+        return await self._update_user_settings(
+            id, [{"$set": {f"settings.{attribute}": {"$not": [f"$settings.{attribute}"]}}}]
+        )
+
+    async def add_user(self, user: User, override: bool = False) -> None:
+        if override:
+            await self.users.replace_one({"_id": user.id}, user.to_dict(), upsert=True)
+            # Replacing the user used to drop its embedded trade history as well
+            await trade_db.delete_trades(user.id)
+            return
+        try:
+            await self.users.insert_one(user.to_dict())
+        except DuplicateKeyError:
+            raise Exception(f'User already in db. To add anyways pass "override=True".')
 
-    def delete_user(self, id: int) -> None:
+    async def delete_user(self, id: int) -> None:
         # Check if the user exists
         # if not self.user_exists(id):
         #    raise ValueError(f"User {id} does not exist in db.")
-        self.users.delete_one({"_id": id})
+        await self.users.delete_one({"_id": id})
+        await trade_db.delete_trades(id)
 
-    def update_user_holdings(self, id: int) -> None:
-        """Download and update holdings of user"""
-        pk = self.get_attribute(id, "wallet_public")
+    async def update_user_holdings(self, id: int) -> None:
+        """Download and update holdings and SOL balance of user"""
+        pk = Pubkey.from_string(await self.get_attribute(id, "wallet_public"))
         opts = TokenAccountOpts(
             program_id=(Pubkey.from_string("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"))
         )
-        q = client.get_token_accounts_by_owner_json_parsed(Pubkey.from_string(pk), opts)
+        q, balance = await asyncio.gather(
+            aclient.get_token_accounts_by_owner_json_parsed(pk, opts),
+            aclient.get_balance(pk),
+        )
         holdings = {}
         for a in q.value:
             amount = a.account.data.parsed["info"]["tokenAmount"]["uiAmount"]
             token = a.account.data.parsed["info"]["mint"]
             if amount:
                 holdings[token] = amount
-        self.update_attribute(id, "holdings", holdings)
-        self.update_sol_balance(id)
+        await self.users.update_one(
+            {"_id": id},
+            {"$set": {"holdings": holdings, "sol_in_wallet": balance.value / LAMPORTS_PER_SOL}},
+        )
         return holdings
 
-    def update_user_positions(self, id: int, update_holdings=False, get_prices=False) -> dict:
-        holdings = self.update_user_holdings(id) if update_holdings else self.get_attribute(id, "holdings")
-        transactions = self.get_attribute(id, "transactions")
+    async def update_user_positions(self, id: int, update_holdings=False, get_prices=False) -> dict:
+        """Positions are derived from the running per-mint state kept by PositionDB, trade history is not read"""
+        holdings = await self.update_user_holdings(id) if update_holdings else await self.get_attribute(id, "holdings")
+        states = await position_db.get_states(id, mints=holdings.keys())
         current_prices = {}
 
         if get_prices:
             tokens = self.client["celeritas"]["tokens"].find(
                 {"_id": {"$in": list(holdings.keys())}}, {"price_dollars": 1}
             )
-            current_prices = {token["_id"]: token.get("price_dollars") for token in tokens}
+            current_prices = {token["_id"]: token.get("price_dollars") async for token in tokens}
 
         positions = {}
         for token, balance in holdings.items():
-            position = {
-                k: 0
-                for k in [
-                    "balance",
-                    "avg_entry_sol",
-                    "avg_entry_usd",
-                    "n_buys",
-                    "n_sells",
-                    "realized_pnl_usd",
-                    "realized_pnl_sol",
-                    "realized_pnl_percentage_usd",
-                    "realized_pnl_percentage_sol",
-                    "unrealized_pnl_usd",
-                    "unrealized_pnl_sol",
-                    "unrealized_pnl_percentage_usd",
-                    "unrealized_pnl_percentage_sol",
-                ]
-            }
-            position["balance"] = balance
-
-            total_bought = {"sol": 0, "usd": 0, "tokens": 0}
-            total_sold = {"sol": 0, "usd": 0, "tokens": 0}
-            current_token_balance = 0
-
-            for tx in sorted(
-                filter(lambda x: x["mint"] == token, transactions), key=lambda x: x["timestamp"]
-            ):
-                token_delta = tx["post_token_balance"] - tx["pre_token_balance"]
-                sol_delta = tx["post_sol_balance"] - tx["pre_sol_balance"]
-                usd_delta = sol_delta * tx["sol_dollar_value"]
-
-                if token_delta > 0:  # Buy
-                    position["n_buys"] += 1
-                    total_bought["sol"] -= sol_delta
-                    total_bought["usd"] -= usd_delta
-                    total_bought["tokens"] += token_delta
-                    current_token_balance += token_delta
-                elif token_delta < 0:  # Sell
-                    position["n_sells"] += 1
-                    total_sold["sol"] += sol_delta
-                    total_sold["usd"] += usd_delta
-                    sold_tokens = abs(token_delta)
-                    total_sold["tokens"] += sold_tokens
-                    current_token_balance -= sold_tokens
-
-                    if current_token_balance > 0:
-                        sold_ratio = sold_tokens / (current_token_balance + sold_tokens)
-                        for key in total_bought:
-                            total_bought[key] -= total_bought[key] * sold_ratio
-                    else:
-                        total_bought = {key: 0 for key in total_bought}
-
-            if total_bought["tokens"] > 0:
-                position["avg_entry_sol"] = total_bought["sol"] / total_bought["tokens"]
-                position["avg_entry_usd"] = total_bought["usd"] / total_bought["tokens"]
-
-            if total_sold["tokens"] > 0:
-                avg_sell_price = {
-                    "sol": total_sold["sol"] / total_sold["tokens"],
-                    "usd": total_sold["usd"] / total_sold["tokens"],
-                }
-                for currency in ["sol", "usd"]:
-                    position[f"realized_pnl_{currency}"] = total_sold[currency] - (
-                        total_sold["tokens"] * position[f"avg_entry_{currency}"]
-                    )
-                    position[f"realized_pnl_percentage_{currency}"] = (
-                        (avg_sell_price[currency] / position[f"avg_entry_{currency}"] - 1) * 100
-                        if position[f"avg_entry_{currency}"]
-                        else 0
-                    )
-            if get_prices and token in current_prices:
-                current_price_usd = current_prices[token]
-                current_price_sol = current_price_usd / sol_dollar_value()
-                for currency, price in [("usd", current_price_usd), ("sol", current_price_sol)]:
-                    position[f"unrealized_pnl_{currency}"] = (
-                        price - position[f"avg_entry_{currency}"]
-                    ) * current_token_balance
-                    position[f"unrealized_pnl_percentage_{currency}"] = (
-                        ((price / position[f"avg_entry_{currency}"]) - 1) * 100
-                        if position[f"avg_entry_{currency}"]
-                        else 0
-                    )
-
-            positions[token] = position
+            state = states.get(token, POSITION_STATE_PROTOTYPE)
+            price_usd = current_prices.get(token) if get_prices else None
+            positions[token] = position_from_state(state, balance, price_usd)
 
-        self.update_attribute(id, "positions", positions)
+        await self.update_attribute(id, "positions", positions)
         return positions
 
-    def update_sol_balance(self, id: int) -> float:
-        if not self.user_exists:
-            raise ValueError(f"User {id} does not exist in db.")
-        pk = self.get_attribute(id, "wallet_public")
-        balance = client.get_balance(Pubkey.from_string(pk)).value
-        self.users.update_one({"_id": id}, {"$set": {"sol_in_wallet": balance / LAMPORTS_PER_SOL}})
+    async def update_sol_balance(self, id: int) -> float:
+        pk = await self.get_attribute(id, "wallet_public")
+        balance = (await aclient.get_balance(Pubkey.from_string(pk))).value
+        await self.users.update_one({"_id": id}, {"$set": {"sol_in_wallet": balance / LAMPORTS_PER_SOL}})
         return balance
 
 
+# Set once a token is created, cached in process by TokenDB
+TOKEN_METADATA_FIELDS = ("name", "symbol", "decimals", "is_mutable")
+# Fields of the sell and withdraw menus and the positions pages
+TOKEN_MENU_FIELDS = ("mint", "symbol", "price_dollars", "is_pump_fun", "pump_fun_data.bonding_curve_complete")
+# Fields a bonding curve refresh changes
+PUMP_FUN_REFRESH_FIELDS = (
+    "pump_fun_data",
+    "price_dollars",
+    "market_cap_dollars",
+    "refresh_timestamp",
+    "price_history",
+    "price_change",
+)
+# Missing tokens created at once, each costs several RPC and HTTP requests
+MAX_CONCURRENT_TOKEN_ADDS = 8
+
+
 class TokenDB:
     token_prototype = {
         "mint": None,
@@ -245,8 +253,17 @@ class TokenDB:
     }
 
     def __init__(self, host: str = config.mongodb_url):
-        self.client = pymongo.MongoClient(host)
+        self.client = get_mongo_client(host)
         self.tokens = self.client["celeritas"]["tokens"]
+        self._metadata = {}  # mint -> TOKEN_METADATA_FIELDS
+
+    def _cache_metadata(self, token: dict) -> None:
+        if all(field in token for field in TOKEN_METADATA_FIELDS):
+            self._metadata[token["_id"] if "_id" in token else token["mint"]] = {
+                field: token[field] for field in TOKEN_METADATA_FIELDS
+            }
+
+    async def initialize(self) -> None:
         token = {
             "_id": "So11111111111111111111111111111111111111112",
             "mint": "So11111111111111111111111111111111111111112",
@@ -271,43 +288,64 @@ class TokenDB:
             "price_history": [],
             "price_change": {"5m": 0.0, "30m": 0.0, "24h": 0.0},
         }
-        if not self.tokens.find_one({"_id": token["mint"]}):
-            self.tokens.insert_one(token)
+        if not await self.tokens.find_one({"_id": token["mint"]}, {"_id": 1}):
+            await self.tokens.insert_one(token)
 
     async def token_in_db(self, mint: str) -> bool:
         # Returns True if user exists in db, else False
-        return self.tokens.find_one({"_id": mint}) is not None
+        return await self.tokens.find_one({"_id": mint}, {"_id": 1}) is not None
 
     async def get_token(self, mint: str) -> dict:
-        token = self.tokens.find_one({"_id": mint})
+        token = await self.tokens.find_one({"_id": mint})
         if token:
             token["supply"] = int(token["supply"])
+            self._cache_metadata(token)
         return token
 
-    async def get_tokens(self, mints: List[str]) -> List[dict]:
-        tokens = {}
-        new_mints = []
-        for mint in mints:
-            token = await self.get_token(mint)
-            if token:
-                tokens[mint] = token
-            else:
-                new_mints.append(mint)
-        
+    async def get_tokens(self, mints: List[str], fields: tuple = None) -> Dict[str, dict]:
+        """
+        Tokens by mint in the order of mints, only with fields (dotted paths allowed) and "mint" if given.
+
+        Tokens are fetched with one query, metadata fields come from the in process cache when it holds all mints.
+        Tokens not in the db yet are created, full, at most MAX_CONCURRENT_TOKEN_ADDS at a time.
+        """
+        projection = None
+        cached_fields = ()
+        if fields is not None:
+            cached_fields = [field for field in fields if field in TOKEN_METADATA_FIELDS]
+            if not all(mint in self._metadata for mint in mints):
+                cached_fields = []  # Fetched and cached with the rest
+            projection = dict.fromkeys(("mint",) + tuple(field for field in fields if field not in cached_fields), 1)
+            if not cached_fields:
+                projection.update(dict.fromkeys(TOKEN_METADATA_FIELDS, 1))
+
+        found = {}
+        async for token in self.tokens.find({"_id": {"$in": list(mints)}}, projection):
+            if "supply" in token:
+                token["supply"] = int(token["supply"])
+            self._cache_metadata(token)
+            for field in cached_fields:
+                token[field] = self._metadata[token["_id"]][field]
+            found[token["_id"]] = token
+
+        new_mints = [mint for mint in dict.fromkeys(mints) if mint not in found]
         if new_mints:
-            new_tokens = await self.add_tokens(new_mints)
-            tokens.update(new_tokens)
-        
-        return tokens
+            found.update(await self.add_tokens(new_mints))
+
+        return {mint: found[mint] for mint in mints if mint in found}
 
     async def add_tokens(self, mints: List[str]) -> Dict[str, dict]:
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_TOKEN_ADDS)
+
         async def add_single_token(mint: str):
-            logger.info(f"Adding {mint}")
-            return await self.add_token(mint, update_price=False)
+            async with semaphore:
+                logger.info(f"Adding {mint}")
+                return await self.add_token(mint, update_price=False)
 
         new_tokens = {}
         tasks = [add_single_token(mint) for mint in mints]
-        results = await asyncio.gather(*tasks)
+        with rpc_priority(BACKGROUND):
+            results = await asyncio.gather(*tasks)
 
         for mint, token in zip(mints, results):
             new_tokens[mint] = token
@@ -316,14 +354,17 @@ class TokenDB:
         return new_tokens
 
     async def get_token_decimals(self, mint: str) -> int:
-        token = self.tokens.find_one({"_id": mint}, {"decimals": 1})
+        if mint in self._metadata:
+            return self._metadata[mint]["decimals"]
+        token = await self.tokens.find_one({"_id": mint}, dict.fromkeys(TOKEN_METADATA_FIELDS, 1))
+        self._cache_metadata(token)
         return token["decimals"]
 
     async def insert_token_to_db(self, token: dict):
         """Used by update_token if token is not yet in db"""
         token["_id"] = token["mint"]
         token["supply"] = str(token["supply"])
-        self.tokens.insert_one(token)
+        await self.tokens.insert_one(token)
 
     async def update_token(self, token: dict):
         """Update existing token or insert a new one"""
@@ -332,13 +373,13 @@ class TokenDB:
         if not await self.token_in_db(token["mint"]):
             await self.insert_token_to_db(token)
         else:
-            self.tokens.update_one({"_id": token["mint"]}, {"$set": token})
+            await self.tokens.update_one({"_id": token["mint"]}, {"$set": token})
 
     async def get_prices(self, mints: List[str], add_missing=False) -> dict:
         """Returns prices for all specified mints in {mint: usd_price} format if they are in db"""
         prices = {}
         tokens = self.tokens.find({"_id": {"$in": mints}}, {"price_dollars": 1, "refresh_timestamp": 1})
-        for token in tokens:
+        async for token in tokens:
             prices[token["_id"]] = token.get("price_dollars", 0)
         # Filter out mints that were not found in the database
         missing_mints = set(mints) - set(prices.keys())
@@ -354,12 +395,24 @@ class TokenDB:
         bc = await get_bonding_curve(
             Pubkey.from_string(token["pump_fun_data"]["bonding_curve"]),
         )
-        token["pump_fun_data"]["bonding_curve_complete"] = bool(bc.complete)
-        token["refresh_timestamp"] = int(time.time())
         # If bonding curve is complete, price should be fetched from raydium
         if bc.complete:
-            token["pump_fun_data"]["bonding_curve_progress"] = 1
-            return await self.update_price(token)
+            self._complete_bonding_curve(token)
+            await self.update_token(token)
+            return await self.update_price(mint)
+        token = await self._apply_bonding_curve(token, bc)
+        await self.update_token(token)
+        return token
+
+    @staticmethod
+    def _complete_bonding_curve(token: dict) -> None:
+        token["pump_fun_data"]["bonding_curve_complete"] = True
+        token["pump_fun_data"]["bonding_curve_progress"] = 1
+
+    async def _apply_bonding_curve(self, token: dict, bc) -> dict:
+        """Prices token from its incomplete bonding curve"""
+        token["pump_fun_data"]["bonding_curve_complete"] = False
+        token["refresh_timestamp"] = int(time.time())
         token["pump_fun_data"]["bonding_curve_price_sol"] = (
             10**-3 * bc.virtualSolReserves / bc.virtualTokenReserves
         )
@@ -370,9 +423,32 @@ class TokenDB:
         token["market_cap_dollars"] = token["supply"] * token["price_dollars"] / 10 ** token["decimals"]
         token = await self.update_price_history(token, token["price_dollars"])
         token = await self.calculate_price_change(token)
-        await self.update_token(token)
         return token
 
+    async def _refresh_bonding_curves(self, tokens: list) -> list:
+        """
+        Reprices pump.fun tokens from their bonding curves, fetched together and written back with one bulk_write.
+
+        Returns the positions in tokens of those whose bonding curve completed, to be priced like other tokens.
+        """
+        curves = await get_bonding_curves([Pubkey.from_string(token["pump_fun_data"]["bonding_curve"]) for token in tokens])
+        completed, requests = [], []
+        for i, (token, bc) in enumerate(zip(tokens, curves)):
+            if bc is None:
+                logger.info(f"Bonding curve of {token['mint']} not found")
+                continue
+            if bc.complete:
+                self._complete_bonding_curve(token)
+                completed.append(i)
+                continue
+            await self._apply_bonding_curve(token, bc)
+            requests.append(
+                UpdateOne({"_id": token["mint"]}, {"$set": {field: token[field] for field in PUMP_FUN_REFRESH_FIELDS}})
+            )
+        if requests:
+            await self.tokens.bulk_write(requests, ordered=False)
+        return completed
+
     async def update_price_history(self, token: dict, new_price: float):
         current_time = int(time.time())
         token["price_history"].append({"timestamp": current_time, "price": new_price})
@@ -399,11 +475,10 @@ class TokenDB:
                 token["price_change"][period] = 0.0
         return token
 
-    async def _edit_price_fetch_supply(self, token, price):
+    async def _edit_price_fetch_supply(self, token, price, supply):
         token["price_dollars"] = price
         token["refresh_timestamp"] = int(time.time())
-        # fetch and update market cap
-        supply = await get_token_supply(token["mint"])
+        # update market cap, _update_price fetches the supplies of all refreshed tokens together
         token["supply"] = supply
         token["market_cap_dollars"] = (token["price_dollars"] / 10 ** token["decimals"]) * supply
         # Update price history and calculate price change
@@ -418,18 +493,27 @@ class TokenDB:
                 return await response.json()
 
     async def update_price(self, mints):
+        # Refreshes are bulk work and must not delay trades
+        with rpc_priority(BACKGROUND):
+            return await self._update_price(mints)
+
+    async def _update_price(self, mints):
         if isinstance(mints, str):
             mints = [mints]
 
         tokens = list((await self.get_tokens(mints)).values())
 
         indexes_to_update = []
+        bonding_curve_indexes = []
         for ix, token in enumerate(tokens):
             if time.time() - token["refresh_timestamp"] >= 60:
                 if token["is_pump_fun"] and not token["pump_fun_data"]["bonding_curve_complete"]:
-                    tokens[ix] = await self.update_pump_fun_token(token["mint"], token=token)
+                    bonding_curve_indexes.append(ix)
                 else:
                     indexes_to_update.append(ix)
+        if bonding_curve_indexes:
+            completed = await self._refresh_bonding_curves([tokens[ix] for ix in bonding_curve_indexes])
+            indexes_to_update += [bonding_curve_indexes[i] for i in completed]
 
         if not indexes_to_update:
             if len(mints) == 1:
@@ -437,7 +521,10 @@ class TokenDB:
             return
 
         mint_list = ",".join(tokens[ix]["mint"] for ix in indexes_to_update)
-        price_info = (await self.fetch_price_data(mint_list))["data"]
+        price_info, supplies = await asyncio.gather(
+            self.fetch_price_data(mint_list), get_token_supplies([tokens[ix]["mint"] for ix in indexes_to_update])
+        )
+        price_info = price_info["data"]
 
         for ix in indexes_to_update:
             token = tokens[ix]
@@ -453,7 +540,7 @@ class TokenDB:
             else:
                 price = price_info[mint]["price"]
 
-            token = await self._edit_price_fetch_supply(token, price)
+            token = await self._edit_price_fetch_supply(token, price, supplies.get(mint, token["supply"]))
             await self.update_token(token)
 
         if len(mints) == 1:
@@ -534,13 +621,19 @@ class TokenDB:
 
 class TransactionDB:
     def __init__(self, host: str = config.mongodb_url, expireAfterSeconds=180):
-        self.client = pymongo.MongoClient(host)
+        self.client = get_mongo_client(host)
         self.transactions = self.client["celeritas"]["transactions"]
-        self.transactions.create_index([("timestamp", pymongo.ASCENDING)], expireAfterSeconds=expireAfterSeconds)
+        self.expireAfterSeconds = expireAfterSeconds
+
+    async def initialize(self) -> None:
+        await self.transactions.create_index(
+            [("timestamp", pymongo.ASCENDING)], expireAfterSeconds=self.expireAfterSeconds
+        )
+        await self.transactions.create_index([("tx_signature", pymongo.ASCENDING)])
 
     async def insert_transaction(self, user_id: int, user_wallet: str, message_id: int, tx_signature: str, mint: str, timestamp: float):
         """Inserts a new transaction into the database."""
-        self.transactions.insert_one(
+        await self.transactions.insert_one(
             {
                 "user_id": user_id,
                 "user_wallet": user_wallet,
@@ -553,14 +646,237 @@ class TransactionDB:
 
     async def fetch_transaction(self, tx_signature: str) -> dict:
         """Fetches a transaction from the database."""
-        transaction = self.transactions.find_one({"tx_signature": tx_signature})
+        transaction = await self.transactions.find_one({"tx_signature": tx_signature})
         return transaction
 
+    async def fetch_transactions(self, tx_signatures: List[str]) -> Dict[str, dict]:
+        """Fetches all pending transactions among tx_signatures with a single query, keyed by signature."""
+        cursor = self.transactions.find({"tx_signature": {"$in": tx_signatures}})
+        return {transaction["tx_signature"]: transaction async for transaction in cursor}
+
     async def delete_transaction(self, tx_signature: str):
         """Deletes a transaction from the database."""
-        self.transactions.delete_one({"tx_signature": tx_signature})
+        await self.transactions.delete_one({"tx_signature": tx_signature})
+
+
+# Former unique index, it dropped distinct trades of a mint landing in the same second
+LEGACY_TRADE_INDEX = "user_id_1_mint_1_timestamp_1"
+
+
+class TradeDB:
+    """Append-only history of confirmed trades, one document per transaction signature"""
+
+    def __init__(self, host: str = config.mongodb_url):
+        self.client = get_mongo_client(host)
+        self.trades = self.client["celeritas"]["trades"]
+
+    async def initialize(self) -> None:
+        # Several trades of a user can land in the same block second, only the signature identifies a trade.
+        # Trades recorded before signatures were stored have none and are left out of the index
+        await self.trades.create_index(
+            "tx_signature", unique=True, partialFilterExpression={"tx_signature": {"$exists": True}}
+        )
+        await self.trades.create_index([("user_id", pymongo.ASCENDING), ("timestamp", pymongo.ASCENDING)])
+        if LEGACY_TRADE_INDEX in await self.trades.index_information():
+            await self.trades.drop_index(LEGACY_TRADE_INDEX)
+
+    async def insert_trade(self, user_id: int, trade: dict) -> bool:
+        """Records a confirmed trade and folds it into the position state, returns False if it was already recorded"""
+        try:
+            await self.trades.insert_one({**trade, "user_id": user_id})
+        except DuplicateKeyError:
+            return False
+        await position_db.apply_trade(user_id, trade)
+        return True
+
+    async def insert_trades(self, user_id: int, trades: List[dict]) -> int:
+        """Bulk insert used by the migration, already recorded trades are skipped"""
+        if not trades:
+            return 0
+        try:
+            result = await self.trades.insert_many(
+                [{**trade, "user_id": user_id} for trade in trades], ordered=False
+            )
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            return e.details["nInserted"]
+
+    async def delete_trades(self, user_id: int) -> None:
+        await self.trades.delete_many({"user_id": user_id})
+        await position_db.delete_states(user_id)
+
+    async def get_trades(self, user_id: int, mints=None) -> List[dict]:
+        """Returns trades of a user sorted by timestamp, optionally only for the given mints"""
+        query = {"user_id": user_id}
+        if mints is not None:
+            query["mint"] = {"$in": list(mints)}
+        cursor = self.trades.find(query, {"_id": 0, "user_id": 0}).sort("timestamp", pymongo.ASCENDING)
+        return await cursor.to_list(length=None)
+
+
+# Running totals of the average cost basis over all trades of one (user, mint), bought totals are scaled down on sells
+POSITION_STATE_PROTOTYPE = {
+    "n_buys": 0,
+    "n_sells": 0,
+    "bought_sol": 0,
+    "bought_usd": 0,
+    "bought_tokens": 0,
+    "sold_sol": 0,
+    "sold_usd": 0,
+    "sold_tokens": 0,
+    "token_balance": 0,
+    "n_trades": 0,  # Also used as version for optimistic concurrency
+    "last_timestamp": 0,
+}
+
+
+def apply_trade_to_state(state: dict, trade: dict) -> dict:
+    """Returns the state after trade, trades have to be applied in timestamp order"""
+    state = {key: state.get(key, default) for key, default in POSITION_STATE_PROTOTYPE.items()}
+    token_delta = trade["post_token_balance"] - trade["pre_token_balance"]
+    sol_delta = trade["post_sol_balance"] - trade["pre_sol_balance"]
+    usd_delta = sol_delta * trade["sol_dollar_value"]
+
+    if token_delta > 0:  # Buy
+        state["n_buys"] += 1
+        state["bought_sol"] -= sol_delta
+        state["bought_usd"] -= usd_delta
+        state["bought_tokens"] += token_delta
+        state["token_balance"] += token_delta
+    elif token_delta < 0:  # Sell
+        state["n_sells"] += 1
+        state["sold_sol"] += sol_delta
+        state["sold_usd"] += usd_delta
+        sold_tokens = abs(token_delta)
+        state["sold_tokens"] += sold_tokens
+        state["token_balance"] -= sold_tokens
+
+        if state["token_balance"] > 0:
+            sold_ratio = sold_tokens / (state["token_balance"] + sold_tokens)
+            for key in ["bought_sol", "bought_usd", "bought_tokens"]:
+                state[key] -= state[key] * sold_ratio
+        else:
+            for key in ["bought_sol", "bought_usd", "bought_tokens"]:
+                state[key] = 0
+
+    state["n_trades"] += 1
+    state["last_timestamp"] = max(state["last_timestamp"], trade["timestamp"])
+    return state
+
+
+def position_from_state(state: dict, balance: float, price_usd: float = None, sol_price: float = None) -> dict:
+    """Builds the position shown to the user, unrealized PnL is only computed if price_usd is given"""
+    position = {
+        k: 0
+        for k in [
+            "avg_entry_sol",
+            "avg_entry_usd",
+            "realized_pnl_usd",
+            "realized_pnl_sol",
+            "realized_pnl_percentage_usd",
+            "realized_pnl_percentage_sol",
+            "unrealized_pnl_usd",
+            "unrealized_pnl_sol",
+            "unrealized_pnl_percentage_usd",
+            "unrealized_pnl_percentage_sol",
+        ]
+    }
+    position.update({"balance": balance, "n_buys": state["n_buys"], "n_sells": state["n_sells"]})
+
+    if state["bought_tokens"] > 0:
+        position["avg_entry_sol"] = state["bought_sol"] / state["bought_tokens"]
+        position["avg_entry_usd"] = state["bought_usd"] / state["bought_tokens"]
+
+    if state["sold_tokens"] > 0:
+        for currency in ["sol", "usd"]:
+            avg_sell_price = state[f"sold_{currency}"] / state["sold_tokens"]
+            position[f"realized_pnl_{currency}"] = state[f"sold_{currency}"] - (
+                state["sold_tokens"] * position[f"avg_entry_{currency}"]
+            )
+            position[f"realized_pnl_percentage_{currency}"] = (
+                (avg_sell_price / position[f"avg_entry_{currency}"] - 1) * 100
+                if position[f"avg_entry_{currency}"]
+                else 0
+            )
+
+    if price_usd is not None:
+        price_sol = price_usd / (sol_price or sol_dollar_value())
+        for currency, price in [("usd", price_usd), ("sol", price_sol)]:
+            position[f"unrealized_pnl_{currency}"] = (price - position[f"avg_entry_{currency}"]) * state[
+                "token_balance"
+            ]
+            position[f"unrealized_pnl_percentage_{currency}"] = (
+                ((price / position[f"avg_entry_{currency}"]) - 1) * 100 if position[f"avg_entry_{currency}"] else 0
+            )
+
+    return position
+
+
+class PositionDB:
+    """Per (user_id, mint) running position state, updated incrementally from TradeDB.insert_trade"""
+
+    def __init__(self, host: str = config.mongodb_url, max_retries: int = 5):
+        self.client = get_mongo_client(host)
+        self.positions = self.client["celeritas"]["positions"]
+        self.max_retries = max_retries
+
+    async def initialize(self) -> None:
+        await self.positions.create_index([("user_id", pymongo.ASCENDING), ("mint", pymongo.ASCENDING)], unique=True)
+
+    async def get_states(self, user_id: int, mints=None) -> Dict[str, dict]:
+        query = {"user_id": user_id}
+        if mints is not None:
+            query["mint"] = {"$in": list(mints)}
+        return {state["mint"]: state async for state in self.positions.find(query, {"_id": 0, "user_id": 0})}
+
+    async def apply_trade(self, user_id: int, trade: dict) -> None:
+        """Folds a newly recorded trade into the state of its mint"""
+        mint = trade["mint"]
+        for _ in range(self.max_retries):
+            state = await self.positions.find_one({"user_id": user_id, "mint": mint})
+            if state is None:
+                try:
+                    await self.positions.insert_one(
+                        {"user_id": user_id, "mint": mint, **apply_trade_to_state({}, trade)}
+                    )
+                    return
+                except DuplicateKeyError:
+                    continue
+            if trade["timestamp"] < state["last_timestamp"]:
+                # Arrived out of order, the running totals depend on order so replay the history
+                break
+            result = await self.positions.update_one(
+                {"_id": state["_id"], "n_trades": state["n_trades"]}, {"$set": apply_trade_to_state(state, trade)}
+            )
+            if result.matched_count:
+                return
+        await self.rebuild(user_id, mints=[mint])
+
+    async def rebuild(self, user_id: int, mints=None) -> None:
+        """Recomputes the state from the trade history, used for out of order trades and migrations"""
+        states = {}
+        for trade in await trade_db.get_trades(user_id, mints=mints):
+            states[trade["mint"]] = apply_trade_to_state(states.get(trade["mint"], {}), trade)
+        for mint, state in states.items():
+            await self.positions.replace_one(
+                {"user_id": user_id, "mint": mint}, {"user_id": user_id, "mint": mint, **state}, upsert=True
+            )
+
+    async def delete_states(self, user_id: int) -> None:
+        await self.positions.delete_many({"user_id": user_id})
 
 
 user_db = UserDB()
 token_db = TokenDB()
-transaction_db = TransactionDB()
\ No newline at end of file
+transaction_db = TransactionDB()
+trade_db = TradeDB()
+position_db = PositionDB()
+
+
+async def init_db() -> None:
+    """Creates indexes and seed documents, has to be awaited once per process on its event loop"""
+    await user_db.initialize()
+    await token_db.initialize()
+    await transaction_db.initialize()
+    await trade_db.initialize()
+    await position_db.initialize()
\ No newline at end of file
@@ -1,3 +1,4 @@
+import asyncio
 import struct
 from enum import IntEnum
 
@@ -13,6 +14,7 @@ MAX_SYMBOL_LENGTH = 10
 MAX_URI_LENGTH = 200
 MAX_CREATOR_LENGTH = 34
 MAX_CREATOR_LIMIT = 5
+MAX_ACCOUNTS_PER_REQUEST = 100  # getMultipleAccounts limit
 
 
 class InstructionType(IntEnum):
@@ -92,10 +94,72 @@ def unpack_metadata_account(data):
     return metadata
 
 
+class AccountBatcher:
+    """
+    Coalesces account lookups into getMultipleAccounts calls of up to max_batch keys.
+
+    Keys requested within delay seconds of each other share a call, a full batch is sent at once. At most
+    max_concurrency calls are in flight, further batches wait for one of them to finish. Lookups return the account
+    data, None if the account does not exist.
+    """
+
+    def __init__(self, max_batch: int = MAX_ACCOUNTS_PER_REQUEST, delay: float = 0.005, max_concurrency: int = 4):
+        self.max_batch = max_batch
+        self.delay = delay
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._queued = {}  # pubkey -> future
+        self._flush_handle = None
+        self._tasks = set()
+
+    async def load(self, pubkey: Pubkey) -> bytes:
+        return (await self.load_many([pubkey]))[0]
+
+    async def load_many(self, pubkeys: list) -> list:
+        loop = asyncio.get_running_loop()
+        futures = []
+        for pubkey in pubkeys:
+            future = self._queued.get(pubkey)
+            if future is None:
+                future = self._queued[pubkey] = loop.create_future()
+                if len(self._queued) >= self.max_batch:
+                    self._flush()
+            futures.append(future)
+        if self._queued and self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.delay, self._flush)
+        return list(await asyncio.gather(*futures))
+
+    def _flush(self) -> None:
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._queued = self._queued, {}
+        if batch:
+            task = asyncio.create_task(self._fetch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, batch: dict) -> None:
+        try:
+            async with self._semaphore:
+                accounts = (await aclient.get_multiple_accounts(list(batch))).value
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, account in zip(batch.values(), accounts):
+            if not future.done():
+                future.set_result(None if account is None else account.data)
+
+
+account_batcher = AccountBatcher()
+
+
 async def get_metadata(mint_key):
-    metadata_account = get_metadata_account(mint_key)
-    data = (await aclient.get_account_info(metadata_account)).value.data
-    info = MINT_LAYOUT.parse((await aclient.get_account_info(Pubkey.from_string(mint_key))).value.data)
+    data, mint_data = await account_batcher.load_many([get_metadata_account(mint_key), Pubkey.from_string(mint_key)])
+    if data is None or mint_data is None:
+        raise ValueError(f"No metadata or mint account for {mint_key}")
+    info = MINT_LAYOUT.parse(mint_data)
     metadata = unpack_metadata_account(data)
     metadata["decimals"] = info.decimals
     metadata["supply"] = info.supply
@@ -103,5 +167,13 @@ async def get_metadata(mint_key):
 
 
 async def get_token_supply(mint_key):
-    info = MINT_LAYOUT.parse((await aclient.get_account_info(Pubkey.from_string(mint_key))).value.data)
+    info = MINT_LAYOUT.parse(await account_batcher.load(Pubkey.from_string(mint_key)))
     return info.supply
+
+
+async def get_token_supplies(mint_keys: list) -> dict:
+    """Supplies by mint, mints without an account are left out"""
+    accounts = await account_batcher.load_many([Pubkey.from_string(mint_key) for mint_key in mint_keys])
+    return {
+        mint_key: MINT_LAYOUT.parse(data).supply for mint_key, data in zip(mint_keys, accounts) if data is not None
+    }
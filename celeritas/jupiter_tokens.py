@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import os
+import struct
+import time
+
+import aiohttp
+from solders.pubkey import Pubkey
+
+logger = logging.getLogger(__name__)
+
+JUPITER_TOKENS_URL = "https://token.jup.ag/all"
+JUPITER_TOKENS_SNAPSHOT = "data/jupiter_tokens.bin"
+# Snapshot layout: little endian float64 fetch timestamp, uint32 count, then count raw 32 byte mints
+SNAPSHOT_HEADER = struct.Struct("<dI")
+
+
+class JupiterTokenIndex:
+    """
+    Set of mints tradeable on Jupiter, kept in memory as raw 32 byte keys so lookups are O(1).
+
+    A background task refetches the token list every refresh_interval seconds and writes a binary snapshot,
+    which is loaded at startup so a restart does not need to wait for the (large) token list.
+    """
+
+    def __init__(self, snapshot_path: str = JUPITER_TOKENS_SNAPSHOT, refresh_interval: float = 3600):
+        self.snapshot_path = snapshot_path
+        self.refresh_interval = refresh_interval
+        self.mints = None
+        self.timestamp = 0.0
+        self._refresh_task = None
+        self._background_task = None
+
+    async def start(self) -> None:
+        """Loads the snapshot and starts the background refresh, has to be awaited on the process event loop"""
+        if self._background_task:
+            return
+        self.load_snapshot()
+        self._background_task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self) -> None:
+        if self._background_task:
+            self._background_task.cancel()
+            self._background_task = None
+
+    async def contains(self, mint: str) -> bool:
+        if self.mints is None:
+            # Only without a snapshot and before the first refresh finished
+            await self.refresh()
+        try:
+            return bytes(Pubkey.from_string(mint)) in self.mints
+        except ValueError:
+            return False
+
+    async def refresh(self) -> None:
+        """Refetches the token list, callers arriving while a fetch is running wait for that one"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._fetch())
+        await asyncio.shield(self._refresh_task)
+
+    async def _fetch(self) -> None:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(JUPITER_TOKENS_URL) as response:
+                if response.status != 200:
+                    raise Exception(f"Failed to fetch Jupiter tokens: HTTP {response.status}")
+                tokens = await response.json()
+        mints = set()
+        for token in tokens:
+            try:
+                mints.add(bytes(Pubkey.from_string(token["address"])))
+            except ValueError:
+                continue
+        self.mints, self.timestamp = mints, time.time()
+        self.write_snapshot()
+
+    def load_snapshot(self) -> bool:
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                data = f.read()
+            timestamp, count = SNAPSHOT_HEADER.unpack_from(data)
+            body = memoryview(data)[SNAPSHOT_HEADER.size :]
+            if len(body) != count * 32:
+                raise ValueError("truncated snapshot")
+        except (FileNotFoundError, struct.error, ValueError) as e:
+            logger.info(f"No usable Jupiter token snapshot: {e}")
+            return False
+        self.mints = {bytes(body[i : i + 32]) for i in range(0, len(body), 32)}
+        self.timestamp = timestamp
+        return True
+
+    def write_snapshot(self) -> None:
+        """Writes to a temporary file first, readers in other processes never see a partial snapshot"""
+        os.makedirs(os.path.dirname(self.snapshot_path) or ".", exist_ok=True)
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(SNAPSHOT_HEADER.pack(self.timestamp, len(self.mints)))
+            f.write(b"".join(self.mints))
+        os.replace(tmp_path, self.snapshot_path)
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            # A snapshot written by another process may already be fresh
+            delay = self.timestamp + self.refresh_interval - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                if self.load_snapshot() and time.time() - self.timestamp < self.refresh_interval:
+                    continue
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Jupiter token list refresh failed: {e}")
+                await asyncio.sleep(60)
+
+
+jupiter_tokens = JupiterTokenIndex()
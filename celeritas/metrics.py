@@ -0,0 +1,39 @@
+import time
+
+
+class StageMetrics:
+    """Count and latency of one processing stage, reset every time it is reported"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float, count: int = 1) -> None:
+        self.count += count
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def timer(self) -> "_Timer":
+        """Context manager observing the time spent in its block"""
+        return _Timer(self)
+
+    def summary(self) -> str:
+        avg = self.total / self.count * 1000 if self.count else 0
+        return f"{self.name}: n={self.count} avg={avg:.1f}ms max={self.max * 1000:.1f}ms"
+
+
+class _Timer:
+    def __init__(self, metrics: StageMetrics):
+        self.metrics = metrics
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(time.perf_counter() - self.start)
@@ -0,0 +1,45 @@
+"""
+One-off migration moving the trade history embedded in user documents (``users.transactions``)
+into the ``trades`` collection, then rebuilds the per (user, mint) position states from it.
+
+Safe to re-run. The embedded trades carry no transaction signature to dedupe on, so trades of a user left without
+one by an interrupted run are replaced rather than inserted twice.
+
+Usage: python -m celeritas.migrate_trades
+"""
+
+import asyncio
+import logging
+
+from celeritas.db import init_db
+from celeritas.db import position_db
+from celeritas.db import trade_db
+from celeritas.db import user_db
+
+logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    await init_db()
+
+    users_migrated = trades_inserted = 0
+    query = {"transactions.0": {"$exists": True}}
+    async for user in user_db.users.find(query, {"transactions": 1}):
+        await trade_db.trades.delete_many({"user_id": user["_id"], "tx_signature": {"$exists": False}})
+        trades_inserted += await trade_db.insert_trades(user["_id"], user["transactions"])
+        await user_db.users.update_one({"_id": user["_id"]}, {"$unset": {"transactions": ""}})
+        users_migrated += 1
+
+    # Users without trades may still carry an empty list
+    await user_db.users.update_many({"transactions": {"$exists": True}}, {"$unset": {"transactions": ""}})
+    logger.info(f"Migrated {trades_inserted} trades of {users_migrated} users.")
+
+    user_ids = await trade_db.trades.distinct("user_id")
+    for user_id in user_ids:
+        await position_db.rebuild(user_id)
+    logger.info(f"Rebuilt position states of {len(user_ids)} users.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
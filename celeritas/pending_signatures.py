@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+
+from pymongo.errors import OperationFailure
+from pymongo.errors import PyMongoError
+
+from celeritas.db import transaction_db
+
+logger = logging.getLogger(__name__)
+
+# Codes of servers without change stream support (standalone mongod)
+CHANGE_STREAMS_UNSUPPORTED = {40573, 40324}
+
+
+class PendingSignatures:
+    """
+    In-memory set of the signatures in the transactions collection, blocks are matched with hash lookups
+    and Mongo is only queried for real matches.
+
+    The set is fed by a change stream on the collection. Servers without change streams (standalone mongod) fall
+    back to polling new documents by timestamp, then every lookup first syncs if the set was last synced before the
+    block was received, so a transaction inserted just before its block arrived is never missed.
+    Entries are dropped locally once the TTL index would have expired them.
+    """
+
+    def __init__(self, poll_interval: float = 0.5):
+        self.poll_interval = poll_interval
+        self.signatures = {}  # tx_signature -> timestamp
+        self._ids = {}  # _id -> tx_signature, delete events only carry the _id
+        self.change_stream = False
+        self.synced_at = 0.0
+        self._last_timestamp = 0
+        self._sync_task = None
+        self._task = None
+
+    async def start(self) -> None:
+        await self._load()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def match(self, tx_signatures, received: float) -> list:
+        """
+        Returns the pending signatures among tx_signatures of one block,
+        received is the time.perf_counter() at which the block was received
+        """
+        if not self.change_stream and self.synced_at < received:
+            await self.sync()
+        self._expire()
+        return [sig for sig in tx_signatures if sig in self.signatures]
+
+    def discard(self, tx_signature: str) -> None:
+        self.signatures.pop(tx_signature, None)
+
+    async def sync(self) -> None:
+        """Polls new documents, concurrent callers share one query"""
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.create_task(self._poll())
+        await asyncio.shield(self._sync_task)
+
+    def _add(self, transaction: dict) -> None:
+        self.signatures[transaction["tx_signature"]] = transaction["timestamp"]
+        self._ids[transaction["_id"]] = transaction["tx_signature"]
+        self._last_timestamp = max(self._last_timestamp, transaction["timestamp"])
+
+    def _expire(self) -> None:
+        expired = time.time() - transaction_db.expireAfterSeconds
+        if self.signatures and min(self.signatures.values()) < expired:
+            self.signatures = {sig: ts for sig, ts in self.signatures.items() if ts >= expired}
+            self._ids = {_id: sig for _id, sig in self._ids.items() if sig in self.signatures}
+
+    async def _load(self) -> None:
+        started = time.perf_counter()
+        async for transaction in transaction_db.transactions.find({}, {"tx_signature": 1, "timestamp": 1}):
+            self._add(transaction)
+        self.synced_at = started
+
+    async def _poll(self) -> None:
+        started = time.perf_counter()
+        # Timestamps are whole seconds and set by several processes, re-read a small overlap
+        query = {"timestamp": {"$gte": self._last_timestamp - 2}}
+        async for transaction in transaction_db.transactions.find(query, {"tx_signature": 1, "timestamp": 1}):
+            if transaction["_id"] not in self._ids:
+                self._add(transaction)
+        self.synced_at = started
+
+    async def _watch(self) -> None:
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "delete"]}}}]
+        async with transaction_db.transactions.watch(pipeline) as stream:
+            self.change_stream = True
+            # Events before the stream was opened were not seen, reload once it is open
+            await self._load()
+            logger.info("Following pending transactions with a change stream.")
+            async for change in stream:
+                if change["operationType"] == "insert":
+                    self._add(change["fullDocument"])
+                else:
+                    self.discard(self._ids.pop(change["documentKey"]["_id"], None))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._watch()
+            except OperationFailure as e:
+                self.change_stream = False
+                if e.code in CHANGE_STREAMS_UNSUPPORTED:
+                    logger.info("Change streams not supported, polling pending transactions.")
+                    break
+                logger.error(f"Pending transactions change stream failed, reopening: {e}")
+                await asyncio.sleep(1)
+            except PyMongoError as e:
+                self.change_stream = False
+                logger.error(f"Pending transactions change stream failed, reopening: {e}")
+                await asyncio.sleep(1)
+
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.sync()
+            except PyMongoError as e:
+                logger.error(f"Polling pending transactions failed: {e}")
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+from solders.pubkey import Pubkey
+
+POOL_CACHE_DB = "data/pool_cache.sqlite3"
+# Transaction keys stored as plain integers, everything else is a Pubkey
+POOL_KEYS_INTEGER_FIELDS = {"base_decimals", "quote_decimals"}
+
+logger = logging.getLogger(__name__)
+
+
+class PoolCache:
+    """
+    Process-wide cache of Raydium pool ids by mint pair and pool transaction keys by AMM.
+
+    Entries are kept in memory as deserialized Pubkey objects, repeated lookups of the same pool skip all parsing.
+    They are persisted in an SQLite database shared by all processes through ./data, every insert is its own
+    transaction so concurrent writers never corrupt or truncate the cache. The database is loaded lazily on first use,
+    misses are looked up in the database before the caller falls back to RPC, in case another process added the pool.
+    Loading, lookups of misses and writes run in a worker thread, another process holding the write lock never
+    blocks the event loop, and a lock held past busy_timeout counts as a miss or a skipped write.
+    """
+
+    def __init__(self, path: str = POOL_CACHE_DB, busy_timeout: float = 1):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._pool_ids = {}
+        self._pool_keys = {}
+        self._connection = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def pool_id_key(mint_a: Pubkey, mint_b: Pubkey) -> str:
+        return "".join(sorted([str(mint_a), str(mint_b)]))
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            with self._lock:
+                if self._connection is None:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    connection = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False)
+                    connection.execute("PRAGMA journal_mode=WAL")
+                    connection.execute("CREATE TABLE IF NOT EXISTS pool_ids (mints TEXT PRIMARY KEY, pool_id TEXT NOT NULL)")
+                    connection.execute("CREATE TABLE IF NOT EXISTS pool_keys (amm TEXT PRIMARY KEY, keys TEXT NOT NULL)")
+                    # Entries set while the database was loading are kept
+                    self._pool_ids = {
+                        **{
+                            mints: Pubkey.from_string(pool_id)
+                            for mints, pool_id in connection.execute("SELECT mints, pool_id FROM pool_ids")
+                        },
+                        **self._pool_ids,
+                    }
+                    self._pool_keys = {
+                        **{
+                            amm: self._deserialize_keys(keys)
+                            for amm, keys in connection.execute("SELECT amm, keys FROM pool_keys")
+                        },
+                        **self._pool_keys,
+                    }
+                    self._connection = connection
+        return self._connection
+
+    @staticmethod
+    def _deserialize_keys(keys: str) -> dict:
+        return {
+            key: value if key in POOL_KEYS_INTEGER_FIELDS else Pubkey.from_string(value)
+            for key, value in json.loads(keys).items()
+        }
+
+    @staticmethod
+    def _serialize_keys(keys: dict) -> str:
+        return json.dumps({key: value if key in POOL_KEYS_INTEGER_FIELDS else str(value) for key, value in keys.items()})
+
+    async def _execute(self, sql: str, parameters: tuple) -> tuple:
+        """First row of the statement run in a worker thread, None if there is none or the database is locked"""
+
+        def execute():
+            connection = self._connect()
+            with self._lock:
+                return connection.execute(sql, parameters).fetchone()
+
+        try:
+            return await asyncio.to_thread(execute)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Pool cache unavailable, lookup treated as a miss or write skipped: {e}")
+            return None
+
+    async def _load(self) -> None:
+        if self._connection is None:
+            try:
+                await asyncio.to_thread(self._connect)
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Loading the pool cache failed: {e}")
+
+    async def get_pool_id(self, mint_a: Pubkey, mint_b: Pubkey) -> Pubkey:
+        """Cached pool id of the mint pair in either order, None if unknown"""
+        await self._load()
+        key = self.pool_id_key(mint_a, mint_b)
+        if key not in self._pool_ids:
+            row = await self._execute("SELECT pool_id FROM pool_ids WHERE mints = ?", (key,))
+            if row is None:
+                return None
+            self._pool_ids[key] = Pubkey.from_string(row[0])
+        return self._pool_ids[key]
+
+    async def set_pool_id(self, mint_a: Pubkey, mint_b: Pubkey, pool_id: Pubkey) -> None:
+        key = self.pool_id_key(mint_a, mint_b)
+        self._pool_ids[key] = pool_id
+        await self._execute("INSERT OR REPLACE INTO pool_ids (mints, pool_id) VALUES (?, ?)", (key, str(pool_id)))
+
+    async def get_pool_keys(self, amm: Pubkey) -> dict:
+        """Cached transaction keys of the AMM, None if unknown. The returned dict is shared and must not be mutated"""
+        await self._load()
+        key = str(amm)
+        if key not in self._pool_keys:
+            row = await self._execute("SELECT keys FROM pool_keys WHERE amm = ?", (key,))
+            if row is None:
+                return None
+            self._pool_keys[key] = self._deserialize_keys(row[0])
+        return self._pool_keys[key]
+
+    async def set_pool_keys(self, amm: Pubkey, keys: dict) -> None:
+        self._pool_keys[str(amm)] = keys
+        await self._execute(
+            "INSERT OR REPLACE INTO pool_keys (amm, keys) VALUES (?, ?)", (str(amm), self._serialize_keys(keys))
+        )
+
+
+pool_cache = PoolCache()
@@ -0,0 +1,125 @@
+import asyncio
+import contextlib
+import contextvars
+import time
+from collections import deque
+
+from celeritas.metrics import StageMetrics
+
+# Lanes, a lower number is served first
+SEND = 0  # Sending and confirming transactions
+USER = 1  # Quotes and lookups a user is waiting for
+BACKGROUND = 2  # Price refreshes, backfills and other bulk work
+LANE_NAMES = ("send", "user", "background")
+
+current_lane = contextvars.ContextVar("rpc_lane", default=USER)
+
+
+@contextlib.contextmanager
+def rpc_priority(lane: int):
+    """Requests made in the block, and tasks started from it, use lane unless they set their own"""
+    token = current_lane.set(lane)
+    try:
+        yield
+    finally:
+        current_lane.reset(token)
+
+
+class PriorityLimiter:
+    """
+    Token bucket of max_rate tokens per time_period shared by several priority lanes.
+
+    A request waits while a request of its own or a higher lane is queued or the bucket holds fewer tokens than
+    it costs. Queued requests are served strictly by lane, then in arrival order, so background work never delays
+    a send. Can be used as ``async with limiter:``, acquiring one token on the current lane.
+    Wait times and queue depths are recorded per lane.
+    """
+
+    def __init__(self, max_rate: float, time_period: float = 1, name: str = ""):
+        self.capacity = max_rate
+        self.rate = max_rate / time_period
+        self.name = name
+        self._tokens = max_rate
+        self._updated = time.monotonic()
+        self._queues = [deque() for _ in LANE_NAMES]
+        self._wakeup = None
+        self.wait = [StageMetrics(f"{name} {lane}") for lane in LANE_NAMES]
+        self.max_depth = [0] * len(LANE_NAMES)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def depth(self) -> list:
+        """Requests queued in every lane"""
+        return [len(queue) for queue in self._queues]
+
+    def has_capacity(self, cost: float = 1, lane: int = None) -> bool:
+        lane = current_lane.get() if lane is None else lane
+        self._refill()
+        return self._tokens >= min(cost, self.capacity) and not any(self._queues[: lane + 1])
+
+    async def acquire(self, cost: float = 1, lane: int = None) -> None:
+        lane = current_lane.get() if lane is None else lane
+        cost = min(cost, self.capacity)  # A request costing more than the bucket holds would never be served
+        if self.has_capacity(cost, lane):
+            self._tokens -= cost
+            self.wait[lane].observe(0)
+            return
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues[lane]
+        queue.append((cost, future))
+        self.max_depth[lane] = max(self.max_depth[lane], len(queue))
+        self._serve()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if not future.done() or future.cancelled():
+                with contextlib.suppress(ValueError):
+                    queue.remove((cost, future))
+                self._serve()
+            raise
+        self.wait[lane].observe(time.monotonic() - started)
+
+    def _serve(self) -> None:
+        """Hands tokens to queued requests by priority and schedules itself for when the next one can be served"""
+        if self._wakeup:
+            self._wakeup.cancel()
+            self._wakeup = None
+        self._refill()
+        for queue in self._queues:
+            while queue:
+                cost, future = queue[0]
+                if future.done():
+                    queue.popleft()
+                    continue
+                if self._tokens < cost:
+                    delay = (cost - self._tokens) / self.rate
+                    self._wakeup = asyncio.get_running_loop().call_later(delay, self._serve)
+                    return
+                self._tokens -= cost
+                queue.popleft()
+                future.set_result(None)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return None
+
+    def summary(self) -> str:
+        """Wait times and deepest queue of every lane since the last summary"""
+        lanes = []
+        for lane, lane_name in enumerate(LANE_NAMES):
+            wait = self.wait[lane]
+            avg = wait.total / wait.count * 1000 if wait.count else 0
+            lanes.append(
+                f"{lane_name}: n={wait.count} wait avg={avg:.1f}ms max={wait.max * 1000:.1f}ms "
+                f"queued={len(self._queues[lane])} max queued={self.max_depth[lane]}"
+            )
+            wait.reset()
+            self.max_depth[lane] = len(self._queues[lane])
+        return f"{self.name}: " + ", ".join(lanes)
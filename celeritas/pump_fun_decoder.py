@@ -0,0 +1,71 @@
+"""
+Decodes pump.fun create instructions from DecodedTransactions of celeritas.block_decoder.
+
+Create instructions are found by program id and Anchor discriminator, their accounts follow the pump.fun IDL:
+mint, mintAuthority, bondingCurve, associatedBondingCurve, global, mplTokenMetadata, metadata, user, ...
+The creator's initial buy is the buy instruction for the same mint and user in the same transaction, or when it
+was made through another program, the creator's token balance after the transaction.
+"""
+
+import struct
+from typing import List, NamedTuple
+
+from celeritas.block_decoder import DecodedTransaction
+from celeritas.transact_utils import PUMP_FUN_PROGRAM
+
+PUMP_FUN_PROGRAM_ID = str(PUMP_FUN_PROGRAM)
+# sha256("global:create")[:8] and sha256("global:buy")[:8]
+CREATE_DISCRIMINATOR = bytes.fromhex("181ec828051c0777")
+BUY_DISCRIMINATOR = bytes.fromhex("66063d1201daebea")
+TOKEN_DECIMALS = 6
+
+_buy_args = struct.Struct("<QQ").unpack_from  # amount, maxSolCost
+
+
+class PumpFunCreate(NamedTuple):
+    signature: str
+    mint: str
+    creator: str
+    bonding_curve: str
+    associated_bonding_curve: str
+    initial_buy: float  # Tokens bought by the creator, 0 without an initial buy
+    initial_buy_max_sol: float  # Max SOL cost of the buy instruction, 0 if unknown
+
+
+def _initial_buy(tx: DecodedTransaction, mint: str, creator: str):
+    for instruction in tx.instructions:
+        if instruction.data[:8] == BUY_DISCRIMINATOR and instruction.program_id == PUMP_FUN_PROGRAM_ID:
+            accounts = instruction.accounts
+            try:
+                if accounts[2] == mint and accounts[6] == creator:
+                    amount, max_sol_cost = _buy_args(instruction.data, 8)
+                    return amount / 10**TOKEN_DECIMALS, max_sol_cost / 10**9
+            except IndexError:
+                continue
+    for balance in tx.post_token_balances:
+        if balance.mint == mint and balance.owner == creator:
+            return balance.ui_amount, 0.0
+    return 0.0, 0.0
+
+
+def decode_creates(tx: DecodedTransaction) -> List[PumpFunCreate]:
+    """Tokens created by a successful transaction"""
+    if tx.err:
+        return []
+    creates = []
+    # The discriminator is compared first, instructions of other programs cost one 8 byte comparison
+    for instruction in tx.instructions:
+        if instruction.data[:8] != CREATE_DISCRIMINATOR or instruction.program_id != PUMP_FUN_PROGRAM_ID:
+            continue
+        accounts = instruction.accounts
+        try:
+            mint, creator = accounts[0], accounts[7]
+        except IndexError:
+            continue
+        creates.append(PumpFunCreate(tx.signature, mint, creator, accounts[2], accounts[3], *_initial_buy(tx, mint, creator)))
+    return creates
+
+
+def decode_block_creates(block: dict) -> List[PumpFunCreate]:
+    """Tokens created in a block decoded by celeritas.block_decoder.decode_block"""
+    return [create for tx in block["transactions"] for create in decode_creates(tx)]
@@ -1,22 +1,27 @@
 import asyncio
-import json
 import logging
 import time
 import signal
-import websockets
 
 from aiolimiter import AsyncLimiter
 from solders.signature import Signature
 from telegram.ext import Application
 from telegram.ext import CallbackContext
 
+from celeritas.block_stream import get_block_stream
+from celeritas.blockhash import blockhash_service
+from celeritas.broadcaster import broadcaster
 from celeritas.config import config
-from celeritas.constants import SOLANA_WS_URL, aclient
-from celeritas.db import user_db
+from celeritas.confirmations import confirmation_service
+from celeritas.constants import aclient
+from celeritas.db import init_db
 from celeritas.db import transaction_db
+from celeritas.pump_fun_decoder import decode_block_creates
+from celeritas.sniper_routes import sniper_routes
+from celeritas.sniper_routes import SnipeRoute
+from celeritas.sol_price import sol_price_service
 from celeritas.telegram_bot.fetch_tx_update_msg import schedule_tx_update
 from celeritas.telegram_bot.utils import nice_float_price_format as nfpf
-from celeritas.transact import Transact
 
 # Enable logging
 logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO)
@@ -29,75 +34,29 @@ MINT_AUTHORITY_PUBKEY = "TSLvdd1pWpHVjahSpsvCXUbgwsL3JAcvokwaKt1eokM"
 
 application = Application.builder().token(config.telegram_bot_token).build()
 
-# Initialize a local wallet cache
-watched_wallets = set()
-
 # Create a rate limiter to limit concurrent tasks
 # allow for MAX_TASKS_PER_SECOND entries within a 1 second window
 MAX_TASKS_PER_SECOND = 3
 rate_limit = AsyncLimiter(MAX_TASKS_PER_SECOND, 1)
 
-
-async def refresh_wallet_cache():
-    global watched_wallets
-    while True:
-        watched_wallets = set()  # Clear the cache
-
-        # Fetch all watched wallets from the database
-        users = user_db.users.find({}, {"sniping.wallet": 1})
-        for user in users:
-            for setup in user.get("sniping", []):
-                if setup.get("wallet"):
-                    watched_wallets.add(setup["wallet"])
-
-        logger.info(f"Refreshed wallet cache with {len(watched_wallets)} wallets.")
-
-        # Wait for 60 seconds before the next refresh
-        await asyncio.sleep(60)
+# Snipes are only signed and sent when enabled, dry runs report this signature instead
+SEND_TRANSACTIONS = config.sniper_send_transactions
+DRY_RUN_SIGNATURE = Signature.from_string(
+    "3SriJZqAYe1jGbUGGCEwGkriJJBVsf5PdaGwtwTm3jtTdF1AVfBGWL2dgodKrySKWcSBZShcNetyar7GfmvCSy7S"
+)
 
 
-def parse_block(block):
-    coins = []
-    for tr in block["params"]["result"]["value"]["block"]["transactions"]:
-        instructions = tr["transaction"]["message"]["instructions"]
-        for instruction in instructions:
-            accounts = instruction.get("accounts", [])
-            if len(accounts) == 14:
-                if not tr["meta"]["err"]:
-                    coins.append(
-                        (
-                            accounts[0],
-                            accounts[7],
-                            time.time() - block["params"]["result"]["value"]["block"]["blockTime"],
-                            accounts[2],
-                            accounts[3],
-                        )
-                    )
-                break
-    return coins
-
-
-async def snipe_for_user(user, sniping_setup, mint, bonding_curve, associated_bonding_curve, time_diff):
+async def snipe_for_user(route: SnipeRoute, mint, bonding_curve, associated_bonding_curve, time_diff):
+    user, sniping_setup = route.user, route.setup
     try:
-        transact = Transact(user["wallet_secret"], fee_sol=sniping_setup["priority_fee"])
-
         output_amount = sniping_setup["amount"]
-        min_sol_cost, max_sol_cost = sniping_setup["min_sol_cost"], sniping_setup["max_sol_cost"]
-        # Execute the snipe
-        quote = await transact.snipe_pump_fun(
-            mint, output_amount, max_sol_cost, bonding_curve, associated_bonding_curve
-        )
-
-        # Send the transaction
-        async with rate_limit:
-            txs = Signature.from_string(
-                "3SriJZqAYe1jGbUGGCEwGkriJJBVsf5PdaGwtwTm3jtTdF1AVfBGWL2dgodKrySKWcSBZShcNetyar7GfmvCSy7S"
-            )
-            fee = (0.9 if user["referrer"] else 1) * 0.01 * (min_sol_cost + max_sol_cost) / 2
-            # txs = await transact.construct_and_send(
-            #    quote,
-            #    fee=fee # add transaction fee
-            # )
+        if SEND_TRANSACTIONS:
+            # Patch and sign the precompiled snipe transaction, then send it
+            _, raw_tx = route.template.sign(mint, bonding_curve, associated_bonding_curve, blockhash_service.get())
+            async with rate_limit:
+                txs = await broadcaster.broadcast(raw_tx, blockhash_service.last_valid_block_height)
+        else:
+            txs = DRY_RUN_SIGNATURE
         if txs:
             text = (
                 f"🚀 <b>Snipe order for {nfpf(output_amount)} sent!</b>\n\n"
@@ -136,96 +95,44 @@ async def snipe_for_user(user, sniping_setup, mint, bonding_curve, associated_bo
 
 
 async def snipe_concurrently(wallet, mint, bonding_curve, associated_bonding_curve, time_diff):
-    users = user_db.users.find({"sniping.wallet": wallet})
-    sniping_tasks = []
-
-    for user in users:
-        for sniping_setup in user["sniping"]:
-            if wallet == sniping_setup["wallet"]:
-                sniping_tasks.append(
-                    snipe_for_user(
-                        user,
-                        sniping_setup,
-                        mint,
-                        bonding_curve,
-                        associated_bonding_curve,
-                        time_diff,
-                    )
-                )
-
+    sniping_tasks = [
+        snipe_for_user(route, mint, bonding_curve, associated_bonding_curve, time_diff)
+        for route in sniper_routes.get(wallet)
+    ]
     results = await asyncio.gather(*sniping_tasks)
     return results
 
 
-async def unsubscribe():
-    if websocket_connection and subscription_id:
-        unsubscribe_params = {
-            "jsonrpc": "2.0",
-            "id": 2,
-            "method": "logsUnsubscribe",
-            "params": [subscription_id],
-        }
-        await websocket_connection.send(json.dumps(unsubscribe_params))
-        logger.info("Unsubscribed from logs")
-
-websocket_connection = None
-subscription_id = None
+block_stream = get_block_stream(MINT_AUTHORITY_PUBKEY)
 
-async def subscribe_blocks():
-    global websocket_connection
-    global subscription_id
-
-    async with websockets.connect(SOLANA_WS_URL) as websocket:
-        websocket_connection = websocket
-        # Construct the subscription request payload
-        params = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "blockSubscribe",
-            "params": [
-                {"mentionsAccountOrProgram": MINT_AUTHORITY_PUBKEY},
-                {
-                    "commitment": "confirmed",  # The level of commitment required
-                    "transactionDetails": "full",  # The level of transaction detail to return
-                    "showRewards": False,  # Whether to populate the 'rewards' array
-                    "encoding": "jsonParsed",  # Encoding format for account data
-                    "maxSupportedTransactionVersion": 0,
-                },
-            ],
-        }
-        await websocket.send(json.dumps(params))
 
+async def process_blocks(blocks: asyncio.Queue):
+    while True:
+        slot, block, received = await blocks.get()
         try:
-            while True:
-                response = await websocket.recv()
-                data = json.loads(response)
-                if "params" in data:
-                    data = parse_block(data)
-                    for mint, wallet, time_diff, bonding_curve, associated_bonding_curve in data:
-                        logger.info(f'Received mint "{mint}", delta: {time_diff:.2f} sec')
-                        wallet = "EiKviBF8WYxqYEoS1QuyoNobs7qTr6GvYftUNzZhakeE"  # testing
-                        if wallet not in watched_wallets:
-                            continue
-                        # Run sniping concurrently for all users with this wallet
-                        results = await snipe_concurrently(
-                            wallet, mint, bonding_curve, associated_bonding_curve, time_diff
-                        )
-                        logger.info(f"Sniping results: {results}")
-
-                if "result" in data and "id" in data and data["id"] == 1:
-                    subscription_id = data["result"]
-
+            for create in decode_block_creates(block):
+                mint, wallet = create.mint, create.creator
+                bonding_curve, associated_bonding_curve = create.bonding_curve, create.associated_bonding_curve
+                time_diff = time.time() - block["blockTime"]
+                logger.info(f'Received mint "{mint}", initial buy {create.initial_buy:,.0f}, delta: {time_diff:.2f} sec')
+                if wallet not in sniper_routes:
+                    continue
+                # Run sniping concurrently for all users with this wallet
+                results = await snipe_concurrently(
+                    wallet, mint, bonding_curve, associated_bonding_curve, time_diff
+                )
+                logger.info(f"Sniping results: {results}")
         except Exception as e:
-            logger.error("An exception has occurred in subscribe_blocks():", e)
+            logger.error(f"An exception has occurred processing block {slot}: {e}")
 
 
 async def shutdown(signal, loop):
     """Cleanup tasks tied to the service's shutdown."""
     logger.info(f"Received exit signal {signal.name}...")
 
-    await unsubscribe()
-    if websocket_connection:
-        await websocket_connection.close()
+    await block_stream.stop()
+    await broadcaster.stop()
+    await confirmation_service.stop()
 
     tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
 
@@ -244,15 +151,21 @@ async def main():
             s, lambda s=s: asyncio.create_task(shutdown(s, loop))
         )
 
-    refresh_task = asyncio.create_task(refresh_wallet_cache())
+    await init_db()
+    await sol_price_service.start()
+    await blockhash_service.start()
+    await sniper_routes.start()
+    if not SEND_TRANSACTIONS:
+        logger.warning("SNIPER_SEND_TRANSACTIONS is not true, snipes are neither signed nor sent.")
     
     try:
-        await application._job_queue.start()
-        await subscribe_blocks()
+        blocks = block_stream.subscribe()
+        block_stream.start()
+        await process_blocks(blocks)
     except: 
         pass
     finally:
-        refresh_task.cancel()  # Cancel the cache refresh task
+        await sniper_routes.stop()
         logger.info("Shutdown complete.")
 
 if __name__ == "__main__":
@@ -0,0 +1,205 @@
+import logging
+import time
+
+import orjson
+from solana.rpc.async_api import AsyncClient
+
+from celeritas.metrics import StageMetrics
+from celeritas.priority_limiter import current_lane
+from celeritas.priority_limiter import PriorityLimiter
+from celeritas.priority_limiter import SEND
+
+logger = logging.getLogger(__name__)
+
+# Rate limit tokens of the heavier methods, others cost one
+METHOD_COSTS = {
+    "get_program_accounts": 10,
+    "get_token_accounts_by_owner": 2,
+    "get_token_accounts_by_owner_json_parsed": 2,
+    "get_multiple_accounts": 2,
+    "get_multiple_accounts_json_parsed": 2,
+    "get_signatures_for_address": 2,
+    "get_block": 5,
+    "getBlock": 5,
+}
+# Methods always served in the send lane, whoever calls them
+SEND_METHODS = frozenset(
+    (
+        "send_transaction",
+        "send_raw_transaction",
+        "confirm_transaction",
+        "get_signature_statuses",
+        "get_transaction",
+        "get_latest_blockhash",
+    )
+)
+
+
+class RpcEndpoint:
+    """One RPC endpoint with its own client, rate limit, counters and health score"""
+
+    def __init__(
+        self,
+        url: str,
+        max_requests_per_second: float,
+        smoothing: float = 0.2,
+        max_consecutive_errors: int = 3,
+        cooldown: float = 10,
+        **kwargs,
+    ):
+        self.url = url
+        self.client = AsyncClient(url, **kwargs)
+        self.limiter = PriorityLimiter(max_requests_per_second, 1, name=url)
+        self.smoothing = smoothing
+        self.max_consecutive_errors = max_consecutive_errors
+        self.cooldown = cooldown
+        self.latency = StageMetrics(url)  # Successful requests
+        self.requests = 0
+        self.errors = 0
+        self.avg_latency = None  # Exponential moving averages, unmeasured endpoints are tried first
+        self.error_rate = 0.0
+        self.consecutive_errors = 0
+        self.failing_until = 0.0
+
+    async def request(self, method: str, *params):
+        """Raw JSON-RPC request on the client's HTTP session, returns the decoded result"""
+        response = await self.client._provider.session.post(
+            self.url,
+            content=orjson.dumps({"jsonrpc": "2.0", "id": 1, "method": method, "params": params}),
+            headers={"Content-Type": "application/json"},
+        )
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        if "error" in data:
+            raise Exception(f"{method} failed: {data['error']}")
+        return data["result"]
+
+    def score(self) -> float:
+        """Lower is healthier, endpoints cooling down after repeated errors come last"""
+        if time.monotonic() < self.failing_until:
+            return float("inf")
+        return (self.avg_latency or 0.0) * (1 + 10 * self.error_rate)
+
+    def record(self, seconds: float, ok: bool) -> None:
+        self.requests += 1
+        self.error_rate += self.smoothing * ((0.0 if ok else 1.0) - self.error_rate)
+        if ok:
+            if self.avg_latency is None:
+                self.avg_latency = seconds
+            self.avg_latency += self.smoothing * (seconds - self.avg_latency)
+            self.latency.observe(seconds)
+            self.consecutive_errors = 0
+            return
+        self.errors += 1
+        self.consecutive_errors += 1
+        if self.consecutive_errors >= self.max_consecutive_errors:
+            self.failing_until = time.monotonic() + self.cooldown
+
+    def summary(self) -> str:
+        return (
+            f"{self.latency.summary()} requests={self.requests} errors={self.errors} score={self.score():.3f}, "
+            f"{self.limiter.summary()}"
+        )
+
+
+class RpcPool:
+    """
+    Drop-in replacement of solana-py's AsyncClient spread over several endpoints.
+
+    Reads (get_* methods and is_connected) go to the healthiest endpoint with rate limit capacity left, the one
+    with the lowest latency moving average weighted by its error rate, and are retried on the next best endpoint
+    if they fail, up to max_attempts endpoints. Everything else, sending transactions in particular, goes to the
+    primary endpoint only, the first one, and is not retried.
+
+    Every endpoint has a PriorityLimiter. Sends, confirmations and blockhashes use the send lane, other requests
+    the lane set with priority_limiter.rpc_priority (user by default), and cost METHOD_COSTS tokens.
+    request() makes raw JSON-RPC reads the same way, for parameters solana-py does not expose.
+    """
+
+    def __init__(self, endpoints: list, max_attempts: int = 3, report_interval: float = 300):
+        self.endpoints = endpoints
+        self.primary = endpoints[0]
+        self.max_attempts = max_attempts
+        self.report_interval = report_interval
+        self._reported_at = time.monotonic()
+
+    @classmethod
+    def from_urls(cls, urls: list, max_requests_per_second: float, **kwargs) -> "RpcPool":
+        """urls are "<url>" or "<url> <max requests per second>", max_requests_per_second applies to the others"""
+        endpoints = []
+        for spec in urls:
+            url, _, rps = spec.strip().partition(" ")
+            endpoints.append(RpcEndpoint(url, float(rps) if rps.strip() else max_requests_per_second, **kwargs))
+        return cls(endpoints)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        for endpoint in self.endpoints:
+            await endpoint.client.close()
+
+    def ranked(self, cost: float = 1, lane: int = None) -> list:
+        return sorted(
+            self.endpoints, key=lambda endpoint: (not endpoint.limiter.has_capacity(cost, lane), endpoint.score())
+        )
+
+    def summary(self) -> str:
+        return ", ".join(endpoint.summary() for endpoint in self.endpoints)
+
+    @staticmethod
+    def _lane(name: str) -> int:
+        return SEND if name in SEND_METHODS else current_lane.get()
+
+    async def _call(self, endpoint: RpcEndpoint, name: str, args, kwargs):
+        await endpoint.limiter.acquire(METHOD_COSTS.get(name, 1), self._lane(name))
+        started = time.perf_counter()
+        try:
+            if hasattr(endpoint.client, name):
+                result = await getattr(endpoint.client, name)(*args, **kwargs)
+            else:
+                result = await endpoint.request(name, *args)
+        except Exception:
+            endpoint.record(time.perf_counter() - started, ok=False)
+            raise
+        endpoint.record(time.perf_counter() - started, ok=True)
+        if time.monotonic() - self._reported_at > self.report_interval:
+            self._reported_at = time.monotonic()
+            logger.info(f"RPC endpoints: {self.summary()}")
+        return result
+
+    async def read(self, name: str, *args, **kwargs):
+        error = None
+        for endpoint in self.ranked(METHOD_COSTS.get(name, 1), self._lane(name))[: self.max_attempts]:
+            try:
+                return await self._call(endpoint, name, args, kwargs)
+            except Exception as e:
+                error = e
+                logger.warning(f"{name} failed on {endpoint.url}: {e!r}")
+        raise error
+
+    async def request(self, method: str, *params):
+        """Raw JSON-RPC read, method being the JSON-RPC name such as getBlock, returns the decoded result"""
+        return await self.read(method, *params)
+
+    async def is_connected(self):
+        return await self.read("is_connected")
+
+    def __getattr__(self, name):
+        original_attr = getattr(self.primary.client, name)
+        if not callable(original_attr):
+            return original_attr
+        if name.startswith("get_"):
+
+            async def read(*args, **kwargs):
+                return await self.read(name, *args, **kwargs)
+
+            return read
+
+        async def call(*args, **kwargs):
+            return await self._call(self.primary, name, args, kwargs)
+
+        return call
@@ -0,0 +1,113 @@
+import os
+from typing import Tuple
+
+from solders.compute_budget import set_compute_unit_limit
+from solders.compute_budget import set_compute_unit_price
+from solders.hash import Hash
+from solders.instruction import AccountMeta
+from solders.instruction import Instruction
+from solders.keypair import Keypair
+from solders.message import MessageV0
+from solders.message import to_bytes_versioned
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.system_program import transfer
+from solders.system_program import TransferParams
+from spl.token.instructions import create_associated_token_account
+from spl.token.instructions import get_associated_token_address
+
+from celeritas.config import config
+from celeritas.constants import LAMPORTS_PER_SOL
+from celeritas.transact_utils import build_pump_fun_snipe_instruction
+
+COMPUTE_UNIT_LIMIT = 200_000
+
+
+class SnipeTemplate:
+    """
+    Snipe transaction of one sniping setup compiled ahead of time.
+
+    The message is compiled once with placeholder keys for the mint, its bonding curve accounts and the associated
+    token account. A snipe copies the serialized message, writes the real keys and the blockhash over the
+    placeholders and signs it, no instruction is built and no message compiled on the hot path.
+
+    Compiling groups keys by signer and writable flags and sorts them by pubkey within each group, so the patched
+    keys are no longer sorted. The runtime only requires the grouping, which depends on the flags of the accounts,
+    the same for every mint. Instructions refer to keys by index and a patched key keeps the index of its
+    placeholder, which is fixed once compiled. The constructor checks that every key placeholder sits in its own
+    slot of the compiled key table.
+    """
+
+    def __init__(self, keypair: Keypair, setup: dict, referrer=None, platform_fee_pubkey: str = config.platform_fee_pubkey):
+        self.keypair = keypair
+        self.owner = keypair.pubkey()
+        self.setup = setup
+        self.fee = (0.9 if referrer else 1) * 0.01 * (setup["min_sol_cost"] + setup["max_sol_cost"]) / 2
+        compute_unit_price = int(setup["priority_fee"] * 10**15 / COMPUTE_UNIT_LIMIT)  # In microlamports
+
+        # Random placeholders, so each occurs exactly once in the message
+        mint, bonding_curve, associated_bonding_curve, token_account = (Pubkey(os.urandom(32)) for _ in range(4))
+        blockhash = Hash(os.urandom(32))
+        create_token_account = create_associated_token_account(self.owner, self.owner, mint)
+        accounts = list(create_token_account.accounts)
+        accounts[1] = AccountMeta(token_account, is_signer=False, is_writable=True)
+        ixs = [
+            set_compute_unit_price(compute_unit_price),
+            set_compute_unit_limit(COMPUTE_UNIT_LIMIT),
+            Instruction(create_token_account.program_id, create_token_account.data, accounts),
+            build_pump_fun_snipe_instruction(
+                setup["max_sol_cost"],
+                setup["amount"],
+                mint,
+                self.owner,
+                token_account,
+                bonding_curve,
+                associated_bonding_curve,
+            ),
+        ]
+        if platform_fee_pubkey and self.fee:
+            ixs.append(
+                transfer(
+                    TransferParams(
+                        from_pubkey=self.owner,
+                        to_pubkey=Pubkey.from_string(platform_fee_pubkey),
+                        lamports=int(self.fee * LAMPORTS_PER_SOL),
+                    )
+                )
+            )
+        message = MessageV0.try_compile(self.owner, ixs, [], blockhash)
+        self._message = to_bytes_versioned(message)
+        self._offsets = [
+            self._offset(placeholder)
+            for placeholder in (mint, bonding_curve, associated_bonding_curve, token_account, blockhash)
+        ]
+        # The key table starts with the fee payer
+        keys_offset = self._offset(self.owner)
+        for placeholder, offset in zip((mint, bonding_curve, associated_bonding_curve, token_account), self._offsets):
+            if offset != keys_offset + 32 * message.account_keys.index(placeholder):
+                raise Exception("Snipe template placeholder is not a slot of the key table")
+
+    def _offset(self, placeholder) -> int:
+        placeholder = bytes(placeholder)
+        offset = self._message.find(placeholder)
+        if offset < 0 or self._message.find(placeholder, offset + 1) >= 0:
+            raise Exception("Snipe template placeholder not found exactly once")
+        return offset
+
+    def sign(self, mint: str, bonding_curve: str, associated_bonding_curve: str, blockhash: Hash) -> Tuple[Signature, bytes]:
+        """Signature and serialized transaction sniping mint"""
+        mint = Pubkey.from_string(mint)
+        token_account = get_associated_token_address(self.owner, mint)
+        values = (
+            mint,
+            Pubkey.from_string(bonding_curve),
+            Pubkey.from_string(associated_bonding_curve),
+            token_account,
+            blockhash,
+        )
+        message = bytearray(self._message)
+        for offset, value in zip(self._offsets, values):
+            message[offset : offset + 32] = bytes(value)
+        message = bytes(message)
+        signature = self.keypair.sign_message(message)
+        return signature, b"\x01" + bytes(signature) + message
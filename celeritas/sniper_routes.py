@@ -0,0 +1,154 @@
+import asyncio
+import logging
+from typing import List, NamedTuple
+
+from pymongo.errors import OperationFailure
+from pymongo.errors import PyMongoError
+from solders.keypair import Keypair
+
+from celeritas.db import user_db
+from celeritas.pending_signatures import CHANGE_STREAMS_UNSUPPORTED
+from celeritas.snipe_templates import SnipeTemplate
+
+logger = logging.getLogger(__name__)
+
+# Fields of a user document read when sniping, any update to them reloads the user's routes
+ROUTE_FIELDS = ("wallet_public", "wallet_secret", "referrer", "sniping")
+ROUTE_PROJECTION = {field: 1 for field in ROUTE_FIELDS}
+
+
+class SnipeRoute(NamedTuple):
+    user: dict  # _id, wallet_public and referrer
+    setup: dict
+    keypair: Keypair
+    template: SnipeTemplate
+
+
+class SniperRoutes:
+    """
+    In-memory routing table of followed creator wallet -> sniping setups following it, so a launch is sniped
+    without any database round trip. Every setup comes with its parsed keypair and compiled SnipeTemplate.
+
+    The table is loaded once and kept up to date by a change stream on the users collection, only a user whose
+    sniping setups or wallet changed is reloaded. Servers without change streams (standalone mongod) fall back to
+    reloading the table every poll_interval seconds.
+    """
+
+    def __init__(self, poll_interval: float = 10):
+        self.poll_interval = poll_interval
+        self.routes = {}  # creator wallet -> [SnipeRoute]
+        self._user_wallets = {}  # user _id -> creator wallets routed to the user
+        self._keypairs = {}  # wallet_secret -> Keypair, parsed once
+        self.change_stream = False
+        self._task = None
+
+    async def start(self) -> None:
+        await self.load()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def __contains__(self, wallet: str) -> bool:
+        return wallet in self.routes
+
+    def get(self, wallet: str) -> List[SnipeRoute]:
+        return self.routes.get(wallet, [])
+
+    async def load(self) -> None:
+        routes, user_wallets, keypairs = {}, {}, {}
+        async for user in user_db.users.find({"sniping.wallet": {"$type": "string"}}, ROUTE_PROJECTION):
+            for wallet, route in self._user_routes(user, keypairs):
+                routes.setdefault(wallet, []).append(route)
+                user_wallets.setdefault(user["_id"], set()).add(wallet)
+        self.routes, self._user_wallets, self._keypairs = routes, user_wallets, keypairs
+        logger.info(f"Loaded sniper routes for {len(self.routes)} wallets.")
+
+    def _user_routes(self, user: dict, keypairs: dict) -> list:
+        setups = [setup for setup in user.get("sniping") or [] if setup.get("wallet")]
+        if not setups or not user.get("wallet_secret"):
+            return []
+        secret = user["wallet_secret"]
+        if secret not in keypairs:
+            keypairs[secret] = self._keypairs.get(secret) or Keypair.from_base58_string(secret)
+        route_user = {"_id": user["_id"], "wallet_public": user.get("wallet_public"), "referrer": user.get("referrer")}
+        routes = []
+        for setup in setups:
+            try:
+                template = SnipeTemplate(keypairs[secret], setup, route_user["referrer"])
+            except Exception as e:
+                logger.error(f'Invalid sniping setup {setup["wallet"]} of user {user["_id"]}: {e}')
+                continue
+            routes.append((setup["wallet"], SnipeRoute(route_user, setup, keypairs[secret], template)))
+        return routes
+
+    def _remove_user(self, user_id) -> None:
+        for wallet in self._user_wallets.pop(user_id, ()):
+            routes = [route for route in self.routes.get(wallet, []) if route.user["_id"] != user_id]
+            if routes:
+                self.routes[wallet] = routes
+            else:
+                self.routes.pop(wallet, None)
+
+    def _set_user(self, user_id, user: dict) -> None:
+        self._remove_user(user_id)
+        if user is None:
+            return
+        for wallet, route in self._user_routes(user, self._keypairs):
+            self.routes.setdefault(wallet, []).append(route)
+            self._user_wallets.setdefault(user_id, set()).add(wallet)
+
+    @staticmethod
+    def _changes_routes(change: dict) -> bool:
+        if change["operationType"] != "update":
+            return True
+        description = change["updateDescription"]
+        fields = list(description.get("updatedFields", {})) + description.get("removedFields", [])
+        return any(field.split(".", 1)[0] in ROUTE_FIELDS for field in fields)
+
+    async def _watch(self) -> None:
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}}]
+        async with user_db.users.watch(pipeline) as stream:
+            self.change_stream = True
+            # Changes before the stream was opened were not seen, reload once it is open
+            await self.load()
+            logger.info("Following sniper routes with a change stream.")
+            async for change in stream:
+                if not self._changes_routes(change):
+                    continue
+                user_id = change["documentKey"]["_id"]
+                if change["operationType"] == "delete":
+                    user = None
+                elif change["operationType"] == "update":
+                    user = await user_db.users.find_one({"_id": user_id}, ROUTE_PROJECTION)
+                else:
+                    user = change["fullDocument"]
+                self._set_user(user_id, user)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._watch()
+            except OperationFailure as e:
+                self.change_stream = False
+                if e.code in CHANGE_STREAMS_UNSUPPORTED:
+                    logger.info("Change streams not supported, reloading sniper routes periodically.")
+                    break
+                logger.error(f"Sniper routes change stream failed, reopening: {e}")
+                await asyncio.sleep(1)
+            except PyMongoError as e:
+                self.change_stream = False
+                logger.error(f"Sniper routes change stream failed, reopening: {e}")
+                await asyncio.sleep(1)
+
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.load()
+            except PyMongoError as e:
+                logger.error(f"Reloading sniper routes failed: {e}")
+
+
+sniper_routes = SniperRoutes()
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, List
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+PriceSource = Callable[[aiohttp.ClientSession], Awaitable[float]]
+
+
+async def coinmarketcap_source(session: aiohttp.ClientSession) -> float:
+    """Average SOL/USD price over the top spot market pairs listed on CoinMarketCap"""
+    url = "https://api.coinmarketcap.com/data-api/v3/cryptocurrency/market-pairs/latest?slug=solana&start=1&limit=10&category=spot&centerType=all&sort=cmc_rank_advanced&direction=desc&spotUntracked=true"
+    async with session.get(url) as response:
+        response.raise_for_status()
+        prices = [p["price"] for p in (await response.json())["data"]["marketPairs"]]
+    return sum(prices) / len(prices)
+
+
+async def coingecko_source(session: aiohttp.ClientSession) -> float:
+    async with session.get("https://api.coingecko.com/api/v3/simple/price?ids=solana&vs_currencies=usd") as response:
+        response.raise_for_status()
+        return float((await response.json())["solana"]["usd"])
+
+
+async def binance_source(session: aiohttp.ClientSession) -> float:
+    async with session.get("https://api.binance.com/api/v3/ticker/price?symbol=SOLUSDT") as response:
+        response.raise_for_status()
+        return float((await response.json())["price"])
+
+
+def static_source(price: float) -> PriceSource:
+    """Local source always returning price, for tests and offline runs"""
+
+    async def source(session: aiohttp.ClientSession) -> float:
+        return price
+
+    return source
+
+
+class SolPriceService:
+    """
+    Keeps the SOL/USD price in memory, readers never wait for I/O.
+
+    A background task refreshes the price every refresh_interval seconds. Sources are tried in order until one
+    returns a valid price. Concurrent refreshes share a single in-flight request.
+    """
+
+    def __init__(
+        self,
+        sources: List[PriceSource] = None,
+        refresh_interval: float = 60,
+        max_age: float = 120,
+        timeout: float = 5,
+    ):
+        self.sources = sources or [coinmarketcap_source, coingecko_source, binance_source]
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.timeout = timeout
+        self.price = None
+        self.timestamp = 0.0
+        self._refresh_task = None
+        self._background_task = None
+
+    async def start(self) -> None:
+        """Fetches the first price and starts the background refresh, has to be awaited on the process event loop"""
+        if self._background_task:
+            return
+        await self.refresh()
+        self._background_task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self) -> None:
+        if self._background_task:
+            self._background_task.cancel()
+            self._background_task = None
+
+    def value(self) -> float:
+        """Latest price, a stale price schedules a refresh but is still returned"""
+        if self.price is None:
+            raise Exception("Failed to retreive a new SOL/USD price")
+        if time.time() - self.timestamp > self.max_age:
+            try:
+                self._schedule_refresh()
+            except RuntimeError:  # No running event loop to refresh on
+                pass
+        return self.price
+
+    async def get(self) -> float:
+        """Latest price, waits for a refresh if it is stale"""
+        if self.price is None or time.time() - self.timestamp > self.max_age:
+            await self.refresh()
+        return self.value()
+
+    async def refresh(self) -> float:
+        """Fetches a new price, callers arriving while a refresh is running wait for that one"""
+        return await asyncio.shield(self._schedule_refresh())
+
+    def _schedule_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.get_running_loop().create_task(self._fetch())
+        return self._refresh_task
+
+    async def _fetch(self) -> float:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
+            for source in self.sources:
+                try:
+                    price = await source(session)
+                except Exception as e:
+                    logger.warning(f"SOL/USD price source {getattr(source, '__name__', source)} failed: {e}")
+                    continue
+                if price and price > 0:
+                    self.price, self.timestamp = price, time.time()
+                    return price
+        logger.error("All SOL/USD price sources failed, keeping the last price.")
+        return self.price
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"SOL/USD price refresh failed: {e}")
+
+
+sol_price_service = SolPriceService()
@@ -12,7 +12,11 @@ from telegram.ext import (
     ConversationHandler,
     filters
 )
+from celeritas.blockhash import blockhash_service
+from celeritas.db import init_db
 from celeritas.db import user_db
+from celeritas.jupiter_tokens import jupiter_tokens
+from celeritas.sol_price import sol_price_service
 from celeritas.user import User
 from celeritas.config import config
 from celeritas.constants import LAMPORTS_PER_SOL
@@ -97,20 +101,20 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     name = update.effective_user.name
     full_name = update.effective_user.full_name
     new = False
+    user = await user_db.get_user(user_id)
     # Add a new user
-    if not user_db.user_exists(user_id):
+    if user is None:
         user = User(id=user_id, name=name, full_name=full_name)
         if context.args and len(context.args) > 0:
             try:
                 referrer_id = int(context.args[0])
                 logger.info(f"should not be here {referrer_id}")
-                if user_db.user_exists(referrer_id):
-                    user.referrer = referrer_id
-                    n = user_db.get_attribute(referrer_id, "users_referred") + 1
-                    user_db.update_attribute(referrer_id, "users_referred", n)
+                # Raises ValueError if the referrer is not in db
+                await user_db.increment_attribute(referrer_id, "users_referred", 1)
+                user.referrer = referrer_id
             except ValueError:
                 pass
-        user_db.add_user(user)
+        await user_db.add_user(user)
         new = True
         # Inform admin about new user
         await context.bot.send_message(
@@ -118,8 +122,6 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
             f"<u><b>New user detected</b></u>\n<code>{user.id}</code>\n<code>{user.name}</code>\n<code>{user.full_name}</code>",
             parse_mode='HTML'
         )
-    else:
-        user = user_db.get_user(user_id)
 
     message_text, reply_markup = await generate_start_message(user, new)
 
@@ -138,8 +140,8 @@ async def refresh(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
     await query.answer()
     user_id = update.effective_user.id
-    user_db.update_sol_balance(user_id)
-    user = user_db.get_user(user_id)
+    await user_db.update_sol_balance(user_id)
+    user = await user_db.get_user(user_id)
     message_text, reply_markup = await generate_start_message(user)
 
     await query.edit_message_text(
@@ -228,7 +230,7 @@ async def referrals(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     if query: await query.answer()
     
     user_id = update.effective_user.id
-    user = user_db.get_user(user_id)
+    user = await user_db.get_user(user_id)
     referral_link = f"t.me/{context.bot.username}?start={user_id}"
 
     text = (
@@ -279,7 +281,7 @@ async def get_referral_payouts(update: Update, context: ContextTypes.DEFAULT_TYP
     users = user_db.users.find()
     referral_payouts = []
     
-    for user in users:
+    async for user in users:
         available_fees = user["trading_fees_earned"] - user["trading_fees_paid_out"]
         if available_fees >= 0.005:
             referral_payouts.append(
@@ -293,7 +295,7 @@ async def get_referral_payouts(update: Update, context: ContextTypes.DEFAULT_TYP
     # Update only the eligible users in bulk
     if context.args and context.args[0] == 'no_test':
         logger.info(f"Referral amounts updated for users. ({update.effective_chat.id})")
-        user_db.users.update_many(
+        await user_db.users.update_many(
             {"_id": {"$in": [payout['user_id'] for payout in referral_payouts]}},
             [{"$set": {"trading_fees_paid_out": "$trading_fees_earned"}}]
         )
@@ -314,7 +316,7 @@ async def get_referral_payouts(update: Update, context: ContextTypes.DEFAULT_TYP
 
 
 async def get_revenue_report(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    total_revenue = sum(user["revenue"] for user in user_db.users.find())
+    total_revenue = sum([user["revenue"] async for user in user_db.users.find({}, {"revenue": 1})])
     text = (
         "<u><b>Total revenue earned</b></u>\n"
         f"<code>{nfpf(total_revenue)} SOL (${nfpf(total_revenue*sol_dollar_value())})</code>"
@@ -327,12 +329,20 @@ async def get_revenue_report(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
     logger.info(f"Revenue report sent to admin. ({update.effective_chat.id})")
 
+async def post_init(application: Application) -> None:
+    await init_db()
+    await sol_price_service.start()
+    await blockhash_service.start()
+    await jupiter_tokens.start()
+
+
 def main() -> None:
     """Run the bot."""
     application = (
         Application.builder()
         .token(config.telegram_bot_token)
         .concurrent_updates(UserSequentialUpdateProcessor(10))
+        .post_init(post_init)
         .build()
     )
 
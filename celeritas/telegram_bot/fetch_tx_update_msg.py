@@ -1,29 +1,36 @@
 import asyncio
+import logging
 from datetime import datetime
 
-from solana.rpc.async_api import AsyncClient
 from solders.pubkey import Pubkey
 from solders.signature import Signature
 from telegram.ext import ContextTypes
 
 from celeritas.config import config
+from celeritas.confirmations import confirmation_service
+from celeritas.constants import aclient
 from celeritas.constants import LAMPORTS_PER_SOL
-from celeritas.constants import RPC_URL
+from celeritas.db import trade_db
 from celeritas.db import user_db
 from celeritas.telegram_bot.utils import nice_float_price_format as nfpf
 from celeritas.telegram_bot.utils import sol_dollar_value
 
+logger = logging.getLogger(__name__)
+
 try:
     PLATFORM_FEE_PUBKEY = Pubkey.from_string(config.platform_fee_pubkey)
 except:
     raise Exception("Missing platform fee pubkey!")
 
 
+# Seconds a transaction is awaited before the user is told it could not be confirmed
+CONFIRMATION_TIMEOUT = 90
+# Running message updates, tasks are only weakly referenced by the loop
+_updates = set()
+
+
 async def fetch_transaction(tx_signature: Signature) -> dict:
-    async with AsyncClient(RPC_URL) as client:
-        return await client.get_transaction(
-            tx_signature, commitment="confirmed", max_supported_transaction_version=0
-        )
+    return await aclient.get_transaction(tx_signature, commitment="confirmed", max_supported_transaction_version=0)
 
 
 def parse_transaction_data(tx: dict, user_pubkey: Pubkey, mint: str) -> dict:
@@ -57,6 +64,7 @@ def parse_transaction_data(tx: dict, user_pubkey: Pubkey, mint: str) -> dict:
     fee_paid = (lambda x: x[1] - x[0])(sol_balance_change.get(PLATFORM_FEE_PUBKEY, (0, 0)))
 
     return {
+        "tx_signature": str(tx.value.transaction.transaction.signatures[0]),
         "timestamp": tx.value.block_time,
         "mint": mint,
         "pre_sol_balance": pre_sol_balance / LAMPORTS_PER_SOL,
@@ -68,15 +76,16 @@ def parse_transaction_data(tx: dict, user_pubkey: Pubkey, mint: str) -> dict:
     }
 
 
-def update_fees(user_id, base_fee, depth):
+async def update_fees(user_id, base_fee, depth):
     if not user_id or depth > 4:
         return
-    user = user_db.get_user(user_id)
-    if not user:
+    try:
+        user = await user_db.get_attributes(user_id, "referral_share", "referrer")
+    except ValueError:
         return
-    fee_for_trade = user.referral_share[depth] * base_fee
-    user_db.update_attribute(user_id, "trading_fees_earned", user.trading_fees_earned + fee_for_trade)
-    update_fees(user.referrer, base_fee, depth + 1)
+    fee_for_trade = user["referral_share"][depth] * base_fee
+    await user_db.increment_attribute(user_id, "trading_fees_earned", fee_for_trade)
+    await update_fees(user["referrer"], base_fee, depth + 1)
 
 
 def generate_success_message(tx_signature: str, tx_data: dict) -> str:
@@ -108,72 +117,66 @@ def generate_tx_invalid_message(tx_signature: str) -> str:
     )
 
 
-async def check_transaction(
-    context: ContextTypes.DEFAULT_TYPE,
-    attempt: int,
-    chat_id,
-    message_id,
-    user_id,
-    tx_signature,
-    mint,
-    user_pubkey,
-) -> bool:
-    user_pubkey = Pubkey.from_string(user_pubkey)
-    tx = await fetch_transaction(tx_signature)
-
-    if tx.value and not tx.value.transaction.meta.err:
-        # Append the transaction details to the user's transaction history
-        user = user_db.get_user(user_id)
-        tx_data = parse_transaction_data(tx, user_pubkey, mint)
-
-        # Check if this transaction is already in the user's transactions
-        if not any(t["timestamp"] == tx.value.block_time for t in user.transactions):
-            user.transactions.append(tx_data)
-            user.revenue += tx_data["fee_paid"]
-            user_db.update_attribute(user_id, "revenue", user.revenue)
-            user_db.update_attribute(user_id, "transactions", user.transactions)
-            update_fees(user.referrer, tx_data["fee_paid"], 0)
-
-        await context.bot.edit_message_text(
-            chat_id=chat_id,
-            message_id=message_id,
-            text=generate_success_message(str(tx_signature), tx_data),
-            parse_mode="HTML",
-            disable_web_page_preview=True,
-        )
-        return True
-    elif tx.value.transaction.meta.err:
-        await context.bot.edit_message_text(
-            chat_id=chat_id,
-            message_id=message_id,
-            text=generate_tx_invalid_message(str(tx_signature)),
-            parse_mode="HTML",
-            disable_web_page_preview=True,
-        )
-        return True
-    elif attempt < 4:
-        return False
-    else:  # If it's the last attempt and still not successful, send a failure message
-        new_text = generate_failure_message(str(tx_signature))
-        await context.bot.edit_message_text(
-            chat_id=chat_id,
-            message_id=message_id,
-            text=new_text,
-            parse_mode="HTML",
-            disable_web_page_preview=True,
-        )
-        return True
+def generate_withdrawal_confirmed_message(tx_signature: str) -> str:
+    return (
+        "✅ <b>Withdrawal confirmed!</b>\n\n"
+        f"🔍 Tx details: <a href='https://solscan.io/tx/{tx_signature}'>View on Solscan</a>"
+    )
+
 
+async def edit_message(bot, chat_id, message_id, text: str) -> None:
+    await bot.edit_message_text(
+        chat_id=chat_id,
+        message_id=message_id,
+        text=text,
+        parse_mode="HTML",
+        disable_web_page_preview=True,
+    )
 
-async def update_transaction_message(context: ContextTypes.DEFAULT_TYPE) -> None:
-    for attempt, delay in enumerate([10, 20, 30, 60], start=1):
+
+async def update_transaction_message(bot, chat_id, message_id, user_id, tx_signature, mint, user_pubkey) -> None:
+    status = await confirmation_service.wait(tx_signature, timeout=CONFIRMATION_TIMEOUT)
+    if status is None:
+        await edit_message(bot, chat_id, message_id, generate_failure_message(str(tx_signature)))
+        return
+    if status["err"]:
+        await edit_message(bot, chat_id, message_id, generate_tx_invalid_message(str(tx_signature)))
+        return
+
+    # The transaction is fetched once confirmed, nodes can take a moment to serve it
+    for delay in (0, 0.5, 1, 2, 4):
         await asyncio.sleep(delay)
-        chat_id, message_id, user_id, tx_signature, mint, user_pubkey = context.job.data
-        success = await check_transaction(
-            context, attempt, chat_id, message_id, user_id, tx_signature, mint, user_pubkey
-        )
-        if success:
+        tx = await fetch_transaction(tx_signature)
+        if tx.value:
             break
+    else:
+        await edit_message(bot, chat_id, message_id, generate_failure_message(str(tx_signature)))
+        return
+
+    tx_data = parse_transaction_data(tx, Pubkey.from_string(user_pubkey), mint)
+    # The unique tx_signature index rejects trades the tx listener already recorded
+    if await trade_db.insert_trade(user_id, tx_data):
+        await user_db.increment_attribute(user_id, "revenue", tx_data["fee_paid"])
+        await update_fees(await user_db.get_attribute(user_id, "referrer"), tx_data["fee_paid"], 0)
+    await edit_message(bot, chat_id, message_id, generate_success_message(str(tx_signature), tx_data))
+
+
+async def _run_update(update, bot, chat_id, message_id, tx_signature) -> None:
+    """Awaits a message update, on error the user is told the transaction could not be confirmed instead of pending"""
+    try:
+        await update
+    except Exception:
+        logger.exception(f"Failed updating the message of transaction {tx_signature}")
+        try:
+            await edit_message(bot, chat_id, message_id, generate_failure_message(str(tx_signature)))
+        except Exception as e:
+            logger.error(f"Failed editing the message of transaction {tx_signature}: {e}")
+
+
+def _start_update(update, bot, chat_id, message_id, tx_signature) -> None:
+    task = asyncio.create_task(_run_update(update, bot, chat_id, message_id, tx_signature))
+    _updates.add(task)
+    task.add_done_callback(_updates.discard)
 
 
 async def schedule_tx_update(
@@ -185,9 +188,23 @@ async def schedule_tx_update(
     mint: str,
     user_pubkey: str,
 ) -> None:
-    context.job_queue.run_once(
-        update_transaction_message,
-        when=1,  # Start almost immediately
-        data=(chat_id, message_id, user_id, tx_signature, mint, user_pubkey),
-        name=f"tx_update_{tx_signature}",
-    )
+    """Edits the message once the transaction is confirmed, failed or timed out"""
+    update = update_transaction_message(context.bot, chat_id, message_id, user_id, tx_signature, mint, user_pubkey)
+    _start_update(update, context.bot, chat_id, message_id, tx_signature)
+
+
+async def update_withdrawal_message(bot, chat_id, message_id, tx_signature) -> None:
+    status = await confirmation_service.wait(tx_signature, timeout=CONFIRMATION_TIMEOUT)
+    if status is None:
+        text = generate_failure_message(str(tx_signature))
+    elif status["err"]:
+        text = generate_tx_invalid_message(str(tx_signature))
+    else:
+        text = generate_withdrawal_confirmed_message(str(tx_signature))
+    await edit_message(bot, chat_id, message_id, text)
+
+
+async def schedule_withdrawal_update(context: ContextTypes.DEFAULT_TYPE, chat_id: int, message_id: int, tx_signature) -> None:
+    """Edits the message once the withdrawal is confirmed, failed or timed out, no trade is recorded"""
+    update = update_withdrawal_message(context.bot, chat_id, message_id, tx_signature)
+    _start_update(update, context.bot, chat_id, message_id, tx_signature)
@@ -68,7 +68,7 @@ def auto_buy_text():
 
 async def auto_buy(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_id = update.effective_user.id
-    user_settings = user_db.get_user_settings(user_id)
+    user_settings = await user_db.get_user_settings(user_id)
     query = update.callback_query
     await query.answer()
     reply_markup = generate_auto_buy_keyboard(user_settings)
@@ -86,9 +86,7 @@ async def auto_buy_change(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     query = update.callback_query
     await query.answer()
     # Get current settings, update value, write to user_db
-    user_settings = user_db.update_user_settings(
-        user_id, "autobuy", not user_db.get_user_settings(user_id).autobuy
-    )
+    user_settings = await user_db.toggle_user_setting(user_id, "autobuy")
     # Edit keyboard to reflect changed settings
     reply_markup = generate_auto_buy_keyboard(user_settings)
     await query.edit_message_text(text=auto_buy_text(), reply_markup=reply_markup, parse_mode="HTML")
@@ -108,7 +106,7 @@ async def auto_buy_amount_input(update: Update, context: ContextTypes.DEFAULT_TY
     chat_id = update.effective_chat.id
     try:
         buy_amount = max(0.002, float(update.message.text))
-        user_settings = user_db.update_user_settings(user_id, "autobuy_amount", buy_amount)
+        user_settings = await user_db.update_user_settings(user_id, "autobuy_amount", buy_amount)
         reply_markup = generate_auto_buy_keyboard(user_settings)
         # Delete the message where the user entered their buy amount
         await delete_messages(
@@ -151,7 +149,7 @@ async def auto_buy_slippage_input(update: Update, context: ContextTypes.DEFAULT_
     try:
         slippage = float(update.message.text.replace("%", ""))
         slippage = int(max(1, slippage))
-        user_settings = user_db.update_user_settings(user_id, "autobuy_slippage", slippage)
+        user_settings = await user_db.update_user_settings(user_id, "autobuy_slippage", slippage)
         reply_markup = generate_auto_buy_keyboard(user_settings)
         await delete_messages(
             context,
@@ -73,7 +73,7 @@ def generate_auto_sell_keyboard(user_settings):
 
 async def auto_sell(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_id = update.effective_user.id
-    user_settings = user_db.get_user_settings(user_id)
+    user_settings = await user_db.get_user_settings(user_id)
     query = update.callback_query
     await query.answer()
     reply_markup = generate_auto_sell_keyboard(user_settings)
@@ -89,9 +89,7 @@ async def auto_sell_change(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     query = update.callback_query
     await query.answer()
     # Get current settings, update value, write to user_db
-    user_settings = user_db.update_user_settings(
-        user_id, "autosell", not user_db.get_user_settings(user_id).autosell
-    )
+    user_settings = await user_db.toggle_user_setting(user_id, "autosell")
     # Edit keyboard to reflect changed settings
     reply_markup = generate_auto_sell_keyboard(user_settings)
     await query.edit_message_text(text="Auto Sell Settings", reply_markup=reply_markup)
@@ -103,9 +101,9 @@ async def auto_sell_add_order(update: Update, context: ContextTypes.DEFAULT_TYPE
     query = update.callback_query
     await query.answer()
     # Get current settings, update value, write to user_db
-    user_settings = user_db.get_user_settings(user_id)
+    user_settings = await user_db.get_user_settings(user_id)
     user_settings.autosell_targets.append([None, None])
-    user_db.update_user_settings(user_id, "autosell_targets", user_settings.autosell_targets)
+    await user_db.update_user_settings(user_id, "autosell_targets", user_settings.autosell_targets)
     # Edit keyboard to reflect changed settings
     reply_markup = generate_auto_sell_keyboard(user_settings)
     await query.edit_message_text(text="Auto Sell Settings", reply_markup=reply_markup)
@@ -130,9 +128,9 @@ async def auto_sell_target_input(update: Update, context: ContextTypes.DEFAULT_T
     target_index = context.user_data["target_index"]
     try:
         target_price = float(update.message.text.replace("%", ""))
-        user_settings = user_db.get_user_settings(user_id)
+        user_settings = await user_db.get_user_settings(user_id)
         user_settings.autosell_targets[target_index][0] = target_price if abs(target_price) > 0.01 else None
-        user_db.update_user_settings(user_id, "autosell_targets", user_settings.autosell_targets)
+        await user_db.update_user_settings(user_id, "autosell_targets", user_settings.autosell_targets)
         reply_markup = generate_auto_sell_keyboard(user_settings)
         await delete_messages(
             context,
@@ -173,11 +171,11 @@ async def auto_sell_amount_input(update: Update, context: ContextTypes.DEFAULT_T
     target_index = context.user_data["target_index"]
     try:
         amount_percentage = float(update.message.text.replace("%", ""))
-        user_settings = user_db.get_user_settings(user_id)
+        user_settings = await user_db.get_user_settings(user_id)
         user_settings.autosell_targets[target_index][1] = (
             amount_percentage if abs(amount_percentage) > 0.01 else None
         )
-        user_db.update_user_settings(user_id, "autosell_targets", user_settings.autosell_targets)
+        await user_db.update_user_settings(user_id, "autosell_targets", user_settings.autosell_targets)
         reply_markup = generate_auto_sell_keyboard(user_settings)
         await delete_messages(
             context,
@@ -215,7 +213,7 @@ async def auto_sell_slippage_input(update: Update, context: ContextTypes.DEFAULT
     chat_id = update.effective_chat.id
     try:
         slippage = float(update.message.text.replace("%", ""))
-        user_settings = user_db.update_user_settings(user_id, "autosell_slippage", slippage)
+        user_settings = await user_db.update_user_settings(user_id, "autosell_slippage", slippage)
         reply_markup = generate_auto_sell_keyboard(user_settings)
         await delete_messages(
             context,
@@ -78,7 +78,7 @@ async def generate_token_buy_keyboard(user, token, options) -> InlineKeyboardMar
 
 async def buy_token(update: Update, context: ContextTypes.DEFAULT_TYPE, new=False, token_mint=None) -> int:
     user_id = update.effective_user.id
-    user = user_db.get_user(user_id)
+    user = await user_db.get_user(user_id)
 
     # Handle callback query or text message
     if update.callback_query:
@@ -272,7 +272,7 @@ async def process_custom_input(update: Update, context: ContextTypes.DEFAULT_TYP
             amount = max(0.002, amount)
 
         token_mint = context.user_data["last_mint"]
-        user = user_db.get_user(user_id)
+        user = await user_db.get_user(user_id)
         token = await token_db.get_token(token_mint)
 
         context.user_data[f"buy_message_options_{token_mint}"][option] = amount
@@ -310,7 +310,7 @@ async def execute_buy(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
     query = update.callback_query
     await query.answer()
     user_id = update.effective_user.id
-    user = user_db.get_user(user_id)
+    user = await user_db.get_user(user_id)
 
     mint = context.user_data[query.message.message_id]
     options = context.user_data[f"buy_message_options_{mint}"]
@@ -379,7 +379,7 @@ async def execute_buy_order(
 async def process_buy(update: Update, context: ContextTypes.DEFAULT_TYPE, delete=True) -> int:
     query = update.callback_query
     user_id = update.effective_user.id
-    user = user_db.get_user(user_id)
+    user = await user_db.get_user(user_id)
 
     mint = context.user_data["last_mint"]
     options = context.user_data[f"buy_message_options_{mint}"]
@@ -441,7 +441,7 @@ async def handle_potential_mint(update: Update, context: ContextTypes.DEFAULT_TY
 
     if await is_token_mint(text):
         user_id = update.effective_user.id
-        user = user_db.get_user(user_id)
+        user = await user_db.get_user(user_id)
 
         if user.settings.autobuy:
             # Execute autobuy
@@ -89,7 +89,7 @@ def buy_settings_text():
 
 async def buy_settings(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_id = update.effective_user.id
-    user_settings = user_db.get_user_settings(user_id)
+    user_settings = await user_db.get_user_settings(user_id)
     query = update.callback_query
     await query.answer()
     reply_markup = generate_buy_settings_keyboard(user_settings)
@@ -118,9 +118,9 @@ async def buy_amount_input(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     target_index = context.user_data["target_index"]
     try:
         buy_amount = max(0.002, float(update.message.text))
-        user_settings = user_db.get_user_settings(user_id)
+        user_settings = await user_db.get_user_settings(user_id)
         user_settings.buy_amounts[target_index] = buy_amount
-        user_db.update_user_settings(user_id, "buy_amounts", user_settings.buy_amounts)
+        await user_db.update_user_settings(user_id, "buy_amounts", user_settings.buy_amounts)
         reply_markup = generate_buy_settings_keyboard(user_settings)
         # Delete the message where the user entered their buy amount
         await delete_messages(
@@ -161,7 +161,7 @@ async def buy_slippage_input(update: Update, context: ContextTypes.DEFAULT_TYPE)
     try:
         slippage = float(update.message.text.replace("%", ""))
         slippage = int(max(1, slippage))
-        user_settings = user_db.update_user_settings(user_id, "buy_slippage", slippage)
+        user_settings = await user_db.update_user_settings(user_id, "buy_slippage", slippage)
         reply_markup = generate_buy_settings_keyboard(user_settings)
         await delete_messages(
             context,
@@ -8,6 +8,7 @@ from telegram.ext import ConversationHandler
 from telegram.helpers import create_deep_linked_url
 
 from celeritas.db import token_db
+from celeritas.db import TOKEN_MENU_FIELDS
 from celeritas.db import user_db
 from celeritas.telegram_bot.callbacks import *
 from celeritas.telegram_bot.utils import sol_dollar_value
@@ -27,7 +28,7 @@ async def sell_token(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
     if query:
         await query.answer()
-    user_db.get_attribute(user_id, "wallet_public")
+    await user_db.get_attribute(user_id, "wallet_public")
     token = context.args[0].split("_")[1]
     print("can create sell menu for", token, user_id)
     # TODO: implement individual token sell menu
@@ -49,7 +50,7 @@ async def generate_sell_keyboard(user, page):
     tokens_by_amount = [t[0] for t in sorted(user.holdings.items(), key=lambda x: -x[1])]
     start = page * TOKENS_PER_PAGE
     end = start + TOKENS_PER_PAGE
-    tokens = token_db.get_tokens(tokens_by_amount[start:end])
+    tokens = await token_db.get_tokens(tokens_by_amount[start:end], fields=TOKEN_MENU_FIELDS)
     for i in range(start, min(end, len(tokens_by_amount)), 3):
         keyboard.append(
             [
@@ -84,12 +85,12 @@ async def sell_menu(update: Update, context: ContextTypes.DEFAULT_TYPE, page=0,
     query = update.callback_query
     if query:
         await query.answer()
-    user = user_db.get_user(user_id)
+    user = await user_db.get_user(user_id)
     reply_markup = await generate_sell_keyboard(user, page)
     tokens_by_amount = [t[0] for t in sorted(user.holdings.items(), key=lambda x: -x[1])]
     start = page * TOKENS_PER_PAGE
     end = start + TOKENS_PER_PAGE
-    tokens = token_db.get_tokens(tokens_by_amount[start:end])
+    tokens = await token_db.get_tokens(tokens_by_amount[start:end], fields=TOKEN_MENU_FIELDS)
     token_texts = [
         (
             f'<a href="https://dexscreener.com/solana/{t}?maker={user.wallet_public}">📈</a> '
@@ -138,13 +139,13 @@ async def sell_menu(update: Update, context: ContextTypes.DEFAULT_TYPE, page=0,
 
 async def refresh_sell_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_id = update.effective_user.id
-    user_db.update_user_holdings(user_id)
-    user = user_db.get_user(user_id)
+    await user_db.update_user_holdings(user_id)
+    user = await user_db.get_user(user_id)
     page = context.user_data.get("sell_menu_page", 0)
     tokens_by_amount = [t[0] for t in sorted(user.holdings.items(), key=lambda x: -x[1])]
     start = page * TOKENS_PER_PAGE
     end = start + TOKENS_PER_PAGE
-    token_db.update_price(tokens_by_amount[start:end])
+    await token_db.update_price(tokens_by_amount[start:end])
     return await sell_menu(update, context, page=page)
 
 
@@ -74,7 +74,7 @@ async def sell_token(update: Update, context: ContextTypes.DEFAULT_TYPE, new=Fal
     query = update.callback_query
     await query.answer()
 
-    user = user_db.get_user(user_id)
+    user = await user_db.get_user(user_id)
     if not token_mint:
         token_mint = query.data.split("_")[1]
     token = await token_db.add_token(token_mint)
@@ -207,13 +207,13 @@ def progress_bar(progress, length):
 
 
 async def sell_token_new(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    user_db.update_user_positions(update.effective_user.id, get_prices=True)
+    await user_db.update_user_positions(update.effective_user.id, get_prices=True)
     return await sell_token(update, context, new=True)
 
 
 async def refresh_token_sell(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     await token_db.update_price(update.callback_query.data.split("_")[1])
-    user_db.update_user_positions(update.effective_user.id, update_holdings=True, get_prices=True)
+    await user_db.update_user_positions(update.effective_user.id, update_holdings=True, get_prices=True)
     return await sell_token(update, context, new=False)
 
 
@@ -274,7 +274,7 @@ async def process_custom_input(update: Update, context: ContextTypes.DEFAULT_TYP
             percentage = min(100, percentage)
 
         token_mint = context.user_data["last_mint"]
-        user = user_db.get_user(user_id)
+        user = await user_db.get_user(user_id)
         position = user.positions[token_mint]
         token = await token_db.get_token(token_mint)
 
@@ -317,7 +317,7 @@ async def execute_sell(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
     query = update.callback_query
     await query.answer()
     user_id = update.effective_user.id
-    user = user_db.get_user(user_id)
+    user = await user_db.get_user(user_id)
 
     mint = context.user_data[query.message.message_id]
     options = context.user_data[f"sell_message_options_{mint}"]
@@ -358,7 +358,7 @@ async def execute_sell(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
 async def process_sell(update: Update, context: ContextTypes.DEFAULT_TYPE, delete=True) -> int:
     query = update.callback_query
     user_id = update.effective_user.id
-    user = user_db.get_user(user_id)
+    user = await user_db.get_user(user_id)
 
     mint = context.user_data["last_mint"]
     options = context.user_data[f"sell_message_options_{mint}"]
@@ -9,6 +9,7 @@ from telegram.ext import ContextTypes
 from telegram.ext import ConversationHandler
 
 from celeritas.db import token_db
+from celeritas.db import TOKEN_MENU_FIELDS
 from celeritas.db import user_db
 from celeritas.telegram_bot.callbacks import *
 from celeritas.telegram_bot.handlers.sell_handler import token_sell_conv_handler
@@ -91,7 +92,7 @@ async def get_tokens(tokens):
         else None
     )
     tokens_info = {"SOL": sol} if sol else {}
-    tokens_info.update(await token_db.get_tokens([token for token in tokens if token != "SOL"]))
+    tokens_info.update(await token_db.get_tokens([token for token in tokens if token != "SOL"], fields=TOKEN_MENU_FIELDS))
     return tokens_info
 
 
@@ -99,7 +100,7 @@ async def token_menu(
     update: Update, context: ContextTypes.DEFAULT_TYPE, page=0, new=False, action_type="sell"
 ) -> int:
     user_id = update.effective_user.id
-    user = user_db.get_user(user_id)
+    user = await user_db.get_user(user_id)
     query = update.callback_query
     if query: await query.answer()
 
@@ -148,8 +149,8 @@ async def withdraw_menu_new(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
 async def refresh_sell_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_id = update.effective_user.id
-    user_db.update_user_holdings(user_id)
-    user = user_db.get_user(user_id)
+    await user_db.update_user_holdings(user_id)
+    user = await user_db.get_user(user_id)
     page = context.user_data.get("sell_menu_page", 0)
         
     token_prices = await token_db.get_prices(list(user.holdings.keys()))
@@ -167,8 +168,8 @@ async def refresh_sell_menu(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
 async def refresh_withdraw_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_id = update.effective_user.id
-    user_db.update_user_holdings(user_id)
-    user = user_db.get_user(user_id)
+    await user_db.update_user_holdings(user_id)
+    user = await user_db.get_user(user_id)
     page = context.user_data.get("withdraw_menu_page", 0)
     tokens_by_amount = [t[0] for t in sorted(user.holdings.items(), key=lambda x: -x[1])]
     start = page * TOKENS_PER_PAGE
@@ -77,7 +77,7 @@ def sell_settings_text():
 
 async def sell_settings(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_id = update.effective_user.id
-    user_settings = user_db.get_user_settings(user_id)
+    user_settings = await user_db.get_user_settings(user_id)
     query = update.callback_query
     await query.answer()
     reply_markup = generate_sell_settings_keyboard(user_settings)
@@ -108,9 +108,9 @@ async def sell_amount_input(update: Update, context: ContextTypes.DEFAULT_TYPE)
     try:
         sell_amount = float(update.message.text.replace("%", ""))
         sell_amount = int(min(100, max(1, sell_amount)))
-        user_settings = user_db.get_user_settings(user_id)
+        user_settings = await user_db.get_user_settings(user_id)
         user_settings.sell_amounts[target_index] = sell_amount
-        user_db.update_user_settings(user_id, "sell_amounts", user_settings.sell_amounts)
+        await user_db.update_user_settings(user_id, "sell_amounts", user_settings.sell_amounts)
         reply_markup = generate_sell_settings_keyboard(user_settings)
         # Delete the message where the user entered their sell amount
         await delete_messages(
@@ -151,7 +151,7 @@ async def sell_slippage_input(update: Update, context: ContextTypes.DEFAULT_TYPE
     try:
         slippage = float(update.message.text.replace("%", ""))
         slippage = int(max(1, slippage))
-        user_settings = user_db.update_user_settings(user_id, "sell_slippage", slippage)
+        user_settings = await user_db.update_user_settings(user_id, "sell_slippage", slippage)
         reply_markup = generate_sell_settings_keyboard(user_settings)
         await delete_messages(
             context,
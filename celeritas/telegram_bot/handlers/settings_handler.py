@@ -96,7 +96,7 @@ def settings_text():
 
 async def settings(update: Update, context: ContextTypes.DEFAULT_TYPE, new=False) -> int:
     user_id = update.effective_user.id
-    current_user_settings = user_db.get_user_settings(user_id)
+    current_user_settings = await user_db.get_user_settings(user_id)
     query = update.callback_query
     if query: await query.answer()
     
@@ -132,7 +132,7 @@ async def set_fee_fast(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
     user_id = update.effective_user.id
     query = update.callback_query
     await query.answer()
-    current_user_settings = user_db.update_user_settings(user_id, "priority_fee", FAST_FEE)
+    current_user_settings = await user_db.update_user_settings(user_id, "priority_fee", FAST_FEE)
     # Edit keyboard to reflect changed settings
     reply_markup = await generate_settings_keyboard(current_user_settings)
     await query.edit_message_text(text=settings_text(), reply_markup=reply_markup, parse_mode="HTML")
@@ -143,7 +143,7 @@ async def set_fee_lightning(update: Update, context: ContextTypes.DEFAULT_TYPE)
     user_id = update.effective_user.id
     query = update.callback_query
     await query.answer()
-    current_user_settings = user_db.update_user_settings(user_id, "priority_fee", LIGHTNING_FEE)
+    current_user_settings = await user_db.update_user_settings(user_id, "priority_fee", LIGHTNING_FEE)
     # Edit keyboard to reflect changed settings
     reply_markup = await generate_settings_keyboard(current_user_settings)
     await query.edit_message_text(text=settings_text(), reply_markup=reply_markup, parse_mode="HTML")
@@ -164,7 +164,7 @@ async def custom_fee_input(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     try:
         fee_size = float(update.message.text)
         fee_size = max(0.0004, fee_size)
-        current_user_settings = user_db.update_user_settings(user_id, "priority_fee", fee_size)
+        current_user_settings = await user_db.update_user_settings(user_id, "priority_fee", fee_size)
         reply_markup = await generate_settings_keyboard(current_user_settings)
         # Delete the message where the user entered their custom fee
         # and the user's response message
@@ -206,7 +206,7 @@ async def min_pos_value_input(update: Update, context: ContextTypes.DEFAULT_TYPE
     chat_id = update.effective_chat.id
     try:
         min_pos_value = max(0, float(update.message.text))
-        current_user_settings = user_db.update_user_settings(user_id, "min_pos_value", min_pos_value)
+        current_user_settings = await user_db.update_user_settings(user_id, "min_pos_value", min_pos_value)
         await delete_messages(
             context,
             chat_id,
@@ -236,9 +236,7 @@ async def confirm_trades(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     query = update.callback_query
     await query.answer()
     # Update user settings
-    current_user_settings = user_db.update_user_settings(
-        user_id, "confirm_trades", not user_db.get_user_settings(user_id).confirm_trades
-    )
+    current_user_settings = await user_db.toggle_user_setting(user_id, "confirm_trades")
     # Edit keyboard to reflect changed settings
     reply_markup = await generate_settings_keyboard(current_user_settings)
     await query.edit_message_text(text=settings_text(), reply_markup=reply_markup, parse_mode="HTML")
@@ -250,9 +248,7 @@ async def mev_protection(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     query = update.callback_query
     await query.answer()
     # Update user settings
-    current_user_settings = user_db.update_user_settings(
-        user_id, "mev_protection", not user_db.get_user_settings(user_id).mev_protection
-    )
+    current_user_settings = await user_db.toggle_user_setting(user_id, "mev_protection")
     # Edit keyboard to reflect changed settings
     reply_markup = await generate_settings_keyboard(current_user_settings)
     await query.edit_message_text(text=settings_text(), reply_markup=reply_markup, parse_mode="HTML")
@@ -264,9 +260,7 @@ async def chart_previews(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     query = update.callback_query
     await query.answer()
     # Update user settings
-    current_user_settings = user_db.update_user_settings(
-        user_id, "chart_previews", not user_db.get_user_settings(user_id).chart_previews
-    )
+    current_user_settings = await user_db.toggle_user_setting(user_id, "chart_previews")
     # Edit keyboard to reflect changed settings
     reply_markup = await generate_settings_keyboard(current_user_settings)
     await query.edit_message_text(text=settings_text(), reply_markup=reply_markup, parse_mode="HTML")
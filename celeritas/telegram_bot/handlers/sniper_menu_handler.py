@@ -69,7 +69,7 @@ async def generate_wallet_text(user, wallet):
 
 async def sniper_menu(update: Update, context: ContextTypes.DEFAULT_TYPE, page=0, new=False) -> int:
     user_id = update.effective_user.id
-    user = user_db.get_user(user_id)
+    user = await user_db.get_user(user_id)
     query = update.callback_query
     if query: await query.answer()
 
@@ -104,7 +104,7 @@ async def refresh_sniper_menu(update: Update, context: ContextTypes.DEFAULT_TYPE
 
 async def add_sniper_setup(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_id = update.effective_user.id
-    sniping = user_db.get_attribute(user_id, "sniping")
+    sniping = await user_db.get_attribute(user_id, "sniping")
     # Check if none is in sniping
     if not any(setup.get("wallet") is None for setup in sniping):
         sniping.append(
@@ -117,7 +117,7 @@ async def add_sniper_setup(update: Update, context: ContextTypes.DEFAULT_TYPE) -
                 "priority_fee": 0.01,
             }
         )
-    user_db.update_attribute(user_id, "sniping", sniping)
+    await user_db.update_attribute(user_id, "sniping", sniping)
     page = context.user_data.get("sniper_menu_page", 0)
     return await sniper_menu(update, context, page=page)
 
@@ -140,7 +140,7 @@ async def edit_sniper_setup(update: Update, context: ContextTypes.DEFAULT_TYPE)
     await query.answer()
     wallet = query.data.split("_")[1]
     user_id = update.effective_user.id
-    user = user_db.get_user(user_id)
+    user = await user_db.get_user(user_id)
 
     # Find the sniping setup for the given wallet
     if wallet == "None":
@@ -246,9 +246,9 @@ async def generate_sniper_setup_text(setup):
 
 async def remove_sniper_setup(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_id = update.effective_user.id
-    sniping = user_db.get_attribute(user_id, "sniping")
+    sniping = await user_db.get_attribute(user_id, "sniping")
     del sniping[context.user_data["setup_index"]]
-    user_db.update_attribute(user_id, "sniping", sniping)
+    await user_db.update_attribute(user_id, "sniping", sniping)
     return await sniper_menu(update, context, page=context.user_data.get("sniper_menu_page", 0))
 
 
@@ -311,7 +311,7 @@ async def process_custom_input_sniper(update: Update, context: ContextTypes.DEFA
             value = max(0.001, value)
 
         setup_index = context.user_data["setup_index"]
-        user = user_db.get_user(user_id)
+        user = await user_db.get_user(user_id)
         # check if a sniping setup isn't already present for the wallet
         if option == "wallet" and any(s["wallet"] == value for s in user.sniping):
             await update.message.reply_text("You can't have more than one sniping setup for a wallet.")
@@ -327,7 +327,7 @@ async def process_custom_input_sniper(update: Update, context: ContextTypes.DEFA
                 "min_sol_cost"
             ]
             # Update the database
-            user_db.update_attribute(user_id, "sniping", user.sniping)
+            await user_db.update_attribute(user_id, "sniping", user.sniping)
 
         # Update the message
         reply_markup = await generate_sniper_setup_keyboard(user.sniping[setup_index])
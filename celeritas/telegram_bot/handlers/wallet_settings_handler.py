@@ -51,7 +51,7 @@ async def wallet_settings(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     await query.answer()
 
     user_id = update.effective_user.id
-    user = user_db.get_user(user_id)
+    user = await user_db.get_user(user_id)
     reply_markup = generate_wallet_settings_keyboard(user)
 
     # Edit the settings panel message and store the message ID
@@ -68,7 +68,7 @@ async def wallet_export(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
     await query.answer()
     
     user_id = update.effective_user.id
-    user = user_db.get_user(user_id)
+    user = await user_db.get_user(user_id)
     text = (
         f"<code>{user.wallet_secret}</code>\n\n"
         "<b>Beware that by exporting your wallet,"
@@ -94,7 +94,7 @@ async def wallet_import(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
     await query.answer()
 
     user_id = update.effective_user.id
-    user = user_db.get_user(user_id)
+    user = await user_db.get_user(user_id)
 
     confirmation_text = (
         f"⚠️ <b><u>Important: Wallet Import Confirmation</u></b>\n\n"
@@ -133,9 +133,9 @@ async def wallet_import_input(update: Update, context: ContextTypes.DEFAULT_TYPE
     chat_id = update.effective_chat.id
     try:
         keypair = Keypair.from_base58_string(update.message.text)
-        user_db.update_attribute(user_id, "wallet_public", str(keypair.pubkey()))
-        user_db.update_attribute(user_id, "wallet_secret", str(keypair))
-        user = user_db.get_user(user_id)
+        await user_db.update_attribute(user_id, "wallet_public", str(keypair.pubkey()))
+        await user_db.update_attribute(user_id, "wallet_secret", str(keypair))
+        user = await user_db.get_user(user_id)
         reply_markup = generate_wallet_settings_keyboard(user)
         await delete_messages(
             context,
@@ -20,14 +20,15 @@ from telegram.ext import ConversationHandler
 from telegram.ext import filters
 from telegram.ext import MessageHandler
 
+from celeritas.blockhash import blockhash_service
 from celeritas.constants import aclient
 from celeritas.constants import LAMPORTS_PER_SOL
 from celeritas.db import token_db
 from celeritas.db import user_db
 from celeritas.telegram_bot.callbacks import *
+from celeritas.telegram_bot.fetch_tx_update_msg import schedule_withdrawal_update
 from celeritas.telegram_bot.utils import delete_messages
 from celeritas.telegram_bot.utils import edit_message
-from celeritas.telegram_bot.utils import get_blockhash
 from celeritas.telegram_bot.utils import nice_float_price_format as nfpf
 from celeritas.telegram_bot.utils import sol_dollar_value
 from celeritas.telegram_bot.utils import utc_time_now
@@ -82,7 +83,7 @@ async def withdraw(update: Update, context: ContextTypes.DEFAULT_TYPE, new=False
     query = update.callback_query
     await query.answer()
 
-    user = user_db.get_user(user_id)
+    user = await user_db.get_user(user_id)
 
     if not mint:
         mint = query.data.split("_")[1]
@@ -148,7 +149,7 @@ async def withdraw_new(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
 
 
 async def refresh_withdraw(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    user_db.update_user_holdings(update.effective_user.id)
+    await user_db.update_user_holdings(update.effective_user.id)
     return await withdraw(update, context, new=False)
 
 
@@ -184,7 +185,7 @@ async def custom_percentage_input(update: Update, context: ContextTypes.DEFAULT_
         percentage = float(update.message.text.replace("%", ""))
         percentage = min(100, max(1, percentage))
 
-        user = user_db.get_user(user_id)
+        user = await user_db.get_user(user_id)
 
         mint = context.user_data["last_mint"]
         context.user_data[f"withdraw_message_options_{mint}"]["percentage_to_withdraw"] = percentage
@@ -228,7 +229,7 @@ async def wallet_for_withdraw_input(update: Update, context: ContextTypes.DEFAUL
     chat_id = update.effective_chat.id
     try:
         wallet = str(Pubkey.from_string(update.message.text))
-        user = user_db.get_user(user_id)
+        user = await user_db.get_user(user_id)
 
         mint = context.user_data["last_mint"]
         context.user_data[f"withdraw_message_options_{mint}"]["wallet"] = wallet
@@ -272,7 +273,7 @@ async def whole_amount_for_withdraw_input(update: Update, context: ContextTypes.
     chat_id = update.effective_chat.id
     try:
         amount = float(update.message.text)
-        user = user_db.get_user(user_id)
+        user = await user_db.get_user(user_id)
 
         mint = context.user_data["last_mint"]
         percentage = min(
@@ -311,7 +312,7 @@ async def execute_withdraw(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     query = update.callback_query
     await query.answer()
     user_id = update.effective_user.id
-    user = user_db.get_user(user_id)
+    user = await user_db.get_user(user_id)
 
     mint = context.user_data[query.message.message_id]
     t_symbol = "SOL" if mint == "SOL" else (await token_db.get_token(mint))["symbol"]
@@ -360,7 +361,7 @@ async def execute_withdraw(update: Update, context: ContextTypes.DEFAULT_TYPE) -
 async def process_withdraw(update: Update, context: ContextTypes.DEFAULT_TYPE, delete=True) -> int:
     query = update.callback_query
     user_id = update.effective_user.id
-    user = user_db.get_user(user_id)
+    user = await user_db.get_user(user_id)
 
     mint = context.user_data["last_mint"]
     options = context.user_data[f"withdraw_message_options_{mint}"]
@@ -402,8 +403,8 @@ async def process_withdraw(update: Update, context: ContextTypes.DEFAULT_TYPE, d
 
     await message.edit_text(text=text, parse_mode="HTML", disable_web_page_preview=True)
 
-    # if txs:
-    #    await schedule_tx_update(context, message.chat_id, message.message_id, user_id, txs, "SOL", user.wallet_public)
+    if txs:
+        await schedule_withdrawal_update(context, message.chat_id, message.message_id, txs)
 
     return WITHDRAW
 
@@ -419,7 +420,7 @@ async def send_withdrawal(sender_secret, receiver, mint, amount):
             mint_pubkey = Pubkey.from_string(mint)
             ixs = await spl_token_withdrawal_ixs(keypair, receiver, mint_pubkey, amount)
 
-        message = MessageV0.try_compile(keypair.pubkey(), ixs, [], get_blockhash())
+        message = MessageV0.try_compile(keypair.pubkey(), ixs, [], await blockhash_service.get_fresh())
         tx = VersionedTransaction(message, [keypair])
         txs = await aclient.send_transaction(
             tx, opts=TxOpts(skip_preflight=True, preflight_commitment="confirmed")
@@ -1,9 +1,6 @@
 import datetime
-import time
 
-import requests
-from solana.rpc.api import Client
-from solders.hash import Hash
+from celeritas.sol_price import sol_price_service
 
 
 async def delete_messages(context, chat_id, *message_ids):
@@ -49,20 +46,8 @@ def center_arrow(top_line, bottom_line, arrow="⇅", width=34):
 
 
 def sol_dollar_value():
-    with open("data/sol_price", "r") as f:
-        timestamp, price = map(float, f.read().split())
-    # Fetch a new sol price if current is older than two minutes
-    if time.time() - timestamp > 120:
-        r = requests.get(
-            "https://api.coinmarketcap.com/data-api/v3/cryptocurrency/market-pairs/latest?slug=solana&start=1&limit=10&category=spot&centerType=all&sort=cmc_rank_advanced&direction=desc&spotUntracked=true"
-        )
-        if r.status_code != 200:
-            raise Exception("Failed to retreive a new SOL/USD price")
-        prices = [p["price"] for p in r.json()["data"]["marketPairs"]]
-        price = sum(prices) / len(prices)
-        with open("data/sol_price", "w") as f:
-            f.write(f"{time.time()} {price}")
-    return price
+    """In-memory SOL/USD price, celeritas.sol_price.sol_price_service has to be started by the process"""
+    return sol_price_service.value()
 
 
 def nice_float_price_format(price: float, underline=False) -> str:
@@ -92,20 +77,3 @@ def nice_float_price_format(price: float, underline=False) -> str:
         )
     else:
         return f"{price:.4f}".rstrip("0")
-
-
-def get_blockhash():
-    try:
-        with open("data/blockhash", "r") as f:
-            timestamp, blockhash_str = f.read().split()
-            timestamp = float(timestamp)
-    except FileNotFoundError:
-        timestamp = 0
-        blockhash_str = ""
-    if time.time() - timestamp > 40:
-        client = Client("https://api.mainnet-beta.solana.com")
-        new_blockhash = client.get_latest_blockhash().value.blockhash
-        with open("data/blockhash", "w") as f:
-            f.write(f"{time.time()} {new_blockhash.__str__()}")
-        return new_blockhash
-    return Hash.from_string(blockhash_str)
@@ -5,7 +5,6 @@ import httpx
 from jupiter_python_sdk.jupiter import Jupiter
 from solana.rpc.commitment import Commitment
 from solana.rpc.types import TokenAccountOpts
-from solana.rpc.types import TxOpts
 from solders.compute_budget import set_compute_unit_limit
 from solders.compute_budget import set_compute_unit_price
 from solders.instruction import AccountMeta
@@ -22,14 +21,14 @@ from spl.token.instructions import CloseAccountParams
 from spl.token.instructions import create_associated_token_account
 from spl.token.instructions import get_associated_token_address
 
+from celeritas.blockhash import blockhash_service
+from celeritas.broadcaster import broadcaster
 from celeritas.config import config
 from celeritas.constants import aclient
-from celeritas.constants import client
 from celeritas.constants import LAMPORTS_PER_SOL
 from celeritas.constants import SOLANA_MINT
 from celeritas.constants import WRAPPED_SOL
 from celeritas.db import token_db
-from celeritas.telegram_bot.utils import get_blockhash
 from celeritas.transact_utils import get_pool_id_by_mint
 from celeritas.transact_utils import get_quote_info_from_pool
 from celeritas.transact_utils import get_token_account
@@ -68,7 +67,7 @@ class Transact:
 
     def __init__(
         self,
-        wallet_secret: str,
+        wallet_secret: str | Keypair,
         platform_fee_pubkey: str = None,
         platform_fee_bps: int = 50,
         fee_sol: float = 0.00007,
@@ -77,7 +76,7 @@ class Transact:
         self.compute_unit_price = int(
             fee_sol * 10**15 / self.compute_unit_limit
         )  # unit price is in microlamports, sol is 10**9 lamports, lamport is 10**6 microlamports
-        self.keypair = Keypair.from_base58_string(wallet_secret)
+        self.keypair = wallet_secret if isinstance(wallet_secret, Keypair) else Keypair.from_base58_string(wallet_secret)
         self.platform_fee_bps = platform_fee_bps
         self.jupiter = Jupiter(
             async_client=aclient,
@@ -119,7 +118,7 @@ class Transact:
                     )
                 )
             )
-        recent_blockhash = get_blockhash()
+        recent_blockhash = await blockhash_service.get_fresh()
         compiled_message = MessageV0.try_compile(
             self.keypair.pubkey(),
             ixs,
@@ -460,10 +459,7 @@ class Transact:
     async def construct_and_send(self, quote, fee):
         try:
             tx = await self._create_transaction(quote, fee=fee)  # add transaction fee in sol
-            txs = await aclient.send_transaction(
-                tx, opts=TxOpts(skip_preflight=True, preflight_commitment="confirmed")
-            )
-            return txs.value
+            return await broadcaster.broadcast(bytes(tx), blockhash_service.last_valid_block_height)
         except Exception as e:
             logger.info(f"Failed constructing or sending transaction: {e}")
             return None
@@ -1,9 +1,5 @@
-import json
-import os
 import struct
-import time
 
-import aiohttp
 from construct import BitsInteger
 from construct import BitsSwapped
 from construct import BitStruct
@@ -25,6 +21,9 @@ from spl.token.instructions import get_associated_token_address
 
 from celeritas.constants import aclient
 from celeritas.constants import LAMPORTS_PER_SOL
+from celeritas.get_token_metadata import account_batcher
+from celeritas.jupiter_tokens import jupiter_tokens
+from celeritas.pool_cache import pool_cache
 
 
 def get_offset(struct, field):
@@ -150,20 +149,12 @@ TOKEN_PROGRAM_ID = Pubkey.from_string("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5
 SERUM_PROGRAM_ID = Pubkey.from_string("srmqPvymJeFKQ4zGQed1GFppgkRHL9kaELCbyksJtPX")
 offset_base_mint = get_offset(AMM_INFO_LAYOUT_V4_1, "coinMintAddress")
 offset_quote_mint = get_offset(AMM_INFO_LAYOUT_V4_1, "pcMintAddress")
-POOL_ID_CACHE_FILE = "data/pool_ids.json"
-POOL_KEYS_CACHE_FILE = "data/pool_keys.json"
-JUPITER_TOKENS_CACHE_FILE = "data/jupiter_tokens_cache.json"
 
 
 async def get_pool_id_by_mint(input_mint, output_mint):
-    if os.path.exists(POOL_ID_CACHE_FILE):
-        with open(POOL_ID_CACHE_FILE, "r") as f:
-            pool_id_cache = json.load(f)
-    else:
-        pool_id_cache = {}
-    cache_key = "".join(sorted([input_mint.__str__(), output_mint.__str__()]))
-    if cache_key in pool_id_cache:
-        return Pubkey.from_string(pool_id_cache[cache_key])
+    pool_id = await pool_cache.get_pool_id(input_mint, output_mint)
+    if pool_id:
+        return pool_id
     inout = [
         MemcmpOpts(offset=offset_base_mint, bytes=bytes(input_mint)),
         MemcmpOpts(offset=offset_quote_mint, bytes=bytes(output_mint)),
@@ -190,9 +181,7 @@ async def get_pool_id_by_mint(input_mint, output_mint):
     ).value
     if len(poolids):
         pool_id = poolids[0].pubkey
-        pool_id_cache[cache_key] = pool_id.__str__()
-        with open(POOL_ID_CACHE_FILE, "w") as f:
-            json.dump(pool_id_cache, f)
+        await pool_cache.set_pool_id(input_mint, output_mint, pool_id)
     else:
         pool_id = None
 
@@ -204,21 +193,18 @@ async def get_bonding_curve(bonding_curve):
     return PUMP_FUN_BONDING_CURVE_LAYOUT.parse(data)
 
 
-async def get_transaction_keys(amm):
-    # Load the cache if it exists
-    if os.path.exists(POOL_KEYS_CACHE_FILE):
-        with open(POOL_KEYS_CACHE_FILE, "r") as f:
-            transaction_keys_cache = json.load(f)
-    else:
-        transaction_keys_cache = {}
+async def get_bonding_curves(bonding_curves: list) -> list:
+    """Decoded bonding curves, None for missing accounts, fetched with batched getMultipleAccounts calls"""
+    return [
+        None if data is None else PUMP_FUN_BONDING_CURVE_LAYOUT.parse(data)
+        for data in await account_batcher.load_many(bonding_curves)
+    ]
+
 
+async def get_transaction_keys(amm):
     # Check if the keys for the given AMM are already cached
-    if amm.__str__() in transaction_keys_cache:
-        cached_keys = transaction_keys_cache[amm.__str__()]
-        # Convert string representations back to Pubkey objects
-        for key in cached_keys:
-            if key not in ["base_decimals", "quote_decimals"]:
-                cached_keys[key] = Pubkey.from_string(cached_keys[key])
+    cached_keys = await pool_cache.get_pool_keys(amm)
+    if cached_keys:
         return cached_keys
 
     # Fetch and decode the data from the blockchain
@@ -281,48 +267,14 @@ async def get_transaction_keys(amm):
     ]
 
     transactionkeys = {key: pool_keys[key] for key in Buy_keys}
-    serializable_keys = {}
-    for key, value in transactionkeys.items():
-        if isinstance(value, Pubkey):
-            serializable_keys[key] = str(value)
-        else:
-            serializable_keys[key] = value
-
     # Cache the fetched data
-    transaction_keys_cache[amm.__str__()] = serializable_keys
-    with open(POOL_KEYS_CACHE_FILE, "w") as f:
-        json.dump(transaction_keys_cache, f)
+    await pool_cache.set_pool_keys(amm, transactionkeys)
 
     return transactionkeys
 
 
 async def is_jupiter_token(mint: str) -> bool:
-    # Load the cache if it exists
-    if os.path.exists(JUPITER_TOKENS_CACHE_FILE):
-        with open(JUPITER_TOKENS_CACHE_FILE, "r") as f:
-            cache = json.load(f)
-        # Check if the cache is less than 24 hours old
-        if (time.time() - cache["timestamp"]) < 3600:  # 3600 seconds = 1 hours
-            return mint in cache["tokens"]
-
-    # Fetch the list of tokens from Jupiter API
-    async with aiohttp.ClientSession() as session:
-        async with session.get("https://token.jup.ag/all") as response:
-            if response.status == 200:
-                tokens = await response.json()
-            else:
-                raise Exception(f"Failed to fetch Jupiter tokens: HTTP {response.status}")
-
-    # Extract mint addresses
-    token_mints = {token["address"] for token in tokens}
-
-    # Update the cache
-    cache = {"timestamp": time.time(), "tokens": list(token_mints)}
-    with open(JUPITER_TOKENS_CACHE_FILE, "w") as f:
-        json.dump(cache, f)
-
-    # Check if the given mint is in the list
-    return mint in token_mints
+    return await jupiter_tokens.contains(mint)
 
 
 async def get_token_account(
@@ -461,7 +413,7 @@ async def make_pump_fun_buy_instruction(
     }
 
 
-async def make_pump_fun_snipe_instruction(
+def build_pump_fun_snipe_instruction(
     max_sol_cost,
     output_amount,
     output_mint,
@@ -469,7 +421,7 @@ async def make_pump_fun_snipe_instruction(
     owner_token_account,
     bonding_curve,
     associated_bonding_curve,
-):
+) -> Instruction:
     # Build account key list
     keys = [
         AccountMeta(pubkey=GLOBAL, is_signer=False, is_writable=False),
@@ -493,8 +445,28 @@ async def make_pump_fun_snipe_instruction(
     # Pack integers into binary segments
     binary_segments = [struct.pack("<Q", integer) for integer in integers]
     data = b"".join(binary_segments)
+    return Instruction(PUMP_FUN_PROGRAM, data, keys)
 
-    return Instruction(PUMP_FUN_PROGRAM, data, keys), {
+
+async def make_pump_fun_snipe_instruction(
+    max_sol_cost,
+    output_amount,
+    output_mint,
+    owner_pubkey,
+    owner_token_account,
+    bonding_curve,
+    associated_bonding_curve,
+):
+    ix = build_pump_fun_snipe_instruction(
+        max_sol_cost,
+        output_amount,
+        output_mint,
+        owner_pubkey,
+        owner_token_account,
+        bonding_curve,
+        associated_bonding_curve,
+    )
+    return ix, {
         "current_price": 0.00000003,
         "price_inpact": None,
         "token_amount_out": output_amount,
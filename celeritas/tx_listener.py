@@ -1,18 +1,24 @@
 import asyncio
-import json
 import logging
 import signal
-import websockets
+import time
 
 from solders.signature import Signature
 from solders.pubkey import Pubkey
 
 from telegram.ext import Application
 
+from celeritas.db import init_db
 from celeritas.db import transaction_db
+from celeritas.db import trade_db
 from celeritas.db import user_db
+from celeritas.block_decoder import DecodedTransaction
+from celeritas.block_stream import get_block_stream
 from celeritas.config import config
-from celeritas.constants import SOLANA_MINT, SOLANA_WS_URL, LAMPORTS_PER_SOL
+from celeritas.metrics import StageMetrics
+from celeritas.pending_signatures import PendingSignatures
+from celeritas.sol_price import sol_price_service
+from celeritas.constants import SOLANA_MINT, LAMPORTS_PER_SOL
 from celeritas.telegram_bot.utils import sol_dollar_value
 from celeritas.telegram_bot.fetch_tx_update_msg import (
     update_fees,
@@ -32,30 +38,17 @@ except:
 
 application = Application.builder().token(config.telegram_bot_token).build()
 
-def parse_transaction_data(tx: dict, user_pubkey: str, mint: str, block_time) -> dict:
-    account_keys = [key['pubkey'] for key in  tx['transaction']['message']['accountKeys']]
+def parse_transaction_data(tx: DecodedTransaction, user_pubkey: str, mint: str, block_time) -> dict:
     sol_balance_change = {
-        key: (
-            tx['meta']['preBalances'][ix],
-            tx['meta']['postBalances'][ix],
-        )
-        for ix, key in enumerate(account_keys)
+        key: (tx.pre_balances[ix], tx.post_balances[ix]) for ix, key in enumerate(tx.account_keys)
     }
 
     pre_token_balance = next(
-        (
-            b['uiTokenAmount']['uiAmount']
-            for b in tx['meta']['preTokenBalances']
-            if b['owner'] == user_pubkey and b['mint'] == mint
-        ),
+        (b.ui_amount for b in tx.pre_token_balances if b.owner == user_pubkey and b.mint == mint),
         0,
     )
     post_token_balance = next(
-        (
-            b['uiTokenAmount']['uiAmount']
-            for b in tx['meta']['postTokenBalances']
-            if b['owner'] == user_pubkey and b['mint'] == mint
-        ),
+        (b.ui_amount for b in tx.post_token_balances if b.owner == user_pubkey and b.mint == mint),
         0,
     )
 
@@ -63,6 +56,7 @@ def parse_transaction_data(tx: dict, user_pubkey: str, mint: str, block_time) ->
     fee_paid = (lambda x: x[1] - x[0])(sol_balance_change.get(PLATFORM_FEE_PUBKEY, (0, 0)))
 
     return {
+        "tx_signature": tx.signature,
         "timestamp": block_time,
         "mint": mint,
         "pre_sol_balance": pre_sol_balance / LAMPORTS_PER_SOL,
@@ -73,8 +67,8 @@ def parse_transaction_data(tx: dict, user_pubkey: str, mint: str, block_time) ->
         "fee_paid": fee_paid / LAMPORTS_PER_SOL,
     }
 
-async def update_message(message_info, tx, block_time):
-    if tx['meta']['err']:
+async def update_message(message_info, tx: DecodedTransaction, block_time):
+    if tx.err:
         await application.bot.edit_message_text(
             chat_id=message_info['user_id'],
             message_id=message_info['message_id'],
@@ -98,81 +92,97 @@ async def update_message(message_info, tx, block_time):
     )
     return parsed_tx_data
 
-async def unsubscribe():
-    if websocket_connection and subscription_id:
-        unsubscribe_params = {
-            "jsonrpc": "2.0",
-            "id": 2,
-            "method": "logsUnsubscribe",
-            "params": [subscription_id],
-        }
-        await websocket_connection.send(json.dumps(unsubscribe_params))
-        logger.info("Unsubscribed from logs")
-
-websocket_connection = None
-subscription_id = None
-
-async def subscribe_blocks():
-    global websocket_connection
-    global subscription_id
-
-    async with websockets.connect(SOLANA_WS_URL) as websocket:
-        websocket_connection = websocket
-        # Construct the subscription request payload
-        params = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "blockSubscribe",
-            "params": [
-                {"mentionsAccountOrProgram": PLATFORM_FEE_PUBKEY},
-                {
-                    "commitment": "confirmed",  # The level of commitment required
-                    "transactionDetails": "full",  # The level of transaction detail to return
-                    "showRewards": False,  # Whether to populate the 'rewards' array
-                    "encoding": "jsonParsed",  # Encoding format for account data
-                    "maxSupportedTransactionVersion": 0,
-                },
-            ],
-        }
-        await websocket.send(json.dumps(params))
-        logger.info("Tx Listener started.")
-
-        while True:
-            response = await websocket.recv()
-            data = json.loads(response)
-            if "params" in data:
-                for tx in data['params']['result']['value']['block']['transactions']:
-                    sig = tx['transaction']['signatures'][0]
-
-                    message_info = await transaction_db.fetch_transaction(sig)
-                    if not message_info: continue
-                    tx_data = await update_message(
-                        message_info,
-                        tx,
-                        data['params']['result']['value']['block']['blockTime']
-                    )
-                    await transaction_db.delete_transaction(sig)
-                    # Update db
-                    if tx_data:
-                        user_id = message_info['user_id']
-                        user = user_db.get_user(user_id)
-                        user.transactions.append(tx_data)
-                        user.revenue += tx_data["fee_paid"]
-                        user_db.update_attribute(user_id, "revenue", user.revenue)
-                        user_db.update_attribute(user_id, "transactions", user.transactions)
-                        update_fees(user.referrer, tx_data["fee_paid"], 0)
-
-            if "result" in data and "id" in data and data["id"] == 1:
-                subscription_id = data["result"]
+# Bounded queues between the stages, a slow stage makes the previous one wait instead of growing memory
+BLOCK_QUEUE_SIZE = 100
+CONFIRMATION_QUEUE_SIZE = 1000
+N_WORKERS = 16
+METRICS_INTERVAL = 60
+
+pending_signatures = PendingSignatures()
+# Confirmations only need keys and balances, the accounts detail level leaves out instructions
+block_stream = get_block_stream(PLATFORM_FEE_PUBKEY, transaction_details="accounts", encoding="json")
+block_queue = block_stream.subscribe(maxsize=BLOCK_QUEUE_SIZE)
+confirmation_queue = asyncio.Queue(maxsize=CONFIRMATION_QUEUE_SIZE)
+metrics = {
+    "lookup": StageMetrics("lookup"),
+    "confirm": StageMetrics("confirm"),
+}
+
+
+async def lookup_blocks():
+    """Lookup stage, matches the signatures of a block against the pending set, Mongo is only queried for matches"""
+    while True:
+        slot, block, received = await block_queue.get()
+        try:
+            txs = {tx.signature: tx for tx in block['transactions']}
+            matches = await pending_signatures.match(txs, received)
+            pending = await transaction_db.fetch_transactions(matches) if matches else {}
+            for sig, message_info in pending.items():
+                await confirmation_queue.put((message_info, txs[sig], block['blockTime'], received))
+            metrics["lookup"].observe(time.perf_counter() - received)
+        except Exception as e:
+            logger.error(f"Failed looking up transactions of block {slot}: {e}")
+        finally:
+            block_queue.task_done()
+
+
+async def confirm_transactions():
+    """Worker stage, edits the trade message and records the trade"""
+    while True:
+        message_info, tx, block_time, received = await confirmation_queue.get()
+        try:
+            await confirm_transaction(message_info, tx, block_time)
+            metrics["confirm"].observe(time.perf_counter() - received)
+        except Exception as e:
+            logger.error(f"Failed confirming transaction {message_info['tx_signature']}: {e}")
+        finally:
+            confirmation_queue.task_done()
+
+
+async def confirm_transaction(message_info, tx, block_time):
+    pending_signatures.discard(message_info['tx_signature'])
+    tx_data = await update_message(message_info, tx, block_time)
+    await transaction_db.delete_transaction(message_info['tx_signature'])
+    # Update db
+    if tx_data:
+        user_id = message_info['user_id']
+        if await trade_db.insert_trade(user_id, tx_data):
+            await user_db.increment_attribute(user_id, "revenue", tx_data["fee_paid"])
+            await update_fees(await user_db.get_attribute(user_id, "referrer"), tx_data["fee_paid"], 0)
+
+
+async def log_metrics():
+    """Logs per stage latencies (since the block was received) and queue depths"""
+    while True:
+        await asyncio.sleep(METRICS_INTERVAL)
+        logger.info(
+            " | ".join(m.summary() for m in metrics.values())
+            + f" | queued blocks={block_queue.qsize()} confirmations={confirmation_queue.qsize()}"
+        )
+        for m in metrics.values():
+            m.reset()
+
+
+async def run_pipeline():
+    tasks = [
+        asyncio.create_task(lookup_blocks()),
+        asyncio.create_task(log_metrics()),
+        *[asyncio.create_task(confirm_transactions()) for _ in range(N_WORKERS)],
+    ]
+    block_stream.start()
+    logger.info("Tx Listener started.")
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
 
 
 async def shutdown(signal, loop):
     """Cleanup tasks tied to the service's shutdown."""
     logger.info(f"Received exit signal {signal.name}...")
 
-    await unsubscribe()
-    if websocket_connection:
-        await websocket_connection.close()
+    await block_stream.stop()
 
     tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
 
@@ -192,9 +202,12 @@ async def main():
         )
 
     try:
-        await subscribe_blocks()
+        await init_db()
+        await sol_price_service.start()
+        await pending_signatures.start()
+        await run_pipeline()
     except Exception as e: 
-        logger.error("An exception has occurred in subscribe_blocks() of tx_listener:", e)
+        logger.error(f"An exception has occurred in run_pipeline() of tx_listener: {e}")
     finally:
         logger.info("Shutdown complete.")
 
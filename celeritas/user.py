@@ -14,15 +14,15 @@ class User:
             sure information: balance
             additional: avg entry, buys and sells (number and sol/usd value), pnl usd/sol
         Positions are calculated on the fly, based on the users holdings and previous transactions.
-    ``transactions``
-        Sequence (list) with all transactions confirmed through RPC Webhook.
-        Each transaction contains:
+    ``trades``
+        Not stored on the user, confirmed trades live in the ``trades`` collection (see celeritas.db.TradeDB).
+        Each trade contains:
             timestamp,
             mint,
             sol/token balance before and after
             sol_dollar_value at that moment
             fee to bot, useful for revenue calculations
-            {"timestamp": int, "mint": str, "pre_sol_balance": float, "post_sol_balance": float, "pre_token_balance": float, "post_token_balance": float, "sol_dollar_value": float, "fee_paid": str}
+            {"user_id": int, "timestamp": int, "mint": str, "pre_sol_balance": float, "post_sol_balance": float, "pre_token_balance": float, "post_token_balance": float, "sol_dollar_value": float, "fee_paid": str}
     ``sniping``
         A list with all current sniping setups
         Each element contains:
@@ -49,7 +49,6 @@ class User:
         trading_fees_paid_out=0,  # Total trading fees paid out to the user
         sol_in_wallet=0,  # Amount of sol in wallet
         holdings={},  # All tokens
-        transactions=[],  # What token, how much, when, for how much sol
         positions={},  # Created when the user buys token with bot, tracked in the positions page
         ct=None,  # Copy trade
         dca=None,  # Dollar cost averaging
@@ -70,7 +69,6 @@ class User:
         self.trading_fees_paid_out = trading_fees_paid_out
         self.sol_in_wallet = sol_in_wallet
         self.holdings = holdings
-        self.transactions = transactions
         self.positions = positions
         self.ct = ct
         self.dca = dca
@@ -99,7 +97,6 @@ class User:
             "trading_fees_paid_out": self.trading_fees_paid_out,
             "sol_in_wallet": self.sol_in_wallet,
             "holdings": self.holdings,
-            "transactions": self.transactions,
             "positions": self.positions,
             "ct": self.ct,
             "dca": self.dca,
@@ -128,7 +125,6 @@ class User:
             trading_fees_paid_out=data.get("trading_fees_paid_out", 0),
             sol_in_wallet=data.get("sol_in_wallet", 0),
             holdings=data.get("holdings", {}),
-            transactions=data.get("transactions", []),
             positions=data.get("positions", {}),
             ct=data.get("ct"),
             dca=data.get("dca"),